@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""
+Content Maker - Batch entry point
+"""
+
+import sys
+import os
+
+# Add src to path so we can import from the package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+# Import and run the batch main function
+from content_maker.core.batch import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Synthetic source folders for benchmarks
+
+Everything is generated from a seeded RNG, so a given size and seed always
+produce the same corpus and benchmark numbers stay comparable between runs.
+"""
+
+import json
+import os
+import random
+from dataclasses import dataclass
+
+VOCABULARY = (
+    "garden knowledge note idea thread essay seed sapling evergreen link network archive memory "
+    "writing research learning public private digital analog history future community growth "
+    "practice habit system tool workflow creator audience story insight question answer video "
+    "script hook context takeaway ending shot visual narrative structure attention curiosity"
+).split()
+
+# Boilerplate lines that WebScraper._clean_content is meant to drop
+NOISE_LINES = (
+    "Subscribe to our newsletter",
+    "Accept cookie settings",
+    "Share",
+    "Follow us on social media for more",
+    "Read more",
+)
+
+SIZES = {
+    "tiny": {"text": 4, "web": 2, "docs": 1, "images": 1, "words": 300},
+    "small": {"text": 20, "web": 6, "docs": 3, "images": 2, "words": 1500},
+    "medium": {"text": 100, "web": 20, "docs": 10, "images": 5, "words": 3000},
+    "large": {"text": 400, "web": 60, "docs": 30, "images": 10, "words": 6000},
+}
+
+
+@dataclass
+class CorpusSpec:
+    text: int
+    web: int
+    docs: int
+    images: int
+    words: int
+    image_bytes: int = 64 * 1024
+    seed: int = 1234
+
+    @classmethod
+    def for_size(cls, size, **overrides):
+        return cls(**{**SIZES[size], **overrides})
+
+
+def words(rng, count):
+    return " ".join(rng.choice(VOCABULARY) for _ in range(count))
+
+
+def paragraphs(rng, total_words, per_paragraph=60):
+    out = []
+    while total_words > 0:
+        count = min(per_paragraph, total_words)
+        out.append(words(rng, count).capitalize() + ".")
+        total_words -= count
+    return out
+
+
+def html_page(rng, title, total_words):
+    """A page with navigation, boilerplate and a main article, like a typical blog post"""
+    body = "\n".join(f"<p>{paragraph}</p>" for paragraph in paragraphs(rng, total_words))
+    noise = "\n".join(f"<div>{line}</div>" for line in NOISE_LINES)
+    return (
+        f"<html><head><title>{title}</title>"
+        f'<meta name="description" content="{words(rng, 20)}">'
+        "<script>var tracking = true;</script><style>body { color: black; }</style></head>"
+        f"<body><nav>Home About Archive</nav><header>{title}</header>"
+        f"<main><article><h1>{title}</h1>\n{body}\n{noise}</article></main>"
+        "<aside>Related posts</aside><footer>Copyright</footer></body></html>"
+    )
+
+
+def page_text(rng, total_words):
+    """Scraped-looking text: article lines mixed with short and boilerplate lines"""
+    lines = []
+    for paragraph in paragraphs(rng, total_words, per_paragraph=25):
+        lines.append(paragraph)
+        lines.append(rng.choice(NOISE_LINES))
+        lines.append("")
+    return "\n".join(lines)
+
+
+def generate_corpus(directory, spec, base_url="http://127.0.0.1:8000"):
+    """
+    Write a synthetic sources folder
+
+    Args:
+        directory (str): Folder to create
+        spec (CorpusSpec): How many sources of each kind and how long they are
+        base_url (str): Fixture server the webpage and Google Docs sources point at
+
+    Returns:
+        dict: Counts of generated files by kind
+    """
+    rng = random.Random(spec.seed)
+    os.makedirs(directory, exist_ok=True)
+
+    def write_json(name, content):
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            json.dump({"content": content}, f)
+
+    write_json("input.json", f"A short video script about {words(rng, 4)}")
+
+    for i in range(spec.text):
+        write_json(f"text_{i:04d}.json", "\n\n".join(paragraphs(rng, spec.words)))
+
+    for i in range(spec.web):
+        intro = words(rng, 30)
+        if i % 2:
+            # Markdown notes with links are detected as webpage sources
+            with open(os.path.join(directory, f"links_{i:04d}.md"), "w", encoding="utf-8") as f:
+                f.write(f"{intro}\n\nSee {base_url}/page/{i}\n")
+        else:
+            # JSON notes with links are text sources whose URLs get scraped
+            write_json(f"links_{i:04d}.json", f"{intro} {base_url}/page/{i}")
+
+    for i in range(spec.docs):
+        write_json(f"doc_{i:04d}.json", f"Notes: https://docs.google.com/document/d/bench-doc-{i}/edit")
+
+    for i in range(spec.images):
+        with open(os.path.join(directory, f"image_{i:04d}.png"), "wb") as f:
+            f.write(rng.randbytes(spec.image_bytes))
+
+    return {"text": spec.text, "web": spec.web, "docs": spec.docs, "images": spec.images}
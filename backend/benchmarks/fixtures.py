@@ -0,0 +1,251 @@
+"""
+Local stand-ins for the services the pipeline talks to
+
+FixtureServer serves synthetic webpages, Google Docs exports and Docs API
+documents over HTTP on 127.0.0.1. FakeGateway answers inference calls like a TensorZero client
+without any model behind it.
+"""
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from uuid import uuid4
+
+from corpus import html_page, paragraphs
+
+PAGE_PATH = re.compile(r"^/page/(\d+)$")
+DOC_EXPORT_PATH = re.compile(r"^/document/d/([\w-]+)/export$")
+DOC_API_PATH = re.compile(r"^/v1/documents/([\w-]+)$")
+# Docs with IDs like this answer as private docs do: with a redirect to the sign-in page
+PRIVATE_DOC_PREFIX = "private"
+
+
+class _FixtureHTTPServer(ThreadingHTTPServer):
+    # The default backlog of 5 drops connects from a burst of parallel fetches; each retry costs a second
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class FixtureServer:
+    """
+    Background HTTP server for webpage and Google Docs fixtures
+
+    Pages are generated on first request and then served from memory, so
+    fetch timings measure the client side, not page generation. Every response
+    carries an ETag and answers If-None-Match with 304 until revise() changes
+    the doc or set_page() the page.
+    """
+
+    def __init__(self, page_words=800, latency_s=0.0, seed=1234, pages=None):
+        """
+        Args:
+            pages (dict): Extra HTML pages to serve, by path (e.g. hub pages linking to /page/N)
+        """
+        self.page_words = page_words
+        self.latency_s = latency_s
+        self.seed = seed
+        self.requests = 0
+        self.paths = []
+        self.revisions = {}
+        self._pages = {
+            path: ("text/html; charset=utf-8", html.encode("utf-8")) for path, html in (pages or {}).items()
+        }
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def revise(self, doc_id):
+        """Edit a doc: its exports and document change, and so does their ETag"""
+        with self._lock:
+            self.revisions[doc_id] = self.revisions.get(doc_id, 0) + 1
+            for path in [path for path in self._pages if f"/{doc_id}" in path]:
+                del self._pages[path]
+
+    def set_page(self, path, html):
+        """Serve new HTML at path (a hub page edited since the last crawl)"""
+        with self._lock:
+            self._pages[path] = ("text/html; charset=utf-8", html.encode("utf-8"))
+
+    def body_for(self, path):
+        """(content type, body bytes) for a fixture path, or None if unknown"""
+        with self._lock:
+            if path in self._pages:
+                return self._pages[path]
+
+        page = PAGE_PATH.match(path.split("?")[0])
+        doc = DOC_EXPORT_PATH.match(path.split("?")[0]) or DOC_API_PATH.match(path.split("?")[0])
+        if page:
+            rng = random.Random(self.seed + int(page.group(1)))
+            body = ("text/html; charset=utf-8", html_page(rng, f"Fixture page {page.group(1)}", self.page_words))
+        elif doc:
+            revision = self.revisions.get(doc.group(1), 0)
+            rng = random.Random(f"{self.seed}-{doc.group(1)}-{revision}" if revision else f"{self.seed}-{doc.group(1)}")
+            text = paragraphs(rng, self.page_words)
+            if path.startswith("/v1/"):
+                body = ("application/json; charset=UTF-8", json.dumps({
+                    "documentId": doc.group(1),
+                    "revisionId": f"rev-{revision}",
+                    "body": {"content": [
+                        {"paragraph": {"elements": [{"textRun": {"content": paragraph + "\n"}}]}} for paragraph in text
+                    ]},
+                }))
+            else:
+                body = ("text/plain; charset=utf-8", "\n\n".join(text))
+        else:
+            return None
+
+        body = (body[0], body[1].encode("utf-8"))
+        with self._lock:
+            self._pages[path] = body
+        return body
+
+    def _handler(self):
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; without this, delayed ACKs add ~40ms per request
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                fixture.requests += 1
+                fixture.paths.append(self.path)
+                if fixture.latency_s:
+                    time.sleep(fixture.latency_s)
+                doc = DOC_EXPORT_PATH.match(self.path.split("?")[0])
+                if doc and doc.group(1).startswith(PRIVATE_DOC_PREFIX):
+                    return self.send_empty(302, Location="/ServiceLogin?continue=doc")
+                if self.path.startswith("/ServiceLogin"):
+                    content_type, body = "text/html; charset=utf-8", b"<html><body>Sign in</body></html>"
+                else:
+                    found = fixture.body_for(self.path)
+                    if found is None:
+                        return self.send_empty(404)
+                    content_type, body = found
+
+                etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+                if self.headers.get("If-None-Match") == etag:
+                    return self.send_empty(304, ETag=etag)
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def send_empty(self, status, **headers):
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._server = _FixtureHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+THREADS_OUTPUT = {
+    "threads": [
+        {
+            "title": f"Fixture thread {i}: small notes compound into ideas",
+            "insight": "Notes that are revisited and linked a little at a time grow into ideas that "
+                       "could not have been planned up front, which is the core of a digital garden.",
+            "supporting_quotes": ["Gardens grow from small notes tended over time."],
+        }
+        for i in range(1, 4)
+    ],
+    "summary": "Three threads from the fixture gateway.",
+}
+
+SCRIPT_OUTPUT = {
+    "title": "Fixture script about digital gardens",
+    "viewer": "Curious note takers",
+    "script": {
+        "hook": "What if your notes could grow?",
+        "context_curiosity_gaps": [
+            "Digital gardens are public notebooks that are never quite finished.",
+            "They grow through many small edits instead of one big launch.",
+        ],
+        "takeaway": "Tend your ideas a little every day.",
+        "ending": "Which note will you plant today?",
+    },
+    "shotlist": ["Talking head intro", "Close-up of a notebook", "Garden time-lapse", "Talking head outro"],
+}
+
+FUNCTION_OUTPUTS = {
+    "generate_research_query": {"queries": ["digital garden history", "note linking habits", "public notebooks"]},
+    "thread_ideas": THREADS_OUTPUT,
+    "synthesise_content": SCRIPT_OUTPUT,
+    "summarise_source": {"summary": "A fixture summary.", "key_quotes": ["Gardens grow."]},
+}
+
+
+class FakeGateway:
+    """
+    Synchronous stand-in for a TensorZero client
+
+    Model calls (image analysis) get a fixed text description; function calls
+    get a canned JSON output for that function. An optional latency simulates
+    the provider round trip.
+    """
+
+    def __init__(self, latency_s=0.0, analysis_chars=1200):
+        self.latency_s = latency_s
+        self.analysis = ("A synthetic image analysis describing a garden of notes. " * 40)[:analysis_chars]
+        self.calls = 0
+
+    def inference(self, function_name=None, model_name=None, input=None, episode_id=None, **kwargs):
+        self.calls += 1
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        usage = SimpleNamespace(input_tokens=len(json.dumps(input, default=str)) // 4, output_tokens=300)
+        common = {
+            "episode_id": episode_id or uuid4(),
+            "inference_id": uuid4(),
+            "variant_name": kwargs.get("variant_name") or "fixture",
+            "usage": usage,
+        }
+        if function_name is None:
+            return SimpleNamespace(content=self.analysis, **common)
+
+        output = FUNCTION_OUTPUTS[function_name]
+        return SimpleNamespace(output=SimpleNamespace(raw=json.dumps(output), parsed=output), **common)
+
+    def feedback(self, **kwargs):
+        return SimpleNamespace(feedback_id=uuid4())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Concurrent load driver for the batch pipeline over replayed gateway calls
+
+    python main.py --record                 # capture real calls once
+    python benchmarks/load.py --requests 200 --concurrency 16 --latency lognormal:2,0.5
+
+Sources are processed once (image analysis replayed too), then each request
+runs retrieval, threading and synthesis exactly like batch mode, against an
+AsyncReplayGateway. Reports request latency percentiles, throughput and a
+per-call breakdown from the tracing spans.
+
+Nothing leaves the machine: by default the sources are a generated corpus
+whose webpages and Google Docs come from the fixture server, as in the
+benchmark suite; with --sources, a real folder is processed without fetching
+the URLs it links to.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from content_maker.core.batch import load_questions, run_question
+from content_maker.core.instrumentation import configure_logging, tracer
+from content_maker.core.replay import AsyncReplayGateway, LatencyModel, ReplayGateway, ReplayStore
+from content_maker.core.retriever import ChunkIndex, chunk_sources
+from content_maker.processors.google_docs import GoogleDocsFetcher
+from content_maker.processors.image_processor import MultimodalImageProcessor
+from content_maker.processors.source_detector import SmartSourceDetector
+from content_maker.processors.web_scraper import WebScraper
+from corpus import SIZES, CorpusSpec, generate_corpus
+from fixtures import FUNCTION_OUTPUTS, FixtureServer
+
+PERCENTILES = (50, 95, 99)
+DEFAULT_CORPUS_SIZE = "small"
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarise(values):
+    return {
+        **{f"p{q}": percentile(values, q) for q in PERCENTILES},
+        "max": max(values) if values else None,
+        "count": len(values),
+    }
+
+
+def fixture_store(latency_s=1.0):
+    """Temporary store with one canned recording per function, for runs without real recordings"""
+    store = ReplayStore(os.path.join(tempfile.mkdtemp(), "replay.jsonl"))
+    for function_name, output in FUNCTION_OUTPUTS.items():
+        store.add({"function_name": function_name}, {
+            "kind": "json", "variant_name": "fixture", "usage": {"input_tokens": 2000, "output_tokens": 400},
+            "latency_s": latency_s, "first_chunk_s": latency_s * 0.3,
+            "raw": json.dumps(output), "parsed": output,
+        })
+    store.add({"model_name": "openai::gpt-4o-mini"}, {
+        "kind": "chat", "variant_name": "fixture", "usage": {"input_tokens": 800, "output_tokens": 300},
+        "latency_s": latency_s, "first_chunk_s": None, "content": ["A fixture image analysis."],
+    })
+    return store
+
+
+def process_without_fetching(detector, sources_dir):
+    """Processed sources of a folder, leaving the webpages and docs it links to unfetched"""
+    for path in sorted(Path(sources_dir).iterdir()):
+        if path.is_file():
+            yield from detector.process_source(detector.detect_source_type(path), fetch_urls=False)
+
+
+@contextmanager
+def offline_sources(image_client, sources_dir=None, corpus_size=DEFAULT_CORPUS_SIZE, seed=None):
+    """
+    Yields (ChunkIndex, sources folder) for a load run, built without network I/O
+
+    Without sources_dir, a corpus of corpus_size is generated and processed
+    against the fixture server, then removed on exit.
+    """
+    if sources_dir is not None:
+        detector = SmartSourceDetector(image_processor=MultimodalImageProcessor(client=image_client))
+        yield ChunkIndex(chunk_sources(process_without_fetching(detector, sources_dir))), sources_dir
+        return
+
+    spec = CorpusSpec.for_size(corpus_size, **({"seed": seed} if seed is not None else {}))
+    directory = tempfile.mkdtemp(prefix="content-maker-load-")
+    try:
+        with FixtureServer(page_words=spec.words // 2, seed=spec.seed) as fixture:
+            generate_corpus(directory, spec, base_url=fixture.base_url)
+            detector = SmartSourceDetector(
+                web_scraper=WebScraper(delay=0),
+                image_processor=MultimodalImageProcessor(
+                    image_mode="inline", storage_path=os.path.join(directory, ".storage"), client=image_client
+                ),
+                docs_fetcher=GoogleDocsFetcher(fixture.base_url, cache_dir=os.path.join(directory, ".docs")),
+            )
+            index = ChunkIndex(chunk_sources(detector.iter_sources_directory(directory)))
+        yield index, directory
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def make_requests(questions_path, sources_dir, count):
+    """`count` question records, cycling through a questions file or the sources' input.json"""
+    if questions_path:
+        base = load_questions(questions_path)
+    else:
+        with open(os.path.join(sources_dir, "input.json"), "r", encoding="utf-8") as f:
+            question = json.load(f)["content"]
+        base = [{"id": "1", "question": question, "thread": "all", "instructions": ""}]
+    return [{**base[i % len(base)], "id": str(i + 1)} for i in range(count)]
+
+
+async def drive(client, records, index, concurrency, rate=None):
+    """
+    Run every record with at most `concurrency` in flight
+
+    With `rate`, requests arrive at that many per second (open loop) instead
+    of as fast as slots free up (closed loop).
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    started = time.perf_counter()
+
+    async def one(position, record):
+        if rate:
+            await asyncio.sleep(max(0.0, started + position / rate - time.perf_counter()))
+        arrived = time.perf_counter()
+        async with semaphore:
+            result = await run_question(client, record, index)
+        # Includes time queued for a slot, which is what a caller would see
+        return result["status"], time.perf_counter() - arrived
+
+    outcomes = await asyncio.gather(*(one(i, record) for i, record in enumerate(records)))
+    return outcomes, time.perf_counter() - started
+
+
+def span_breakdown(prefixes=("inference.", "stage.")):
+    durations = {}
+    for event in tracer.chrome_trace()["traceEvents"]:
+        if event["name"].startswith(prefixes):
+            durations.setdefault(event["name"], []).append(event["dur"] / 1e6)
+    return {name: summarise(values) for name, values in sorted(durations.items())}
+
+
+def run_load(store, sources_dir=None, requests=100, concurrency=8, latency="recorded",
+             questions_path=None, rate=None, seed=None, corpus_size=DEFAULT_CORPUS_SIZE):
+    """
+    Process sources once, then drive `requests` questions through replayed calls
+
+    sources_dir defaults to a generated corpus of corpus_size (see offline_sources).
+
+    Returns:
+        dict: Latency percentiles, throughput, statuses and per-span breakdown
+    """
+    image_client = ReplayGateway(store, LatencyModel(latency, seed), seed=seed)
+    with offline_sources(image_client, sources_dir, corpus_size, seed) as (index, folder):
+        records = make_requests(questions_path, folder, requests)
+    client = AsyncReplayGateway(store, LatencyModel(latency, seed), seed=seed)
+    outcomes, elapsed = asyncio.run(drive(client, records, index, concurrency, rate))
+
+    statuses = {}
+    for status, _ in outcomes:
+        statuses[status] = statuses.get(status, 0) + 1
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "rate": rate,
+        "latency_model": latency,
+        "elapsed_s": elapsed,
+        "throughput_rps": requests / elapsed if elapsed else None,
+        "statuses": statuses,
+        "latency_s": summarise([seconds for _, seconds in outcomes]),
+        "spans": span_breakdown(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Content Maker load driver over replayed gateway calls")
+    parser.add_argument("--store", help="Replay store file (default: .content_maker/replay.jsonl)")
+    parser.add_argument("--fixture-store", action="store_true",
+                        help="Use canned fixture responses instead of a recorded store")
+    parser.add_argument("--sources",
+                        help="Sources directory, processed without fetching its links (default: a generated corpus)")
+    parser.add_argument("--corpus-size", choices=list(SIZES), default=DEFAULT_CORPUS_SIZE,
+                        help="Size of the generated corpus when --sources is not given")
+    parser.add_argument("--questions", help="JSONL questions to cycle through (default: the sources' input.json)")
+    parser.add_argument("--requests", type=int, default=100, help="Total requests")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at once")
+    parser.add_argument("--rate", type=float, help="Open-loop arrival rate in requests per second")
+    parser.add_argument("--latency", default="recorded",
+                        help="recorded[:SCALE], none, fixed:S, uniform:LO,HI or lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--seed", type=int, help="Seed for sampled latencies and recordings")
+    parser.add_argument("-o", "--output", help="Write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    configure_logging(quiet=True)
+    store = fixture_store() if args.fixture_store else ReplayStore(args.store)
+    if not len(store):
+        print(f"❌ Replay store {store.path} is empty; record with `python main.py --record` first, "
+              f"or pass --fixture-store")
+        return 1
+
+    report = run_load(store, args.sources, args.requests, args.concurrency, args.latency,
+                      args.questions, args.rate, args.seed, args.corpus_size)
+
+    latency = report["latency_s"]
+    print(f"📊 {args.requests} requests, concurrency {args.concurrency}: "
+          f"{report['throughput_rps']:.2f} req/s over {report['elapsed_s']:.2f}s")
+    print(f"   latency p50 {latency['p50']:.3f}s  p95 {latency['p95']:.3f}s  "
+          f"p99 {latency['p99']:.3f}s  max {latency['max']:.3f}s")
+    print(f"   statuses: {report['statuses']}")
+    for name, stats in report["spans"].items():
+        print(f"   {name:<32} p50 {stats['p50']:.3f}s  p95 {stats['p95']:.3f}s  ({stats['count']} calls)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
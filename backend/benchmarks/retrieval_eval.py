@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Retrieval quality and latency on a labelled query set
+
+    python benchmarks/retrieval_eval.py                          # bundled hand-labelled set
+    python benchmarks/retrieval_eval.py --synthetic 5000 -o retrieval.json --table retrieval.md
+    python benchmarks/retrieval_eval.py --labels my_set.json --compare retrieval.json
+
+A labelled set is JSON with "chunks" ([{"id", "text"}]) and "queries"
+([{"question", "relevant": [chunk IDs]}]). With --sources, the chunks come
+from a sources folder instead (processed without fetching URLs), with IDs
+like "article1.json#0". Every registered retriever is built over the chunks
+and asked each question; recall@k, MRR and nDCG@k are reported next to p50
+and p99 query latency, index build time and the memory the index holds.
+--compare exits non-zero when a retriever's quality drops below a baseline.
+"""
+
+import argparse
+import gc
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from content_maker.core.instrumentation import configure_logging
+from content_maker.core.research import DEFAULT_TOP_K
+from content_maker.core.retriever import ChunkIndex, chunk_contents, chunk_sources
+from corpus import VOCABULARY, words
+from load import percentile
+
+LABELLED_SET = os.path.join(os.path.dirname(__file__), "retrieval_set.json")
+DEFAULT_K = DEFAULT_TOP_K
+DEFAULT_REPEAT = 5
+DEFAULT_QUALITY_THRESHOLD = 0.02
+QUALITY_METRICS = ("recall", "mrr", "ndcg")
+
+RETRIEVERS = {}
+
+
+def retriever(name):
+    """Register a retriever; the function builds it over chunk texts and returns search(question, k)"""
+    def register(build):
+        RETRIEVERS[name] = build
+        return build
+    return register
+
+
+@retriever("keyword_scan")
+def build_keyword_scan(chunks):
+    # The baseline: the first chunks sharing any word with the question, as retrieval started out
+    def search(question, k):
+        question_words = question.lower().split()
+        return [chunk for chunk in chunks if any(word in chunk.lower() for word in question_words)][:k]
+    return search
+
+
+@retriever("ranked")
+def build_ranked(chunks):
+    # What the pipeline retrieves with when --multi-query is off
+    index = ChunkIndex(chunks)
+    return lambda question, k: index.multi_search([question], k)
+
+
+def recall_at_k(retrieved, relevant):
+    return len(set(retrieved) & relevant) / len(relevant) if relevant else 0.0
+
+
+def reciprocal_rank(retrieved, relevant):
+    return next((1 / rank for rank, chunk_id in enumerate(retrieved, 1) if chunk_id in relevant), 0.0)
+
+
+def ndcg_at_k(retrieved, relevant, k):
+    """Binary-gain nDCG: relevant chunks count for less the further down they are ranked"""
+    dcg = sum(1 / math.log2(rank + 1) for rank, chunk_id in enumerate(retrieved[:k], 1) if chunk_id in relevant)
+    ideal = sum(1 / math.log2(rank + 1) for rank in range(1, min(len(relevant), k) + 1))
+    return dcg / ideal if ideal else 0.0
+
+
+def load_labelled_set(path=LABELLED_SET, chunks=None):
+    """A labelled set from JSON, with its chunks replaced by `chunks` if given, checked for consistency"""
+    with open(path, "r", encoding="utf-8") as f:
+        labelled = json.load(f)
+    if chunks is not None:
+        labelled["chunks"] = chunks
+    ids = [chunk["id"] for chunk in labelled["chunks"]]
+    if len(set(ids)) != len(ids):
+        raise ValueError(f"{path}: chunk IDs must be unique")
+    # Retrievers return chunk texts, which are mapped back to IDs
+    if len({chunk["text"] for chunk in labelled["chunks"]}) != len(ids):
+        raise ValueError(f"{path}: chunk texts must be unique")
+    unknown = {chunk_id for query in labelled["queries"] for chunk_id in query["relevant"]} - set(ids)
+    if unknown:
+        raise ValueError(f"{path}: relevant IDs not among the chunks: {sorted(unknown)}")
+    return labelled
+
+
+def chunks_from_sources(sources_dir):
+    """[{"id", "text"}] for a sources folder, chunked like the pipeline, without fetching any URLs"""
+    from content_maker.processors.source_detector import SmartSourceDetector
+    detector = SmartSourceDetector()
+    chunks = []
+    for path in sorted(os.listdir(sources_dir)):
+        file_path = os.path.join(sources_dir, path)
+        if not os.path.isfile(file_path):
+            continue
+        processed = detector.process_source(detector.detect_source_type(file_path), fetch_urls=False)
+        chunks.extend({"id": f"{path}#{i}", "text": chunk_contents(chunk)}
+                      for i, chunk in enumerate(chunk_sources(processed)))
+    return chunks
+
+
+def synthetic_set(chunk_count=2000, query_count=50, seed=1234):
+    """
+    A large labelled set for latency and memory at scale
+
+    Filler chunks use the shared benchmark vocabulary. Each query has three
+    made-up topic words planted in three chunks (all three words in the
+    first, fewer in the others), and is phrased with filler words too, so a
+    retriever that matches any word is not rewarded for it.
+    """
+    rng = random.Random(seed)
+    texts = [words(rng, 120) for _ in range(chunk_count)]
+    queries = []
+    for q in range(query_count):
+        topic = [f"topic{q}{suffix}" for suffix in ("alpha", "beta", "gamma")]
+        relevant = rng.sample(range(chunk_count), 3)
+        for planted, position in zip((topic, topic[:2], topic[:1]), relevant):
+            texts[position] += " " + " ".join(planted)
+        question = f"{words(rng, 6)} {' '.join(topic)} {rng.choice(VOCABULARY)}"
+        queries.append({"question": question, "relevant": [f"chunk-{position}" for position in relevant]})
+    return {
+        "description": f"Synthetic: {chunk_count} chunks, {query_count} queries, seed {seed}",
+        "chunks": [{"id": f"chunk-{i}", "text": text} for i, text in enumerate(texts)],
+        "queries": queries,
+    }
+
+
+def evaluate(name, labelled, k=DEFAULT_K, repeat=DEFAULT_REPEAT):
+    """
+    Quality and cost of one registered retriever on a labelled set
+
+    Returns:
+        dict: Mean recall@k, MRR and nDCG@k; query latency p50/p99 in seconds;
+              build_s (median of three builds) and memory_bytes held by the built index
+    """
+    build = RETRIEVERS[name]
+    texts = [chunk["text"] for chunk in labelled["chunks"]]
+    id_of = {chunk["text"]: chunk["id"] for chunk in labelled["chunks"]}
+
+    build_times = []
+    for _ in range(3):
+        started = time.perf_counter()
+        build(texts)
+        build_times.append(time.perf_counter() - started)
+
+    # Measured separately: tracing slows the build down
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        search = build(texts)
+        memory_bytes = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+    scores = {metric: [] for metric in QUALITY_METRICS}
+    latencies = []
+    for query in labelled["queries"]:
+        relevant = set(query["relevant"])
+        retrieved = [id_of[chunk_contents(chunk)] for chunk in search(query["question"], k)]
+        scores["recall"].append(recall_at_k(retrieved, relevant))
+        scores["mrr"].append(reciprocal_rank(retrieved, relevant))
+        scores["ndcg"].append(ndcg_at_k(retrieved, relevant, k))
+        for _ in range(repeat):
+            started = time.perf_counter()
+            search(query["question"], k)
+            latencies.append(time.perf_counter() - started)
+
+    return {
+        **{metric: statistics.fmean(values) if values else 0.0 for metric, values in scores.items()},
+        "p50_s": percentile(latencies, 50),
+        "p99_s": percentile(latencies, 99),
+        "build_s": statistics.median(build_times),
+        "memory_bytes": max(0, memory_bytes),
+    }
+
+
+def run_eval(labelled, k=DEFAULT_K, selected=None, repeat=DEFAULT_REPEAT):
+    """
+    Evaluate the selected retrievers (all by default) on a labelled set
+
+    Returns:
+        dict: {'meta': {...}, 'results': {retriever: metrics}}
+    """
+    names = [name for name in RETRIEVERS if not selected or name in selected]
+    results = {name: evaluate(name, labelled, k, repeat) for name in names}
+    meta = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "labelled_set": labelled.get("description"),
+        "chunks": len(labelled["chunks"]),
+        "queries": len(labelled["queries"]),
+        "k": k,
+    }
+    return {"meta": meta, "results": results}
+
+
+def comparison_table(report):
+    """Markdown table of every retriever's quality and cost"""
+    k = report["meta"]["k"]
+    lines = [
+        f"| retriever | recall@{k} | MRR | nDCG@{k} | p50 | p99 | build | memory |",
+        "|---|---:|---:|---:|---:|---:|---:|---:|",
+    ]
+    for name, metrics in report["results"].items():
+        lines.append(
+            f"| {name} | {metrics['recall']:.3f} | {metrics['mrr']:.3f} | {metrics['ndcg']:.3f} "
+            f"| {metrics['p50_s'] * 1e3:.3f} ms | {metrics['p99_s'] * 1e3:.3f} ms "
+            f"| {metrics['build_s'] * 1e3:.2f} ms | {metrics['memory_bytes'] / 1024:.1f} KiB |"
+        )
+    return "\n".join(lines)
+
+
+def compare(baseline, current, threshold=DEFAULT_QUALITY_THRESHOLD):
+    """
+    Quality of each retriever against a baseline report
+
+    Returns:
+        list: "retriever metric" for every score more than `threshold` below the baseline
+    """
+    if baseline["meta"].get("labelled_set") != current["meta"].get("labelled_set"):
+        print(f"⚠️  Baseline set {baseline['meta'].get('labelled_set')!r} differs from "
+              f"{current['meta'].get('labelled_set')!r}")
+
+    regressions = []
+    for name, metrics in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            print(f"{name:<20} new")
+            continue
+        changes = []
+        for metric in QUALITY_METRICS:
+            change = metrics[metric] - old[metric]
+            changes.append(f"{metric} {change:+.3f}")
+            if change < -threshold:
+                regressions.append(f"{name} {metric}")
+        latency = metrics["p50_s"] / old["p50_s"] - 1 if old["p50_s"] else 0.0
+        print(f"{name:<20} {'  '.join(changes)}  p50 {latency:+.1%}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Content Maker retrieval quality and latency evaluation")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--labels", default=LABELLED_SET, help="Labelled set JSON (default: the bundled set)")
+    source.add_argument("--synthetic", type=int, metavar="CHUNKS", help="Generate a synthetic set of this many chunks")
+    parser.add_argument("--sources", help="Take the chunks from this sources folder; --labels then needs only queries")
+    parser.add_argument("--queries", type=int, default=50, help="Queries in a --synthetic set (default: 50)")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("-k", type=int, default=DEFAULT_K, help=f"Chunks retrieved per query (default: {DEFAULT_K})")
+    parser.add_argument("--only", nargs="+", choices=list(RETRIEVERS), help="Evaluate only these retrievers")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed runs of each query")
+    parser.add_argument("-o", "--output", help="Write the report to this JSON file")
+    parser.add_argument("--table", help="Write the comparison table to this Markdown file")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare quality against a previous report")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_QUALITY_THRESHOLD,
+                        help=f"Absolute drop in a quality metric reported as a regression "
+                             f"(default: {DEFAULT_QUALITY_THRESHOLD})")
+    args = parser.parse_args(argv)
+
+    configure_logging(quiet=True)
+    if args.synthetic:
+        labelled = synthetic_set(args.synthetic, args.queries, args.seed)
+    else:
+        labelled = load_labelled_set(args.labels, chunks_from_sources(args.sources) if args.sources else None)
+
+    print(f"🎯 {len(labelled['queries'])} queries over {len(labelled['chunks'])} chunks, k={args.k}\n")
+    report = run_eval(labelled, args.k, args.only, args.repeat)
+    table = comparison_table(report)
+    print(table)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report written to {args.output}")
+    if args.table:
+        with open(args.table, "w", encoding="utf-8") as f:
+            f.write(f"{report['meta']['labelled_set']}\n\n{table}\n")
+        print(f"💾 Table written to {args.table}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print()
+        regressions = compare(baseline, report, args.threshold)
+        if regressions:
+            print(f"\n❌ Quality regressions: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
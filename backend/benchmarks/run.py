@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Run the offline benchmark suite and save the results as JSON
+
+    python benchmarks/run.py --size small -o benchmark-results.json
+    python benchmarks/run.py --compare benchmark-results.json
+
+Each benchmark is calibrated so a round lasts at least --min-round-time, then
+timed for --repeat rounds with the garbage collector off. The median per-call
+time is what --compare checks against a previous results file.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from content_maker.core.instrumentation import configure_logging
+from corpus import SIZES
+from suite import BENCHMARKS, BenchContext
+
+DEFAULT_REPEAT = 7
+DEFAULT_MIN_ROUND_S = 0.2
+DEFAULT_THRESHOLD = 0.10
+
+
+def timed(fn, number):
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        return time.perf_counter() - started
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def measure(fn, repeat=DEFAULT_REPEAT, min_round_s=DEFAULT_MIN_ROUND_S, calibrate=True):
+    """
+    Per-call timing statistics for fn
+
+    Returns:
+        dict: min/median/mean/stdev in seconds per call, plus rounds and calls per round
+    """
+    fn()  # warm-up: imports, connection pools, lazy caches
+
+    number = 1
+    while calibrate:
+        elapsed = timed(fn, number)
+        if elapsed >= min_round_s or number >= 10 ** 6:
+            break
+        number = max(number * 2, int(number * min_round_s / max(elapsed, 1e-9)))
+
+    samples = [timed(fn, number) / number for _ in range(repeat)]
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "rounds": repeat,
+        "number": number,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(size="small", selected=None, repeat=DEFAULT_REPEAT, min_round_s=DEFAULT_MIN_ROUND_S, **context_options):
+    """
+    Run the selected benchmarks (all by default) on one generated corpus
+
+    Returns:
+        dict: {'meta': {...}, 'results': {name: stats}}
+    """
+    names = [name for name in BENCHMARKS if not selected or name in selected]
+    results = {}
+    with BenchContext(size, **context_options) as ctx:
+        for name in names:
+            entry = BENCHMARKS[name]
+            fn = entry["setup"](ctx)
+            # Macro benchmarks are slow enough that one call per round is accurate
+            stats = measure(fn, repeat, min_round_s, calibrate=entry["kind"] == "micro")
+            results[name] = {"kind": entry["kind"], **stats}
+            print(f"{name:<28} {entry['kind']:<6} median {format_seconds(stats['median']):>10}  "
+                  f"± {format_seconds(stats['stdev'])}")
+
+        meta = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "size": size,
+            "corpus": vars(ctx.spec),
+            "fixture_requests": ctx.fixture.requests,
+            "gateway_calls": ctx.gateway.calls,
+        }
+    return {"meta": meta, "results": results}
+
+
+def format_seconds(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3f} {unit}"
+    return f"{seconds / 1e-9:.1f} ns"
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare median times against a baseline run
+
+    Returns:
+        list: Names of benchmarks more than `threshold` slower than the baseline
+    """
+    if baseline["meta"].get("size") != current["meta"].get("size"):
+        print(f"⚠️  Baseline size {baseline['meta'].get('size')} differs from {current['meta'].get('size')}")
+
+    regressions = []
+    print(f"\n{'benchmark':<28} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, stats in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            print(f"{name:<28} {'-':>12} {format_seconds(stats['median']):>12}      new")
+            continue
+        change = stats["median"] / old["median"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  ❌ slower"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  ✅ faster"
+        print(f"{name:<28} {format_seconds(old['median']):>12} {format_seconds(stats['median']):>12} "
+              f"{change:>+8.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Content Maker offline benchmarks")
+    parser.add_argument("--size", choices=list(SIZES), default="small", help="Synthetic corpus size")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="Run only these benchmarks")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed rounds per benchmark")
+    parser.add_argument("--min-round-time", type=float, default=DEFAULT_MIN_ROUND_S,
+                        help="Minimum seconds per micro benchmark round")
+    parser.add_argument("--page-latency", type=float, default=0.0,
+                        help="Simulated latency of fixture webpages and doc exports, in seconds")
+    parser.add_argument("--gateway-latency", type=float, default=0.0,
+                        help="Simulated latency of fake gateway calls, in seconds")
+    parser.add_argument("-o", "--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare against a previous results file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Relative slowdown reported as a regression (default: {DEFAULT_THRESHOLD})")
+    args = parser.parse_args(argv)
+
+    configure_logging(quiet=True)
+    print(f"🏁 Benchmarks on a {args.size} corpus\n")
+    current = run_suite(
+        args.size, args.only, args.repeat, args.min_round_time,
+        seed=args.seed, page_latency_s=args.page_latency, gateway_latency_s=args.gateway_latency,
+    )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print(f"\n❌ Regressions: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""
+Benchmark definitions
+
+Micro benchmarks time single functions on synthetic inputs; macro benchmarks
+run whole stages over a generated sources folder, with the fixture server in
+place of real websites and FakeGateway in place of TensorZero.
+"""
+
+import glob
+import json
+import os
+import random
+import shutil
+import tempfile
+
+from bs4 import BeautifulSoup
+
+from corpus import CorpusSpec, generate_corpus, html_page, page_text, paragraphs
+from fixtures import FUNCTION_OUTPUTS, FakeGateway, FixtureServer
+from content_maker.core.pipeline import build_sources
+from content_maker.core.research import retrieve_chunks
+from content_maker.core.retriever import ChunkIndex, chunk_sources, chunk_text
+from content_maker.processors.google_docs import GoogleDocsFetcher
+from content_maker.processors.image_processor import MultimodalImageProcessor
+from content_maker.processors.source_detector import SmartSourceDetector
+from content_maker.processors.web_scraper import WebScraper
+
+BENCHMARKS = {}
+
+
+def benchmark(name, kind="micro"):
+    """Register a benchmark; the function takes a BenchContext and returns the callable to time"""
+    def register(setup):
+        BENCHMARKS[name] = {"kind": kind, "setup": setup}
+        return setup
+    return register
+
+
+class BenchContext:
+    """Generated corpus, fixture server and processors shared by every benchmark in a run"""
+
+    def __init__(self, size="small", seed=1234, page_latency_s=0.0, gateway_latency_s=0.0, **overrides):
+        self.spec = CorpusSpec.for_size(size, seed=seed, **overrides)
+        self.rng = random.Random(seed)
+        self.fixture = FixtureServer(page_words=self.spec.words // 2, latency_s=page_latency_s, seed=seed)
+        self.gateway = FakeGateway(latency_s=gateway_latency_s)
+        self.directory = None
+
+    def __enter__(self):
+        self.fixture.start()
+        self.directory = tempfile.mkdtemp(prefix="content-maker-bench-")
+        generate_corpus(self.directory, self.spec, base_url=self.fixture.base_url)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.fixture.stop()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def detector(self):
+        image_root = os.path.join(self.directory, ".storage")
+        return SmartSourceDetector(
+            web_scraper=WebScraper(delay=0),
+            image_processor=MultimodalImageProcessor(image_mode="inline", storage_path=image_root,
+                                                     client=self.gateway),
+            docs_fetcher=GoogleDocsFetcher(self.fixture.base_url, cache_dir=os.path.join(self.directory, ".docs")),
+        )
+
+    def files(self):
+        return sorted(path for path in glob.glob(os.path.join(self.directory, "*")) if os.path.isfile(path))
+
+    def json_sources(self):
+        """The corpus's JSON notes as text sources, read once"""
+        sources = []
+        for path in glob.glob(os.path.join(self.directory, "*.json")):
+            with open(path, "r", encoding="utf-8") as f:
+                sources.append({"type": "text", "contents": json.load(f)["content"]})
+        return sources
+
+    def question(self):
+        return "digital garden notes for a video script"
+
+
+@benchmark("chunk_text")
+def bench_chunk_text(ctx):
+    text = "\n\n".join(paragraphs(ctx.rng, ctx.spec.words * 10))
+    return lambda: chunk_text(text)
+
+
+@benchmark("chunk_sources")
+def bench_chunk_sources(ctx):
+    sources = ctx.json_sources()
+    return lambda: list(chunk_sources(sources))
+
+
+@benchmark("chunk_index_multi_search")
+def bench_chunk_index_multi_search(ctx):
+    index = ChunkIndex(chunk_sources(ctx.json_sources()))
+    queries = [ctx.question(), *FUNCTION_OUTPUTS["generate_research_query"]["queries"]]
+    return lambda: index.multi_search(queries)
+
+
+@benchmark("clean_content")
+def bench_clean_content(ctx):
+    scraper = WebScraper(delay=0)
+    text = page_text(ctx.rng, ctx.spec.words * 2)
+    return lambda: scraper._clean_content(text)
+
+
+@benchmark("html_extraction")
+def bench_html_extraction(ctx):
+    scraper = WebScraper(delay=0)
+    html = html_page(ctx.rng, "Benchmark page", ctx.spec.words)
+
+    def extract():
+        # Extraction mutates the tree, so every round parses from scratch like a real fetch
+        soup = BeautifulSoup(html, "html.parser")
+        scraper._extract_title(soup)
+        scraper._extract_description(soup)
+        return scraper._clean_content(scraper._extract_main_content(soup))
+    return extract
+
+
+@benchmark("detect_source_type")
+def bench_detect_source_type(ctx):
+    detector = ctx.detector()
+    files = ctx.files()
+    return lambda: [detector.detect_source_type(path) for path in files]
+
+
+@benchmark("scrape_webpage", kind="macro")
+def bench_scrape_webpage(ctx):
+    scraper = WebScraper(delay=0)
+    url = f"{ctx.fixture.base_url}/page/0"
+    return lambda: scraper.scrape_webpage(url)
+
+
+@benchmark("process_sources_directory", kind="macro")
+def bench_process_sources_directory(ctx):
+    detector = ctx.detector()
+    return lambda: detector.process_sources_directory(ctx.directory)
+
+
+@benchmark("index_sources")
+def bench_index_sources(ctx):
+    # Processed once; what's timed is chunking and indexing every processed source
+    processed = ctx.detector().process_sources_directory(ctx.directory)
+    return lambda: ChunkIndex(chunk_sources(processed))
+
+
+@benchmark("build_sources")
+def bench_build_sources(ctx):
+    # Indexed once; what's timed is the per-request retrieval and prompt assembly
+    index = ChunkIndex(chunk_sources(ctx.detector().process_sources_directory(ctx.directory)))
+    question = ctx.question()
+    return lambda: build_sources(retrieve_chunks(None, question, index))
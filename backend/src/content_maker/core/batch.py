@@ -0,0 +1,254 @@
+"""
+Non-interactive batch mode: run many questions concurrently over shared sources
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from .inference import async_inference
+from .hedging import add_hedging_arguments, hedger_from_args
+from .inference_cache import add_cache_arguments, cache_from_args
+from .instrumentation import add_instrumentation_arguments, instrumentation_from_args, span, tracer
+from .jobs import add_queue_arguments, process_sources
+from .pipeline import build_sources, build_synthesis_input, select_threads
+from .replay import add_replay_arguments, build_async_gateway, image_gateway
+from .research import add_research_arguments, async_retrieve_chunks, research_from_args
+from .retriever import ChunkIndex, chunk_sources
+from .summariser import DEFAULT_MIN_CHARS, SourceSummariser
+from ..processors.crawler import add_crawl_arguments, crawler_from_args
+from ..processors.image_processor import MultimodalImageProcessor
+from ..processors.source_detector import SmartSourceDetector
+
+DEFAULT_CONCURRENCY = 4
+
+
+def load_questions(questions_path):
+    """
+    Load batch questions from a JSONL file
+
+    Each line is an object with:
+        question (str): The request (`content` is accepted too, matching input.json)
+        id (str): Optional identifier, defaults to the line number
+        thread (int|str): Optional 1-based thread number or 'all' (default 'all')
+        instructions (str): Optional additional instructions for synthesis
+
+    Returns:
+        list: Normalised question records
+    """
+    questions = []
+    with open(questions_path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            questions.append({
+                "id": str(record.get("id", line_number)),
+                "question": record.get("question") or record["content"],
+                "thread": record.get("thread", "all"),
+                "instructions": record.get("instructions", ""),
+            })
+    return questions
+
+
+async def run_question(client, record, index, cache=None, hedger=None, research_queries=0):
+    """
+    Run retrieval, threading and synthesis for a single question
+
+    index is a ChunkIndex over the chunked processed sources. With
+    research_queries set, retrieval fuses that many generated queries with
+    the question.
+
+    Returns:
+        dict: Result record for the output JSONL
+    """
+    started = time.perf_counter()
+    result = {
+        "id": record["id"],
+        "question": record["question"],
+        "status": "success",
+    }
+
+    with span("question", id=record["id"]) as question_span:
+        try:
+            relevant_chunks = await async_retrieve_chunks(client, record["question"], index, research_queries, cache)
+            cleaned_sources = build_sources(relevant_chunks)
+
+            threading_response = await async_inference(
+                client,
+                "thread_ideas",
+                {"input": record["question"], "sources": cleaned_sources},
+                cache=cache,
+                hedger=hedger,
+            )
+            threads_data = threading_response["parsed"]
+
+            if threads_data is None:
+                choice_key, selected_threads = None, []
+            else:
+                choice_key, selected_threads = select_threads(threads_data["threads"], record["thread"], quiet=True)
+
+            synthesis_input = build_synthesis_input(
+                record["question"], cleaned_sources, threads_data, selected_threads, record["instructions"]
+            )
+            response = await async_inference(
+                client,
+                "synthesise_content",
+                synthesis_input,
+                episode_id=threading_response["episode_id"],
+                cache=cache,
+                hedger=hedger,
+            )
+
+            result.update({
+                "thread_choice": choice_key,
+                "threads": threads_data,
+                "script": response["parsed"],
+                "episode_id": str(response["episode_id"]),
+                "inference_id": str(response["inference_id"]),
+                "variant_name": response["variant_name"],
+            })
+            if response["parsed"] is None:
+                result["status"] = "invalid_output"
+                result["raw"] = response["raw"]
+
+        except Exception as e:
+            result["status"] = "error"
+            result["error"] = str(e)
+
+        if result["status"] != "success":
+            question_span.status = result["status"]
+
+    result["elapsed_s"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+async def run_batch(questions_path, output_path, sources_dir="sources", *, concurrency=DEFAULT_CONCURRENCY,
+                    cache=None, summarise_min_chars=None, hedger=None, gateway_options=None, crawl_options=None,
+                    workers=0, queue_location=None, research_queries=0):
+    """
+    Process the sources folder once, then answer every question concurrently
+
+    With summarise_min_chars set, sources at least that long are summarised
+    once up front and every question threads over the summaries.
+
+    gateway_options are the parsed --record/--replay options (see replay.py),
+    crawl_options the parsed --crawl options (see crawler.py); links are
+    followed by their relevance to any of the questions. With workers, sources
+    are processed by that many worker processes through the job queue at
+    queue_location (see jobs.py). Every processed source is chunked into one
+    index and each question threads over its top chunks; research_queries > 0
+    switches retrieval to multi-query search (see research.py).
+
+    Results are appended to output_path as each question finishes.
+
+    Returns:
+        dict: Counts of results by status
+    """
+    questions = load_questions(questions_path)
+    print(f"📋 Loaded {len(questions)} question(s) from {questions_path}")
+
+    # Sources are shared by every question, so they are scanned and processed once
+    with image_gateway(gateway_options) as image_client, span("stage.process"):
+        crawl_question = " ".join(record["question"] for record in questions)
+        if workers:
+            processed_sources = await asyncio.to_thread(
+                process_sources, sources_dir, workers, queue_location, crawl_options, crawl_question
+            )
+        else:
+            crawler = crawler_from_args(crawl_options, crawl_question)
+            detector = SmartSourceDetector(image_processor=MultimodalImageProcessor(client=image_client), crawler=crawler)
+            processed_sources = await asyncio.to_thread(detector.process_sources_directory, sources_dir)
+    print(f"📊 Processed {len(processed_sources)} source(s)")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    counts = {}
+
+    client = await build_async_gateway(gateway_options)
+    async with client:
+
+        if summarise_min_chars is not None:
+            summariser = SourceSummariser(client, cache=cache, min_chars=summarise_min_chars)
+            with span("stage.summarise"):
+                processed_sources = await summariser.async_summarise_sources(processed_sources)
+
+        # Chunked and lowercased once for every question's retrieval
+        with span("stage.ingest"):
+            index = ChunkIndex(chunk_sources(processed_sources))
+        print(f"📊 Indexed {len(index)} chunk(s)")
+
+        async def bounded(record):
+            async with semaphore:
+                return await run_question(client, record, index, cache, hedger, research_queries)
+
+        with open(output_path, "a", encoding="utf-8") as out:
+            tasks = [asyncio.create_task(bounded(record)) for record in questions]
+            for finished in asyncio.as_completed(tasks):
+                result = await finished
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                out.flush()
+
+                counts[result["status"]] = counts.get(result["status"], 0) + 1
+                print(f"{'✅' if result['status'] == 'success' else '❌'} [{result['id']}] "
+                      f"{result['status']} in {result['elapsed_s']}s")
+
+    if hedger is not None:
+        hedger.tracker.save()
+        print(f"⏱️  Hedging: {hedger.stats}")
+    return counts
+
+
+def main(argv=None):
+    """Command line entry point for batch mode"""
+    parser = argparse.ArgumentParser(description="Content Maker batch mode")
+    parser.add_argument("questions", help="JSONL file of questions")
+    parser.add_argument("-o", "--output", default="results.jsonl", help="Output JSONL file (appended to)")
+    parser.add_argument("--sources", default="sources", help="Sources directory shared by all questions")
+    parser.add_argument(
+        "--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+        help=f"Maximum questions in flight at once (default: {DEFAULT_CONCURRENCY})"
+    )
+    parser.add_argument(
+        "--summarise", action="store_true",
+        help="Summarise long sources once with a cheaper model before threading"
+    )
+    parser.add_argument(
+        "--summarise-min-chars", type=int, default=DEFAULT_MIN_CHARS,
+        help=f"Only summarise sources at least this long (default: {DEFAULT_MIN_CHARS})"
+    )
+    add_research_arguments(parser)
+    add_crawl_arguments(parser)
+    add_queue_arguments(parser)
+    add_cache_arguments(parser)
+    add_hedging_arguments(parser)
+    add_replay_arguments(parser)
+    add_instrumentation_arguments(parser)
+    args = parser.parse_args(argv)
+    instrumentation_from_args(args)
+
+    try:
+        counts = asyncio.run(run_batch(
+            args.questions,
+            args.output,
+            args.sources,
+            concurrency=args.concurrency,
+            cache=cache_from_args(args),
+            summarise_min_chars=args.summarise_min_chars if args.summarise else None,
+            hedger=hedger_from_args(args),
+            gateway_options=args,
+            crawl_options=args,
+            workers=args.workers,
+            queue_location=args.queue,
+            research_queries=research_from_args(args),
+        ))
+        print(f"\nBatch complete: {counts}")
+    finally:
+        if args.trace_dir:
+            tracer.export(args.trace_dir)
+            print(f"📈 Trace and metrics written to {args.trace_dir}")
+
+
+if __name__ == "__main__":
+    main()
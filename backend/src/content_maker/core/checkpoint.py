@@ -0,0 +1,164 @@
+"""
+Per-stage checkpoints so an interrupted run can resume where it stopped
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from pathlib import Path
+
+from .inference_cache import canonical_json
+from .settings import CACHE_DIR
+from .source import json_default
+from .source_store import file_fingerprint
+
+STAGES = ("ingest", "process", "summarise", "retrieve", "thread", "synthesize")
+MAX_RUNS = 20
+# <date>-<time>-<fingerprint prefix>, as RunCheckpoint.new() names runs
+RUN_ID_PATTERN = re.compile(r"^\d{8}-\d{6}-[A-Za-z0-9]+$")
+
+
+def input_fingerprint(sources_dir="sources", options=None):
+    """
+    Hash of everything a run's stages depend on
+
+    Covers the name, size and mtime of every file in the sources directory
+    (input.json included) plus the options that change stage outputs.
+    """
+    files = sorted(
+        (str(path.relative_to(sources_dir)), *file_fingerprint(path))
+        for path in Path(sources_dir).rglob("*") if path.is_file()
+    )
+    payload = canonical_json({"files": files, "options": options or {}})
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RunCheckpoint:
+    """
+    Stage results of one pipeline run, stored as JSON under .content_maker/runs/<run_id>/
+
+    A manifest records the run's input fingerprint and its completed stages.
+    Checkpoints are only served back while the fingerprint still matches;
+    a run whose fingerprint differs is refused, never overwritten. Runs are
+    only deleted by _prune().
+    """
+
+    def __init__(self, run_id, fingerprint, root=None):
+        if not RUN_ID_PATTERN.match(run_id):
+            raise ValueError(f"Not a run id: {run_id!r} (expected YYYYMMDD-HHMMSS-xxxxxxxx)")
+        self.run_id = run_id
+        self.fingerprint = fingerprint
+        self.root = Path(root or os.path.join(CACHE_DIR, "runs"))
+        self.path = self.root / run_id
+        self.completed = []
+
+        manifest = self._read_manifest(self.path)
+        if manifest and manifest.get("fingerprint") != fingerprint:
+            raise ValueError(f"Sources or options changed since run {run_id}; it cannot be resumed")
+        if manifest:
+            self.completed = manifest.get("completed", [])
+
+    @staticmethod
+    def _read_manifest(path):
+        try:
+            with open(path / "manifest.json", "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    @classmethod
+    def new(cls, fingerprint, root=None):
+        run_id = time.strftime("%Y%m%d-%H%M%S") + f"-{fingerprint[:8]}"
+        checkpoint = cls(run_id, fingerprint, root)
+        checkpoint._prune()
+        return checkpoint
+
+    @classmethod
+    def latest(cls, fingerprint, root=None):
+        """Most recent run for the same inputs, or None"""
+        root = Path(root or os.path.join(CACHE_DIR, "runs"))
+        if not root.exists():
+            return None
+        for path in sorted(root.iterdir(), reverse=True):
+            manifest = cls._read_manifest(path)
+            if manifest and manifest.get("fingerprint") == fingerprint:
+                return cls(path.name, fingerprint, root)
+        return None
+
+    def _prune(self):
+        """Keep only the MAX_RUNS most recent runs"""
+        if not self.root.exists():
+            return
+        runs = sorted(path for path in self.root.iterdir() if path.is_dir())
+        for path in runs[:-MAX_RUNS]:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def done(self, stage):
+        return stage in self.completed
+
+    def load(self, stage):
+        """Stored result of a completed stage, or None"""
+        if not self.done(stage):
+            return None
+        try:
+            with open(self.path / f"{stage}.json", "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self.completed.remove(stage)
+            return None
+
+    def load_lines(self, stage):
+        """
+        Stored items of a completed streamed stage, read one line at a time
+
+        Returns:
+            generator or None: None if the stage is not completed
+        """
+        if not self.done(stage):
+            return None
+        path = self.path / f"{stage}.jsonl"
+        if not path.exists():
+            self.completed.remove(stage)
+            return None
+
+        def read():
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    yield json.loads(line)
+        return read()
+
+    def save(self, stage, value):
+        """Write a stage result, then mark the stage completed"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._write(f"{stage}.json", value)
+        self._complete(stage)
+        return value
+
+    def save_lines(self, stage, items):
+        """Write a streamed stage's items as JSONL, then mark the stage completed"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path / f"{stage}.jsonl.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for item in items:
+                f.write(json.dumps(item, default=json_default) + "\n")
+        os.replace(tmp_path, self.path / f"{stage}.jsonl")
+        self._complete(stage)
+        return items
+
+    def _complete(self, stage):
+        if stage not in self.completed:
+            self.completed.append(stage)
+        self._write("manifest.json", {
+            "run_id": self.run_id,
+            "fingerprint": self.fingerprint,
+            "completed": self.completed,
+        })
+
+    def _write(self, name, value):
+        tmp_path = self.path / f"{name}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(value, f, default=json_default)
+        os.replace(tmp_path, self.path / name)
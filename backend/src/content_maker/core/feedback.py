@@ -0,0 +1,260 @@
+"""
+Background feedback submission with a local spool for retries
+"""
+
+import asyncio
+import json
+import logging
+import os
+import queue
+import threading
+
+from .settings import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 16
+MAX_ATTEMPTS = 5
+
+# Feedback level of each metric in tensorzero.toml
+METRIC_LEVELS = {
+    "user_rating": "episode",
+    "synthesis_quality": "inference",
+}
+
+
+def feedback_item(metric_name, value, episode_id=None, inference_id=None):
+    """
+    Validate a feedback submission
+
+    Raises:
+        ValueError: for an unknown metric or a missing episode/inference ID
+    """
+    level = METRIC_LEVELS.get(metric_name)
+    if level is None:
+        raise ValueError(f"Unknown metric: {metric_name} (expected one of {', '.join(METRIC_LEVELS)})")
+    target = episode_id if level == "episode" else inference_id
+    if not target:
+        raise ValueError(f"'{level}_id' is required for {metric_name}")
+    return {
+        "metric_name": metric_name,
+        "value": float(value),
+        f"{level}_id": str(target),
+        "attempts": 0,
+    }
+
+
+def feedback_kwargs(item):
+    return {
+        "metric_name": item["metric_name"],
+        "value": item["value"],
+        "episode_id": item.get("episode_id"),
+        "inference_id": item.get("inference_id"),
+    }
+
+
+class FeedbackSpool:
+    """JSONL file of feedback that could not be sent yet"""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(CACHE_DIR, "feedback_spool.jsonl")
+        self._lock = threading.Lock()
+
+    def take(self):
+        """Read and clear the spooled items"""
+        with self._lock:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    lines = f.readlines()
+            except OSError:
+                return []
+            os.remove(self.path)
+
+        items = []
+        for line in lines:
+            try:
+                items.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+        return items
+
+    def append(self, items):
+        if not items:
+            return
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                for item in items:
+                    f.write(json.dumps(item) + "\n")
+
+
+class _FeedbackQueueBase:
+    def __init__(self, client, spool=None, batch_size=DEFAULT_BATCH_SIZE):
+        self.client = client
+        self.spool = spool or FeedbackSpool()
+        self.batch_size = batch_size
+        self.stats = {"submitted": 0, "sent": 0, "spooled": 0, "dropped": 0}
+
+    def _failed(self, item, error):
+        """Requeue a failed item through the spool, or drop it after MAX_ATTEMPTS"""
+        item["attempts"] += 1
+        if item["attempts"] >= MAX_ATTEMPTS:
+            self.stats["dropped"] += 1
+            logger.warning("❌ Dropping %s feedback after %d attempts: %s", item['metric_name'], item['attempts'], error)
+            return []
+        return [item]
+
+    def _spool(self, items):
+        self.spool.append(items)
+        self.stats["spooled"] += len(items)
+
+
+class FeedbackQueue(_FeedbackQueueBase):
+    """
+    Send feedback from a background thread through a shared TensorZeroGateway
+
+    `submit` only enqueues. The worker drains up to batch_size items per flush;
+    items that fail are written to the spool. The spool is retried on start and
+    after every flush that sent everything, i.e. once the gateway answers again.
+    `close` flushes what is left.
+    """
+
+    def __init__(self, client, **kwargs):
+        super().__init__(client, **kwargs)
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def start(self):
+        for item in self.spool.take():
+            self._queue.put(item)
+        self._thread = threading.Thread(target=self._run, name="feedback-queue", daemon=True)
+        self._thread.start()
+        return self
+
+    def submit(self, metric_name, value, episode_id=None, inference_id=None):
+        self._queue.put(feedback_item(metric_name, value, episode_id, inference_id))
+        self.stats["submitted"] += 1
+
+    def _flush(self, batch):
+        """Send a batch, spooling what fails; True if every item was sent"""
+        unsent = []
+        sent_all = True
+        for item in batch:
+            try:
+                self.client.feedback(**feedback_kwargs(item))
+                self.stats["sent"] += 1
+            except Exception as e:
+                sent_all = False
+                unsent.extend(self._failed(item, e))
+        self._spool(unsent)
+        return sent_all
+
+    def _retry_spool(self):
+        """Send spooled feedback in batches, putting it back from the first batch that fails"""
+        items = self.spool.take()
+        for start in range(0, len(items), self.batch_size):
+            if not self._flush(items[start:start + self.batch_size]):
+                self.spool.append(items[start + self.batch_size:])
+                return
+
+    def _run(self):
+        while True:
+            # Block for one item, then take whatever else is already waiting
+            item = self._queue.get()
+            batch = []
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.batch_size or self._queue.empty():
+                    break
+                item = self._queue.get_nowait()
+
+            # A clean flush means the gateway is back; what an earlier outage spooled can go now
+            if self._flush(batch):
+                self._retry_spool()
+            if item is None:
+                return
+
+    def close(self):
+        """Flush pending feedback and stop the worker"""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class AsyncFeedbackQueue(_FeedbackQueueBase):
+    """Same as FeedbackQueue, for an AsyncTensorZeroGateway on the running event loop"""
+
+    def __init__(self, client, **kwargs):
+        super().__init__(client, **kwargs)
+        self._queue = asyncio.Queue()
+        self._task = None
+
+    def start(self):
+        for item in self.spool.take():
+            self._queue.put_nowait(item)
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    def submit(self, metric_name, value, episode_id=None, inference_id=None):
+        self._queue.put_nowait(feedback_item(metric_name, value, episode_id, inference_id))
+        self.stats["submitted"] += 1
+
+    async def _send(self, item):
+        try:
+            await self.client.feedback(**feedback_kwargs(item))
+            self.stats["sent"] += 1
+            return []
+        except Exception as e:
+            return self._failed(item, e)
+
+    async def _flush(self, batch):
+        """Send a batch concurrently, spooling what fails; True if every item was sent"""
+        sent = self.stats["sent"]
+        results = await asyncio.gather(*(self._send(item) for item in batch))
+        self._spool([item for unsent in results for item in unsent])
+        return self.stats["sent"] - sent == len(batch)
+
+    async def _retry_spool(self):
+        """Send spooled feedback in batches, putting it back from the first batch that fails"""
+        items = self.spool.take()
+        for start in range(0, len(items), self.batch_size):
+            if not await self._flush(items[start:start + self.batch_size]):
+                self.spool.append(items[start + self.batch_size:])
+                return
+
+    async def _run(self):
+        while True:
+            item = await self._queue.get()
+            batch = []
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.batch_size or self._queue.empty():
+                    break
+                item = self._queue.get_nowait()
+
+            if await self._flush(batch):
+                await self._retry_spool()
+            if item is None:
+                return
+
+    async def close(self):
+        """Flush pending feedback and stop the worker"""
+        if self._task is None:
+            return
+        self._queue.put_nowait(None)
+        await self._task
+        self._task = None
+
+    async def __aenter__(self):
+        return self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
@@ -0,0 +1,259 @@
+"""
+Hedged, deadline-aware inference across variants
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from .inference import build_inference_input, inference_result, uuid7
+from .instrumentation import span, usage_attributes
+from .settings import CACHE_DIR, CONFIG_FILE, load_tensorzero_config
+
+DEFAULT_HEDGE_AFTER_S = 20.0
+DEFAULT_DEADLINE_S = 120.0
+HEDGE_PERCENTILE = 95
+MIN_SAMPLES = 10
+WINDOW_SIZE = 200
+SAVE_EVERY = 20
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineExceeded(Exception):
+    """No valid result arrived before the call's total deadline"""
+
+
+class LatencyTracker:
+    """
+    Rolling per-variant latency samples, persisted between runs
+
+    Samples are kept per (function, variant) in a bounded window so the
+    percentiles follow recent provider behaviour.
+    """
+
+    def __init__(self, path=None, window_size=WINDOW_SIZE):
+        self.path = path or os.path.join(CACHE_DIR, "variant_latency.json")
+        self.window_size = window_size
+        self.samples = {}
+        self._unsaved = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        for key, values in stored.items():
+            self.samples[key] = deque(values, maxlen=self.window_size)
+
+    def save(self):
+        with self._lock:
+            snapshot = {key: list(values) for key, values in self.samples.items()}
+            self._unsaved = 0
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, self.path)
+
+    def record(self, function_name, variant_name, seconds):
+        key = f"{function_name}/{variant_name}"
+        with self._lock:
+            self.samples.setdefault(key, deque(maxlen=self.window_size)).append(round(seconds, 4))
+            self._unsaved += 1
+            should_save = self._unsaved >= SAVE_EVERY
+        if should_save:
+            self.save()
+
+    def percentile(self, function_name, variant_name, q=HEDGE_PERCENTILE):
+        """Latency percentile in seconds, or None with fewer than MIN_SAMPLES samples"""
+        values = sorted(self.samples.get(f"{function_name}/{variant_name}", ()))
+        if len(values) < MIN_SAMPLES:
+            return None
+        rank = min(len(values) - 1, max(0, math.ceil(q / 100 * len(values)) - 1))
+        return values[rank]
+
+
+class HedgedInference:
+    """
+    Call a function on one variant, hedging onto another when it runs long
+
+    The primary variant is sampled by the weights in tensorzero.toml and pinned
+    with `variant_name`. If it has not returned a schema-valid result by its
+    own p95 latency, the same request is fired at the highest-weight alternative
+    variant. The first valid result wins and the other call is cancelled. The
+    whole call is bounded by `deadline_s`.
+    """
+
+    def __init__(self, tracker=None, deadline_s=DEFAULT_DEADLINE_S,
+                 default_hedge_after_s=DEFAULT_HEDGE_AFTER_S, config_file=CONFIG_FILE):
+        self.tracker = tracker or LatencyTracker()
+        self.deadline_s = deadline_s
+        self.default_hedge_after_s = default_hedge_after_s
+        self.config_file = config_file
+        self._variants = {}
+        self.stats = {"calls": 0, "hedged": 0, "hedge_wins": 0, "deadline_exceeded": 0}
+
+    def variant_weights(self, function_name):
+        """Variant weights for a function, from tensorzero.toml"""
+        if function_name not in self._variants:
+            try:
+                config = load_tensorzero_config(self.config_file)
+            except OSError:
+                config = {}
+            variants = config.get('functions', {}).get(function_name, {}).get('variants', {})
+            self._variants[function_name] = {
+                name: variant.get('weight', 1.0) for name, variant in variants.items()
+            }
+        return self._variants[function_name]
+
+    def pick_variants(self, function_name):
+        """
+        Returns:
+            tuple: (primary, alternative) variant names; either may be None when
+                the function has fewer than two variants configured
+        """
+        weights = self.variant_weights(function_name)
+        if not weights:
+            return None, None
+
+        names = list(weights)
+        if any(weights[name] > 0 for name in names):
+            primary = random.choices(names, weights=[weights[name] for name in names])[0]
+        else:
+            primary = names[0]
+        alternatives = sorted((name for name in names if name != primary), key=lambda n: -weights[n])
+        return primary, (alternatives[0] if alternatives else None)
+
+    def hedge_after(self, function_name, variant_name):
+        p95 = self.tracker.percentile(function_name, variant_name)
+        return p95 if p95 is not None else self.default_hedge_after_s
+
+    async def _call(self, client, function_name, arguments, episode_id, variant_name, role, **kwargs):
+        started = time.perf_counter()
+        with span(f"hedge_attempt.{function_name}", variant=variant_name, role=role) as attempt_span:
+            response = await client.inference(
+                function_name=function_name,
+                input=build_inference_input(arguments),
+                episode_id=episode_id,
+                variant_name=variant_name,
+                tags={**kwargs.pop("tags", {}), "hedge_role": role},
+                **kwargs,
+            )
+            attempt_span.set(**usage_attributes(getattr(response, 'usage', None)))
+        result = inference_result(response)
+        # Only completed calls are timed: a failure or a cancelled loser has no latency to
+        # measure, and a made-up value for it would skew the p95
+        self.tracker.record(function_name, result["variant_name"] or variant_name, time.perf_counter() - started)
+        return result
+
+    async def run(self, client, function_name, arguments, episode_id=None, **kwargs):
+        """
+        Run a hedged call on an AsyncTensorZeroGateway
+
+        Extra keyword arguments (tags, params...) go to every attempt; the
+        variant is the hedger's to pick, so variant_name is not accepted.
+
+        Returns:
+            dict: Same shape as async_inference results, plus 'hedged' and 'hedge_won'
+
+        Raises:
+            DeadlineExceeded: if no result arrives within the deadline
+        """
+        if "variant_name" in kwargs:
+            raise ValueError("HedgedInference picks the variant; call the client directly to pin one")
+        self.stats["calls"] += 1
+        primary, alternative = self.pick_variants(function_name)
+        # Both attempts must land in the same episode
+        episode_id = episode_id or uuid7()
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline_s
+        hedge_at = loop.time() + self.hedge_after(function_name, primary) if alternative else None
+
+        tasks = {}
+        hedged = False
+        timed_out = False
+        fallback = None
+        last_error = None
+
+        def launch(variant_name, role):
+            task = asyncio.create_task(
+                self._call(client, function_name, arguments, episode_id, variant_name, role, **kwargs)
+            )
+            tasks[task] = role
+
+        launch(primary, "primary")
+        try:
+            while tasks:
+                now = loop.time()
+                if now >= deadline:
+                    timed_out = True
+                    break
+
+                wake_at = deadline if hedged or hedge_at is None else min(deadline, hedge_at)
+                done, _ = await asyncio.wait(tasks, timeout=wake_at - now, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    role = tasks.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        last_error = e
+                        continue
+
+                    if result["parsed"] is not None:
+                        if role == "hedge":
+                            self.stats["hedge_wins"] += 1
+                        result["hedged"] = hedged
+                        result["hedge_won"] = role == "hedge"
+                        return result
+                    fallback = result
+
+                # Hedge once the primary runs past its p95, or straight away if it failed
+                if not hedged and hedge_at is not None and (not tasks or loop.time() >= hedge_at):
+                    logger.info("⏱️  %s/%s is slow or failed, hedging on %s", function_name, primary, alternative)
+                    hedged = True
+                    self.stats["hedged"] += 1
+                    launch(alternative, "hedge")
+        finally:
+            # Cancel the loser (or everything still running at the deadline)
+            for task in tasks:
+                task.cancel()
+
+        if fallback is not None:
+            fallback["hedged"] = hedged
+            fallback["hedge_won"] = False
+            return fallback
+        if timed_out:
+            self.stats["deadline_exceeded"] += 1
+            raise DeadlineExceeded(f"{function_name}: no result within {self.deadline_s}s")
+        raise last_error
+
+
+def add_hedging_arguments(parser):
+    """Add the hedging options to an argparse parser"""
+    parser.add_argument(
+        "--hedge", action="store_true",
+        help="Hedge slow thread/synthesis calls onto an alternative variant after their p95 latency"
+    )
+    parser.add_argument(
+        "--deadline", type=float, default=DEFAULT_DEADLINE_S,
+        help=f"Total deadline per hedged call in seconds (default: {DEFAULT_DEADLINE_S})"
+    )
+
+
+def hedger_from_args(args):
+    """Build the HedgedInference selected by command line options, or None if disabled"""
+    if not args.hedge:
+        return None
+    return HedgedInference(deadline_s=args.deadline)
@@ -0,0 +1,191 @@
+"""
+Helpers for calling TensorZero functions from the content pipeline
+"""
+
+import logging
+
+from .instrumentation import span, usage_attributes
+from .streaming import PARSER_ERRORS
+
+logger = logging.getLogger(__name__)
+
+
+def uuid7():
+    """A TensorZero-compatible UUIDv7; tensorzero is only imported on first use"""
+    from tensorzero.util import uuid7
+    return uuid7()
+
+
+def build_inference_input(arguments):
+    """Wrap templated function arguments in a single user message"""
+    return {
+        "messages": [
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "arguments": arguments
+                    }
+                ]
+            }
+        ]
+    }
+
+
+def inference_result(response):
+    """Flatten a non-streamed JSON inference response into the pipeline's result dict"""
+    return {
+        "episode_id": response.episode_id,
+        "inference_id": response.inference_id,
+        "variant_name": response.variant_name,
+        "raw": response.output.raw,
+        "parsed": response.output.parsed,
+    }
+
+
+def trace_result(inference_span, result, usage=None):
+    """Record an inference result's variant, size, token usage and validity on its span"""
+    inference_span.set(variant=result["variant_name"], chars=len(result["raw"] or ""), **usage_attributes(usage))
+    if result["parsed"] is None:
+        inference_span.status = "invalid"
+
+
+def run_inference(client, function_name, arguments, episode_id=None, cache=None, **kwargs):
+    """
+    Run a JSON function without streaming
+
+    Returns:
+        dict: Same shape as stream_inference results
+    """
+    with span(f"inference.{function_name}", cache_hit=False) as inference_span:
+        if cache is not None:
+            cached = cache.get(function_name, arguments, kwargs.get('variant_name'))
+            if cached is not None:
+                inference_span.set(cache_hit=True, variant=cached["variant_name"])
+                cached["episode_id"] = episode_id or uuid7()
+                return cached
+
+        response = client.inference(
+            function_name=function_name,
+            input=build_inference_input(arguments),
+            episode_id=episode_id,
+            **kwargs,
+        )
+        result = inference_result(response)
+        trace_result(inference_span, result, getattr(response, 'usage', None))
+        if cache is not None:
+            cache.put(function_name, arguments, result, kwargs.get('variant_name'))
+        return result
+
+
+async def async_inference(client, function_name, arguments, episode_id=None, cache=None, hedger=None,
+                          **kwargs):
+    """
+    Run a JSON function on an AsyncTensorZeroGateway
+
+    Args:
+        hedger (HedgedInference): Pick the variant and hedge slow calls (optional)
+
+    Returns:
+        dict: Same shape as stream_inference results
+    """
+    with span(f"inference.{function_name}", cache_hit=False) as inference_span:
+        if cache is not None:
+            cached = cache.get(function_name, arguments, kwargs.get('variant_name'))
+            if cached is not None:
+                inference_span.set(cache_hit=True, variant=cached["variant_name"])
+                cached["episode_id"] = episode_id or uuid7()
+                return cached
+
+        usage = None
+        if hedger is not None and 'variant_name' in kwargs:
+            logger.info("%s is pinned to variant %s, so it is not hedged", function_name, kwargs['variant_name'])
+        if hedger is not None and 'variant_name' not in kwargs:
+            result = await hedger.run(client, function_name, arguments, episode_id, **kwargs)
+            inference_span.set(hedged=result["hedged"], hedge_won=result["hedge_won"])
+        else:
+            response = await client.inference(
+                function_name=function_name,
+                input=build_inference_input(arguments),
+                episode_id=episode_id,
+                **kwargs,
+            )
+            result = inference_result(response)
+            usage = getattr(response, 'usage', None)
+        trace_result(inference_span, result, usage)
+        if cache is not None:
+            cache.put(function_name, arguments, result, kwargs.get('variant_name'))
+        return result
+
+
+def stream_inference(client, function_name, arguments, parser, episode_id=None, cache=None, **kwargs):
+    """
+    Run a JSON function in streaming mode, feeding raw output into an incremental parser
+
+    Args:
+        client: TensorZero gateway client
+        function_name (str): Function to call
+        arguments (dict): Template arguments for the user message
+        parser (IncrementalJsonParser): Receives output text as it arrives
+        episode_id: Episode to attach the inference to (optional)
+        cache (InferenceCache): Serve and store results locally (optional). A cached
+            result is replayed through the parser; it keeps the episode passed in, or
+            gets a fresh client-side episode ID so later calls can still be grouped.
+
+    Returns:
+        dict: {
+            'episode_id', 'inference_id', 'variant_name',
+            'raw': str, 'parsed': dict or None if the output is not valid JSON
+        }
+    """
+    with span(f"inference.{function_name}", cache_hit=False, stream=True) as inference_span:
+        if cache is not None:
+            cached = cache.get(function_name, arguments, kwargs.get('variant_name'))
+            if cached is not None:
+                inference_span.set(cache_hit=True, variant=cached["variant_name"])
+                parser.feed(cached["raw"])
+                try:
+                    parser.close()
+                except PARSER_ERRORS:
+                    # Cached non-JSON output replays as it was stored, with parsed None
+                    pass
+                cached["episode_id"] = episode_id or uuid7()
+                return cached
+
+        stream = client.inference(
+            function_name=function_name,
+            input=build_inference_input(arguments),
+            episode_id=episode_id,
+            stream=True,
+            **kwargs,
+        )
+
+        result = {
+            "episode_id": episode_id,
+            "inference_id": None,
+            "variant_name": None,
+            "raw": "",
+            "parsed": None,
+        }
+        usage = None
+        for chunk in stream:
+            result["episode_id"] = chunk.episode_id
+            result["inference_id"] = chunk.inference_id
+            result["variant_name"] = chunk.variant_name
+            usage = getattr(chunk, 'usage', None) or usage
+            if getattr(chunk, 'raw', None):
+                if "first_chunk_ms" not in inference_span.attributes:
+                    inference_span.set(first_chunk_ms=inference_span.elapsed_ms())
+                parser.feed(chunk.raw)
+
+        result["raw"] = parser.text
+        try:
+            result["parsed"] = parser.close()
+        except PARSER_ERRORS:
+            result["parsed"] = None
+
+        trace_result(inference_span, result, usage)
+        if cache is not None:
+            cache.put(function_name, arguments, result, kwargs.get('variant_name'))
+        return result
@@ -0,0 +1,198 @@
+"""
+Local cache for deterministic re-use of inference results
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from .settings import CACHE_DIR, CONFIG_FILE, load_tensorzero_config
+
+# Seconds a cached result stays valid per function; 0 disables caching for it.
+# Synthesis is left uncached so regenerating a script gives a fresh take.
+DEFAULT_TTLS = {
+    "generate_research_query": 30 * 24 * 3600,
+    "summarise_source": 30 * 24 * 3600,
+    "thread_ideas": 7 * 24 * 3600,
+    "synthesise_content": 0,
+}
+DEFAULT_MAX_ENTRIES = 1000
+
+FUNCTION_FILE_KEYS = ('system_schema', 'user_schema', 'assistant_schema', 'output_schema')
+VARIANT_FILE_KEYS = ('system_template', 'user_template', 'assistant_template')
+
+
+def canonical_json(value):
+    """Serialise a value the same way regardless of key order"""
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+def parse_ttl_overrides(values):
+    """Parse FUNCTION=SECONDS command line values into a TTL dict"""
+    ttls = {}
+    for value in values or []:
+        function_name, _, seconds = value.partition('=')
+        if not function_name or not seconds:
+            raise ValueError(f"Expected FUNCTION=SECONDS, got: {value}")
+        ttls[function_name] = int(seconds)
+    return ttls
+
+
+class InferenceCache:
+    """
+    Size-bounded SQLite cache in front of client.inference
+
+    Entries are keyed on the function name, the pinned variant (if any), a
+    canonical hash of the arguments, and the hashes of every template and
+    schema file the function can render with - so editing a prompt
+    invalidates its cached results automatically.
+    """
+
+    def __init__(self, path=None, ttls=None, max_entries=DEFAULT_MAX_ENTRIES, config_file=CONFIG_FILE):
+        self.path = path or os.path.join(CACHE_DIR, "inference_cache.sqlite")
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_entries = max_entries
+        self.config_file = config_file
+        self._config_hashes = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS inference_cache ("
+            " key TEXT PRIMARY KEY,"
+            " function_name TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL,"
+            " result TEXT NOT NULL)"
+        )
+        self._db.commit()
+
+    def enabled_for(self, function_name):
+        return self.ttls.get(function_name, 0) > 0
+
+    def _config_hash(self, function_name, variant_name):
+        """Hash of the function and variant config plus the files it references"""
+        cache_key = (function_name, variant_name)
+        if cache_key in self._config_hashes:
+            return self._config_hashes[cache_key]
+
+        try:
+            config = load_tensorzero_config(self.config_file)
+        except OSError:
+            config = {}
+        function = config.get('functions', {}).get(function_name, {})
+        variants = function.get('variants', {})
+        if variant_name:
+            variants = {variant_name: variants.get(variant_name, {})}
+
+        base_dir = os.path.dirname(self.config_file)
+        digest = hashlib.sha256()
+        digest.update(canonical_json({k: v for k, v in function.items() if k != 'variants'}).encode())
+        digest.update(canonical_json(variants).encode())
+
+        files = [function.get(key) for key in FUNCTION_FILE_KEYS]
+        for variant in variants.values():
+            files.extend(variant.get(key) for key in VARIANT_FILE_KEYS)
+        for relative_path in sorted(set(filter(None, files))):
+            digest.update(relative_path.encode())
+            try:
+                with open(os.path.join(base_dir, relative_path), 'rb') as f:
+                    digest.update(hashlib.sha256(f.read()).digest())
+            except OSError:
+                digest.update(b'missing')
+
+        self._config_hashes[cache_key] = digest.hexdigest()
+        return self._config_hashes[cache_key]
+
+    def key(self, function_name, arguments, variant_name=None):
+        """Cache key for a call"""
+        digest = hashlib.sha256()
+        digest.update(function_name.encode())
+        digest.update(b'\0' + (variant_name or '').encode())
+        digest.update(b'\0' + self._config_hash(function_name, variant_name).encode())
+        digest.update(b'\0' + hashlib.sha256(canonical_json(arguments).encode()).digest())
+        return digest.hexdigest()
+
+    def get(self, function_name, arguments, variant_name=None):
+        """
+        Look up a cached result
+
+        Returns:
+            dict: The cached result with 'cached': True, or None on a miss
+        """
+        if not self.enabled_for(function_name):
+            return None
+
+        key = self.key(function_name, arguments, variant_name)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT created_at, result FROM inference_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[0] > self.ttls[function_name]:
+                self._db.execute("DELETE FROM inference_cache WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+            self._db.execute("UPDATE inference_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._db.commit()
+
+        result = json.loads(row[1])
+        result["cached"] = True
+        return result
+
+    def put(self, function_name, arguments, result, variant_name=None):
+        """Store a successful result, evicting the least recently used entries beyond max_entries"""
+        if not self.enabled_for(function_name) or result.get("parsed") is None:
+            return
+
+        key = self.key(function_name, arguments, variant_name)
+        stored = {
+            "inference_id": str(result.get("inference_id")),
+            "variant_name": result.get("variant_name"),
+            "raw": result.get("raw"),
+            "parsed": result.get("parsed"),
+        }
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO inference_cache VALUES (?, ?, ?, ?, ?)",
+                (key, function_name, now, now, json.dumps(stored)),
+            )
+            self._db.execute(
+                "DELETE FROM inference_cache WHERE key NOT IN ("
+                " SELECT key FROM inference_cache ORDER BY accessed_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            self._db.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM inference_cache").fetchone()[0]
+
+    def close(self):
+        self._db.close()
+
+
+def add_cache_arguments(parser):
+    """Add the inference cache options to an argparse parser"""
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="Always call the gateway instead of reusing cached inference results"
+    )
+    parser.add_argument(
+        "--cache-ttl", action="append", metavar="FUNCTION=SECONDS",
+        help="Override a function's cache TTL; 0 disables caching for it (repeatable)"
+    )
+
+
+def cache_from_args(args):
+    """Build the InferenceCache selected by command line options, or None if disabled"""
+    if args.no_cache:
+        return None
+    return InferenceCache(ttls=parse_ttl_overrides(args.cache_ttl))
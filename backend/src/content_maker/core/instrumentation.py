@@ -0,0 +1,196 @@
+"""
+Tracing spans, metrics and logging setup for the pipeline
+
+Spans wrap every stage and every external call (fetches, doc exports, image
+and LLM inferences). Each finished span is kept as a Chrome trace event and
+folded into per-name metrics that can be exported as Prometheus text.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+MAX_EVENTS = 100000
+# Histogram bucket upper bounds in seconds
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+# Numeric span attributes that are also summed into counters
+SUMMED_ATTRIBUTES = ("bytes", "chars", "input_tokens", "output_tokens")
+
+
+class Span:
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = dict(attributes)
+        self.status = "ok"
+        self.started = time.perf_counter_ns()
+
+    def set(self, **attributes):
+        """Add attributes once they are known (sizes, token counts, cache hits...)"""
+        self.attributes.update(attributes)
+
+    def elapsed_ms(self):
+        return round((time.perf_counter_ns() - self.started) / 1e6, 3)
+
+
+class Tracer:
+    """
+    Collects spans and their metrics, safe to use from threads and asyncio tasks
+
+    Only the most recent MAX_EVENTS trace events are kept; metrics cover every span.
+    """
+
+    def __init__(self, max_events=MAX_EVENTS):
+        self.events = deque(maxlen=max_events)
+        self.metrics = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter_ns()
+
+    @contextmanager
+    def span(self, name, **attributes):
+        span = Span(name, attributes)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.set(error=type(e).__name__)
+            raise
+        finally:
+            self._finish(span, time.perf_counter_ns())
+
+    def _finish(self, span, finished):
+        started = span.started
+        seconds = (finished - started) / 1e9
+        event = {
+            "name": span.name,
+            "ph": "X",
+            "ts": (started - self._origin) / 1000,
+            "dur": (finished - started) / 1000,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": {"status": span.status, **span.attributes},
+        }
+        with self._lock:
+            self.events.append(event)
+            metric = self.metrics.setdefault(span.name, {
+                "count": 0,
+                "errors": 0,
+                "cache_hits": 0,
+                "seconds": 0.0,
+                "buckets": [0] * len(DURATION_BUCKETS),
+                **{attribute: 0 for attribute in SUMMED_ATTRIBUTES},
+            })
+            metric["count"] += 1
+            metric["seconds"] += seconds
+            metric["errors"] += span.status != "ok"
+            metric["cache_hits"] += bool(span.attributes.get("cache_hit"))
+            for attribute in SUMMED_ATTRIBUTES:
+                value = span.attributes.get(attribute)
+                if isinstance(value, (int, float)):
+                    metric[attribute] += value
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if seconds <= bound:
+                    metric["buckets"][i] += 1
+
+    def chrome_trace(self):
+        """Trace events in the Chrome trace format (chrome://tracing, Perfetto)"""
+        with self._lock:
+            return {"traceEvents": list(self.events), "displayTimeUnit": "ms"}
+
+    def prometheus_text(self):
+        """Span metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = {name: dict(metric) for name, metric in self.metrics.items()}
+
+        lines = [
+            "# HELP content_maker_span_seconds Time spent in each pipeline span",
+            "# TYPE content_maker_span_seconds histogram",
+        ]
+        for name, metric in sorted(metrics.items()):
+            for bound, count in zip(DURATION_BUCKETS, metric["buckets"]):
+                lines.append(f'content_maker_span_seconds_bucket{{span="{name}",le="{bound}"}} {count}')
+            lines.append(f'content_maker_span_seconds_bucket{{span="{name}",le="+Inf"}} {metric["count"]}')
+            lines.append(f'content_maker_span_seconds_sum{{span="{name}"}} {metric["seconds"]:.6f}')
+            lines.append(f'content_maker_span_seconds_count{{span="{name}"}} {metric["count"]}')
+
+        counters = [
+            ("errors", "Spans that ended with an error"),
+            ("cache_hits", "Spans served from a cache or checkpoint"),
+            *((attribute, f"Total {attribute.replace('_', ' ')} recorded on spans")
+              for attribute in SUMMED_ATTRIBUTES),
+        ]
+        for counter, description in counters:
+            lines.append(f"# HELP content_maker_span_{counter}_total {description}")
+            lines.append(f"# TYPE content_maker_span_{counter}_total counter")
+            for name, metric in sorted(metrics.items()):
+                lines.append(f'content_maker_span_{counter}_total{{span="{name}"}} {metric[counter]}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, directory):
+        """Write trace.json and metrics.prom into a directory"""
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, "trace.json"), "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f, default=str)
+        with open(os.path.join(directory, "metrics.prom"), "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+
+
+tracer = Tracer()
+span = tracer.span
+
+
+def usage_attributes(usage):
+    """Token counts from a TensorZero usage object, if the provider reported them"""
+    if usage is None:
+        return {}
+    return {
+        "input_tokens": getattr(usage, "input_tokens", None) or 0,
+        "output_tokens": getattr(usage, "output_tokens", None) or 0,
+    }
+
+
+class JsonLogFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def configure_logging(quiet=False, json_format=False):
+    """
+    Log processor progress to stderr
+
+    Quiet mode only shows warnings and errors. The pipeline's own output
+    (threads, scripts, prompts) is printed and not affected.
+    """
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonLogFormatter() if json_format else logging.Formatter("%(message)s"))
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(logging.WARNING if quiet else logging.INFO)
+    # Keep HTTP client internals out of the pipeline log
+    for name in ("httpx", "urllib3"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+
+def add_instrumentation_arguments(parser):
+    """Add the logging and tracing options to an argparse parser"""
+    parser.add_argument("--quiet", action="store_true", help="Only log warnings and errors")
+    parser.add_argument("--log-json", action="store_true", help="Log one JSON object per line")
+    parser.add_argument(
+        "--trace-dir",
+        help="Write a Chrome trace (trace.json) and Prometheus metrics (metrics.prom) here on exit"
+    )
+
+
+def instrumentation_from_args(args):
+    configure_logging(quiet=args.quiet, json_format=args.log_json)
@@ -0,0 +1,742 @@
+"""
+Durable job queue for source processing, drained by any number of workers
+
+JobQueue keeps jobs in a SQLite database in WAL mode, so worker processes
+on one host lease, complete and fail jobs concurrently through the file.
+SQLite locking does not work over network filesystems, so workers on other
+hosts go through a QueueBroker, which serves the same queue over HTTP
+(RemoteJobQueue is its client).
+
+A leased job that is not completed before its lease runs out is handed to
+the next worker; a job that fails max_attempts times is dead-lettered.
+Each source file is one job, and each Google Doc or webpage it links to is
+a job of its own, so one file full of links fans out across workers. File
+jobs carry the file's contents, so a worker never reads a path it is sent.
+"""
+
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from .instrumentation import span
+from .settings import CACHE_DIR
+from .source import Source
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_PATH = os.path.join(CACHE_DIR, "jobs.sqlite3")
+DEFAULT_BROKER_PORT = 8766
+DEFAULT_LEASE_S = 300.0
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_RETRY_BASE_S = 5.0
+# Finished jobs are reused for this long, then their files and links are processed afresh
+DEFAULT_MAX_AGE_S = 24 * 3600.0
+MAX_RETRY_DELAY_S = 300.0
+IDLE_POLL_S = 0.5
+# Shared secret between a broker and its clients; a broker on a non-loopback address requires it
+QUEUE_TOKEN_ENV = "CONTENT_MAKER_QUEUE_TOKEN"
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, available_at);
+CREATE TABLE IF NOT EXISTS budgets (
+    name TEXT PRIMARY KEY,
+    used INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS seen_urls (
+    key TEXT PRIMARY KEY
+);
+"""
+
+
+def _job(row):
+    if row is None:
+        return None
+    job = dict(row)
+    job['payload'] = json.loads(job['payload'])
+    job['result'] = json.loads(job['result']) if job['result'] is not None else None
+    return job
+
+
+class JobQueue:
+    """
+    Jobs in a local SQLite file, safe to share between processes
+
+    Jobs are dicts with id, key, kind, payload, status ('pending', 'leased',
+    'done' or 'dead'), attempts, lease_owner, result and error. Enqueueing
+    an existing key returns the existing job's id, so producers can re-run.
+    """
+
+    def __init__(self, path=None, retry_base_s=DEFAULT_RETRY_BASE_S):
+        self.path = Path(path or DEFAULT_QUEUE_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.retry_base_s = retry_base_s
+        # One connection per thread; a worker's lease heartbeat runs on a thread of its own
+        self._local = threading.local()
+        self._db().executescript(SCHEMA)
+
+    def _db(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    @contextmanager
+    def _transaction(self):
+        # IMMEDIATE takes the write lock up front, so two workers never lease the same job
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def enqueue(self, kind, payload, key=None, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        """Add a job unless one with the same key exists; returns the job id"""
+        key = key or f"{kind}:{json.dumps(payload, sort_keys=True)}"
+        now = time.time()
+        with self._transaction() as db:
+            db.execute(
+                "INSERT INTO jobs (key, kind, payload, max_attempts, available_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (key) DO NOTHING",
+                (key, kind, json.dumps(payload), max_attempts, now, now, now),
+            )
+            return db.execute("SELECT id FROM jobs WHERE key = ?", (key,)).fetchone()["id"]
+
+    def lease(self, worker_id, lease_s=DEFAULT_LEASE_S):
+        """The oldest ready job, leased to worker_id for lease_s seconds, or None"""
+        now = time.time()
+        with self._transaction() as db:
+            # A lease that ran out on the last attempt means the job keeps killing its workers
+            db.execute(
+                "UPDATE jobs SET status = 'dead', error = COALESCE(error, 'lease expired'), updated_at = ? "
+                "WHERE status = 'leased' AND lease_expires <= ? AND attempts >= max_attempts",
+                (now, now),
+            )
+            row = db.execute(
+                "SELECT id FROM jobs WHERE (status = 'pending' AND available_at <= ?) "
+                "OR (status = 'leased' AND lease_expires <= ?) ORDER BY id LIMIT 1",
+                (now, now),
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute(
+                "UPDATE jobs SET status = 'leased', lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (worker_id, now + lease_s, now, row["id"]),
+            )
+            return _job(db.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone())
+
+    def extend(self, job, lease_s=DEFAULT_LEASE_S):
+        """Renew a lease; False if the job was handed to another worker"""
+        cursor = self._db().execute(
+            "UPDATE jobs SET lease_expires = ?, updated_at = ? "
+            "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+            (time.time() + lease_s, time.time(), job['id'], job['lease_owner']),
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, job, result):
+        """Store a job's result; False if the lease was lost and the result discarded"""
+        cursor = self._db().execute(
+            "UPDATE jobs SET status = 'done', result = ?, error = NULL, lease_expires = NULL, updated_at = ? "
+            "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+            (json.dumps(result), time.time(), job['id'], job['lease_owner']),
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, job, error):
+        """
+        Record a failed attempt: retry with exponential backoff, or dead-letter
+        the job once it has used max_attempts
+
+        Returns:
+            str: The job's new status, or None if the lease was lost
+        """
+        now = time.time()
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (job['id'], job['lease_owner']),
+            ).fetchone()
+            if row is None:
+                return None
+            status = 'dead' if row["attempts"] >= row["max_attempts"] else 'pending'
+            delay = min(self.retry_base_s * 2 ** (row["attempts"] - 1), MAX_RETRY_DELAY_S)
+            db.execute(
+                "UPDATE jobs SET status = ?, error = ?, available_at = ?, lease_owner = NULL, "
+                "lease_expires = NULL, updated_at = ? WHERE id = ?",
+                (status, str(error), now + delay, now, job['id']),
+            )
+            return status
+
+    def take(self, name, limit):
+        """Use one unit of a budget shared by every worker; False once limit units are used"""
+        with self._transaction() as db:
+            db.execute("INSERT INTO budgets (name, used) VALUES (?, 0) ON CONFLICT (name) DO NOTHING", (name,))
+            cursor = db.execute("UPDATE budgets SET used = used + 1 WHERE name = ? AND used < ?", (name, limit))
+            return cursor.rowcount == 1
+
+    def is_seen(self, key):
+        return self._db().execute("SELECT 1 FROM seen_urls WHERE key = ?", (key,)).fetchone() is not None
+
+    def mark_seen(self, key):
+        self._db().execute("INSERT INTO seen_urls (key) VALUES (?) ON CONFLICT (key) DO NOTHING", (key,))
+
+    def get(self, job_id):
+        return _job(self._db().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def get_by_key(self, key):
+        return _job(self._db().execute("SELECT * FROM jobs WHERE key = ?", (key,)).fetchone())
+
+    def counts(self):
+        """Jobs by status"""
+        rows = self._db().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    def drained(self):
+        """True once no job is pending or leased"""
+        counts = self.counts()
+        return not counts.get('pending') and not counts.get('leased')
+
+    def dead_letters(self):
+        rows = self._db().execute("SELECT * FROM jobs WHERE status = 'dead' ORDER BY id").fetchall()
+        return [_job(row) for row in rows]
+
+    def retry_dead(self):
+        """Give every dead-lettered job a fresh set of attempts; returns how many"""
+        cursor = self._db().execute(
+            "UPDATE jobs SET status = 'pending', attempts = 0, available_at = ?, updated_at = ? "
+            "WHERE status = 'dead'",
+            (time.time(), time.time()),
+        )
+        return cursor.rowcount
+
+
+# Methods a QueueBroker exposes, with the job queue's own signatures
+REMOTE_METHODS = (
+    "enqueue", "lease", "extend", "complete", "fail", "get", "get_by_key", "counts", "drained",
+    "dead_letters", "retry_dead", "take", "is_seen", "mark_seen",
+)
+
+
+class QueueBroker:
+    """
+    Serves a JobQueue over HTTP so workers on other hosts can drain it
+
+    Every call must carry the shared token as a bearer token. Without one
+    the broker only binds to a loopback address.
+    """
+
+    def __init__(self, queue, host="127.0.0.1", port=DEFAULT_BROKER_PORT, token=None):
+        self.queue = queue
+        self.host = host
+        self.port = port
+        self.token = token if token is not None else os.getenv(QUEUE_TOKEN_ENV)
+        if not self.token and host not in LOOPBACK_HOSTS:
+            raise ValueError(f"Serving the queue on {host} needs a shared token; set {QUEUE_TOKEN_ENV}")
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _server_for(self):
+        # Imported here so runs that never serve the queue do not load the HTTP server modules
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        queue = self.queue
+        expected = f"Bearer {self.token}".encode("utf-8") if self.token else None
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                method = self.path.strip("/")
+                status, body = 200, None
+                try:
+                    authorization = self.headers.get("Authorization", "").encode("utf-8", "replace")
+                    if expected is not None and not hmac.compare_digest(authorization, expected):
+                        raise PermissionError("missing or wrong queue token")
+                    if method not in REMOTE_METHODS:
+                        raise LookupError(f"unknown method {method!r}")
+                    length = int(self.headers.get("Content-Length", 0))
+                    kwargs = json.loads(self.rfile.read(length) or b"{}")
+                    body = {"result": getattr(queue, method)(**kwargs)}
+                except PermissionError as e:
+                    status, body = 401, {"error": str(e)}
+                except LookupError as e:
+                    status, body = 404, {"error": str(e)}
+                except Exception as e:
+                    logger.exception("❌ Broker call %s failed", method)
+                    status, body = 500, {"error": str(e)}
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((self.host, self.port), Handler)
+        server.daemon_threads = True
+        return server
+
+    def start(self):
+        self._server = self._server_for()
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server = self._server_for()
+        self._server.serve_forever()
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class RemoteJobQueue:
+    """JobQueue interface over a QueueBroker"""
+
+    def __init__(self, url, timeout=30, token=None):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.token = token if token is not None else os.getenv(QUEUE_TOKEN_ENV)
+
+    def _call(self, method, **kwargs):
+        import urllib.request
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        request = urllib.request.Request(
+            f"{self.url}/{method}", data=json.dumps(kwargs).encode("utf-8"), headers=headers, method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())["result"]
+
+    def __getattr__(self, name):
+        if name not in REMOTE_METHODS:
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self._call(name, **_bind(name, args, kwargs))
+
+
+def _bind(method, args, kwargs):
+    """Positional arguments of a JobQueue method as keywords, for the broker's JSON body"""
+    import inspect
+    names = list(inspect.signature(getattr(JobQueue, method)).parameters)[1:]
+    return {**dict(zip(names, args)), **kwargs}
+
+
+def open_queue(location=None, token=None):
+    """A JobQueue for a file path, or a RemoteJobQueue for a broker URL"""
+    if location and location.startswith(("http://", "https://")):
+        return RemoteJobQueue(location, token=token)
+    return JobQueue(location)
+
+
+def job_options(crawl_args=None, question=None):
+    """The options that change a file job's sources: crawl settings, and the question a crawl ranks links by"""
+    from ..processors.crawler import crawl_options
+    options = crawl_options(crawl_args)
+    if options:
+        options["question"] = question
+    return options
+
+
+def job_generation(max_age_s=DEFAULT_MAX_AGE_S, now=None):
+    """Which max_age_s window now falls in; jobs keyed by an earlier window are processed again"""
+    if not max_age_s:
+        return 0
+    return int((time.time() if now is None else now) // max_age_s)
+
+
+def file_job_key(path, options=None, generation=0):
+    """
+    Files are keyed by their contents' size and mtime, so unchanged files are not re-processed,
+    and by the options and generation, so other settings or stale results are never reused
+    """
+    stat = os.stat(path)
+    digest = hashlib.sha256(json.dumps(options or {}, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    return f"file:{path}:{stat.st_size}:{stat.st_mtime_ns}:{digest}:{generation}"
+
+
+def enqueue_directory(queue, sources_dir="sources", options=None, max_age_s=DEFAULT_MAX_AGE_S):
+    """
+    Add a job for every file in a sources directory
+
+    Args:
+        options (dict): job_options() for the run
+        max_age_s (float): Reuse finished jobs for this long (0 reuses them until their file changes)
+
+    Returns:
+        list: The file jobs' keys, in the order the detector would process them
+    """
+    sources_path = Path(sources_dir)
+    if not sources_path.exists():
+        logger.warning("⚠️  Sources directory '%s' not found", sources_dir)
+        return []
+    root = sources_path.resolve()
+    generation = job_generation(max_age_s)
+    # Jobs of one run share its crawl page budget
+    run = os.urandom(6).hex()
+    keys = []
+    for file_path in sources_path.iterdir():
+        if not file_path.is_file():
+            continue
+        if not file_path.resolve().is_relative_to(root):
+            logger.warning("⚠️  Skipping %s: it links outside the sources directory", file_path)
+            continue
+        key = file_job_key(file_path, options, generation)
+        if queue.get_by_key(key) is None:
+            # Workers get the file itself, not a path they would resolve on their own host
+            payload = {
+                "name": file_path.name, "path": str(file_path),
+                "data": base64.b64encode(file_path.read_bytes()).decode("ascii"),
+                "options": options or {}, "run": run,
+            }
+            queue.enqueue("file", payload, key=key)
+        keys.append(key)
+    return keys
+
+
+class SharedCrawlState:
+    """
+    A run's crawl page budget and seen-URL set, kept in the job queue
+
+    Every worker of the run crawls against the same budget, wherever it
+    runs, and none of them writes the crawl cache's own seen-URL filter.
+    """
+
+    def __init__(self, queue, run, max_pages):
+        self.queue = queue
+        self.name = f"crawl:{run}"
+        self.max_pages = max_pages
+
+    def take_page(self):
+        return self.queue.take(self.name, self.max_pages)
+
+    def __contains__(self, key):
+        return self.queue.is_seen(key)
+
+    def add(self, key):
+        self.queue.mark_seen(key)
+
+    def save(self):
+        pass
+
+
+class SourceWorker:
+    """Leases jobs and runs them through a SmartSourceDetector"""
+
+    def __init__(self, queue, detector=None, worker_id=None, lease_s=DEFAULT_LEASE_S, crawl_concurrency=None):
+        if detector is None:
+            from ..processors.source_detector import SmartSourceDetector
+            detector = SmartSourceDetector()
+        self.queue = queue
+        self.detector = detector
+        if worker_id is None:
+            import socket
+            worker_id = f"{socket.gethostname()}:{os.getpid()}:{os.urandom(3).hex()}"
+        self.worker_id = worker_id
+        self.lease_s = lease_s
+        self.crawl_concurrency = crawl_concurrency
+        self.processed = 0
+        self._crawler_run = None
+
+    def _crawler(self, payload):
+        """The crawler for a job's run, sharing the run's budget through the queue; None if it does not crawl"""
+        from ..processors.crawler import DEFAULT_CONCURRENCY, crawler_from_options
+        options = payload.get('options') or {}
+        if not options.get('crawl'):
+            return None
+        run = payload['run']
+        if self._crawler_run is None or self._crawler_run[0] != run:
+            state = SharedCrawlState(self.queue, run, options['crawl']['pages'])
+            crawler = crawler_from_options(
+                options, options.get('question'), self.crawl_concurrency or DEFAULT_CONCURRENCY,
+                budget=state.take_page, seen=state,
+            )
+            self._crawler_run = (run, crawler)
+        return self._crawler_run[1]
+
+    def handle(self, job):
+        """Run one job; the returned dict is stored as its result"""
+        payload = job['payload']
+        # Queued jobs crawl as their run asked, whatever this worker was started with
+        self.detector.crawler = self._crawler(payload)
+        if job['kind'] == 'file':
+            return self._handle_file(job)
+        if job['kind'] in ('google_doc', 'webpage'):
+            sources = self.detector.process_url(job['kind'], payload['url'])
+            return {"sources": [dict(source) for source in sources]}
+        raise ValueError(f"Unknown job kind: {job['kind']}")
+
+    def _handle_file(self, job):
+        payload = job['payload']
+        name = payload.get('name', '')
+        # The job carries the file's bytes; a name that is not a plain file name is refused
+        if 'data' not in payload or Path(name).name != name or name in ('', '.', '..'):
+            raise ValueError(f"File job {job['id']} does not carry a source file")
+        with tempfile.TemporaryDirectory(prefix="content_maker_job_") as directory:
+            local_path = Path(directory) / name
+            local_path.write_bytes(base64.b64decode(payload['data']))
+            source_info = self.detector.detect_source_type(local_path)
+            # Linked docs and pages become jobs of their own; the file's result lists them in order
+            settings = {"options": payload.get('options') or {}, "run": payload.get('run')}
+            children = [
+                self.queue.enqueue(kind, {"url": url, **settings}, key=f"{kind}:{url}@{job['key']}")
+                for kind, url in self.detector.source_urls(source_info)
+            ]
+            sources = self.detector.process_source(source_info, fetch_urls=False)
+        # Sources point at the file in the sources directory, not this worker's copy
+        local_url, source_url = f"file://{local_path}", f"file://{payload['path']}"
+        sources = [
+            {**source, 'source_url': source_url} if source.get('source_url') == local_url else dict(source)
+            for source in sources
+        ]
+        return {"sources": sources, "children": children}
+
+    def run_one(self):
+        """Lease and run one job; False if none was ready"""
+        job = self.queue.lease(self.worker_id, self.lease_s)
+        if job is None:
+            return False
+
+        done = threading.Event()
+
+        def heartbeat():
+            while not done.wait(self.lease_s / 3):
+                if not self.queue.extend(job, self.lease_s):
+                    return
+
+        threading.Thread(target=heartbeat, daemon=True).start()
+        with span("job", kind=job['kind'], attempt=job['attempts']) as job_span:
+            try:
+                result = self.handle(job)
+            except Exception as e:
+                job_span.status = "error"
+                status = self.queue.fail(job, f"{type(e).__name__}: {e}")
+                logger.warning("❌ Job %s (%s) failed, now %s: %s", job['id'], job['kind'], status, e)
+            else:
+                if not self.queue.complete(job, result):
+                    logger.warning("⚠️  Lease on job %s expired before it finished; result discarded", job['id'])
+                self.processed += 1
+            finally:
+                done.set()
+        return True
+
+    def run(self, exit_when_drained=True):
+        """Work until the queue is drained (or forever, polling for new jobs)"""
+        while True:
+            if self.run_one():
+                continue
+            if exit_when_drained and self.queue.drained():
+                return self.processed
+            time.sleep(IDLE_POLL_S)
+
+
+def run_worker(queue_location=None, exit_when_drained=True, crawl_concurrency=None):
+    """Worker process entry point"""
+    worker = SourceWorker(open_queue(queue_location), crawl_concurrency=crawl_concurrency)
+    return worker.run(exit_when_drained)
+
+
+def start_workers(count, queue_location=None, exit_when_drained=True, crawl_concurrency=None):
+    """
+    Start worker processes on this host; returns the processes
+
+    Crawl settings come with each job, so only the pages fetched at once are set here.
+    """
+    import multiprocessing
+    # spawn, not fork: a forked child would inherit the parent's threads and SQLite connections
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=run_worker, args=(queue_location, exit_when_drained, crawl_concurrency))
+        for _ in range(count)
+    ]
+    for process in processes:
+        process.start()
+    return processes
+
+
+def collect_sources(queue, file_keys):
+    """
+    Processed sources for finished file jobs, in the detector's order
+
+    Returns:
+        tuple: (list of Sources, list of keys of jobs that did not finish)
+    """
+    sources, unfinished = [], []
+    for key in file_keys:
+        job = queue.get_by_key(key)
+        if job is None or job['status'] != 'done':
+            unfinished.append(key)
+            continue
+        # Linked docs and pages come first, as process_source() returns them
+        for child_id in job['result']['children']:
+            child = queue.get(child_id)
+            if child['status'] == 'done':
+                sources.extend(child['result']['sources'])
+            else:
+                unfinished.append(child['key'])
+        sources.extend(job['result']['sources'])
+    return [Source.from_mapping(source) for source in sources], unfinished
+
+
+def process_sources(sources_dir="sources", workers=1, queue_location=None, crawl_args=None, question=None,
+                    max_age_s=DEFAULT_MAX_AGE_S):
+    """
+    Process a sources directory through the job queue with local worker processes
+
+    Workers on other hosts (`jobs.py work --queue http://broker:port`) help
+    drain the same queue when it is served by a broker. Files processed
+    with the same options less than max_age_s ago are not processed again.
+
+    Returns:
+        list: The processed sources, like SmartSourceDetector.process_sources_directory()
+    """
+    queue = open_queue(queue_location)
+    keys = enqueue_directory(queue, sources_dir, job_options(crawl_args, question), max_age_s)
+    for process in start_workers(workers, queue_location, True, getattr(crawl_args, "crawl_concurrency", None)):
+        process.join()
+
+    sources, unfinished = collect_sources(queue, keys)
+    if unfinished:
+        logger.warning("⚠️  %d job(s) did not finish; see `jobs.py status` for dead letters", len(unfinished))
+    return sources
+
+
+def add_queue_arguments(parser):
+    """Add the job queue options to an argparse parser"""
+    parser.add_argument(
+        "--workers", type=int, default=0,
+        help="Process sources through the job queue with this many worker processes (default: in-process)"
+    )
+    parser.add_argument(
+        "--queue", default=None, metavar="PATH_OR_URL",
+        help=f"Job queue file or broker URL (default: {DEFAULT_QUEUE_PATH})"
+    )
+
+
+def print_status(queue):
+    counts = queue.counts()
+    print("📋 Jobs: " + (", ".join(f"{status} {n}" for status, n in sorted(counts.items())) or "none"))
+    for job in queue.dead_letters():
+        target = job['payload'].get('path') or job['payload'].get('url')
+        print(f"💀 {job['id']} {job['kind']} {target} after {job['attempts']} attempt(s): {job['error']}")
+
+
+def main(argv=None):
+    """Command line entry point for the job queue"""
+    parser = argparse.ArgumentParser(description="Content Maker ingestion job queue")
+    parser.add_argument(
+        "--queue", default=None, metavar="PATH_OR_URL",
+        help=f"Job queue file or broker URL (default: {DEFAULT_QUEUE_PATH})"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = commands.add_parser("enqueue", help="Add a job for every file in the sources directory")
+    enqueue.add_argument("--sources", default="sources")
+    enqueue.add_argument(
+        "--max-age", type=float, default=DEFAULT_MAX_AGE_S / 3600, metavar="HOURS",
+        help="Process files again once their results are this old (default: 24, 0 for never)"
+    )
+
+    work = commands.add_parser("work", help="Drain the queue with worker processes")
+    work.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    work.add_argument("--forever", action="store_true", help="Keep polling for jobs once the queue is drained")
+    work.add_argument("--crawl-concurrency", type=int, default=None,
+                      help="Pages each worker fetches at once when a job crawls")
+
+    commands.add_parser("status", help="Show job counts and dead letters")
+    commands.add_parser("retry-dead", help="Re-queue dead-lettered jobs")
+
+    broker = commands.add_parser(
+        "broker", help=f"Serve the queue file to workers on other hosts (clients need ${QUEUE_TOKEN_ENV})"
+    )
+    broker.add_argument("--host", default="127.0.0.1")
+    broker.add_argument("--port", type=int, default=DEFAULT_BROKER_PORT)
+
+    args = parser.parse_args(argv)
+    queue = open_queue(args.queue)
+
+    if args.command == "enqueue":
+        keys = enqueue_directory(queue, args.sources, max_age_s=args.max_age * 3600)
+        print(f"➕ {len(keys)} file job(s) queued")
+        print_status(queue)
+    elif args.command == "work":
+        started = time.perf_counter()
+        processes = start_workers(args.workers, args.queue, not args.forever, args.crawl_concurrency)
+        print(f"👷 {len(processes)} worker(s) draining {args.queue or DEFAULT_QUEUE_PATH}")
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            print("\n👋 Stopping workers; leased jobs return to the queue when their leases expire")
+        print(f"⏱️  Drained in {time.perf_counter() - started:.1f}s")
+        print_status(queue)
+    elif args.command == "status":
+        print_status(queue)
+    elif args.command == "retry-dead":
+        print(f"🔁 {queue.retry_dead()} dead job(s) re-queued")
+    elif args.command == "broker":
+        if isinstance(queue, RemoteJobQueue):
+            parser.error("broker serves a queue file, not another broker")
+        try:
+            broker = QueueBroker(queue, args.host, args.port)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"📡 Serving {queue.path} on http://{args.host}:{args.port}, Ctrl+C to stop")
+        try:
+            broker.serve_forever()
+        except KeyboardInterrupt:
+            print("\n👋 Broker stopped")
+
+
+if __name__ == "__main__":
+    main()
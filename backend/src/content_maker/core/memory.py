@@ -0,0 +1,174 @@
+"""
+Memory-bounded source handling and per-stage memory accounting
+
+SourceSpill keeps processed sources in memory up to a byte budget and spills
+the rest to a JSONL file, so stages can stream sources instead of holding
+every copy at once. MemoryTracker records tracemalloc peaks for each stage.
+"""
+
+import json
+import os
+import tempfile
+import tracemalloc
+from contextlib import contextmanager
+
+from .settings import CACHE_DIR
+from .source import Source, json_default
+
+TOP_ALLOCATIONS = 3
+
+
+def source_size(source):
+    """Approximate in-memory size of a source: the characters it carries"""
+    return sum(len(value) for value in source.values() if isinstance(value, str))
+
+
+class SourceSpill:
+    """
+    Append-only sequence of source dicts with an in-memory byte budget
+
+    Once the budget is used up, further sources are written to a spill file
+    and read back one at a time on iteration. Can be iterated repeatedly.
+    """
+
+    def __init__(self, budget_bytes, spill_dir=None):
+        self.budget_bytes = budget_bytes
+        self.spill_dir = spill_dir or os.path.join(CACHE_DIR, "spill")
+        self.in_memory = []
+        self.memory_bytes = 0
+        self.spilled = 0
+        self._file = None
+
+    @classmethod
+    def collect(cls, sources, budget_bytes, spill_dir=None):
+        spill = cls(budget_bytes, spill_dir)
+        spill.extend(sources)
+        return spill
+
+    def append(self, source):
+        size = source_size(source)
+        if self._file is None and self.memory_bytes + size <= self.budget_bytes:
+            self.in_memory.append(source)
+            self.memory_bytes += size
+            return
+        if self._file is None:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            # Deleted on close, including when the spill is garbage collected
+            self._file = tempfile.NamedTemporaryFile(
+                "w+", encoding="utf-8", prefix="sources-", suffix=".jsonl", dir=self.spill_dir
+            )
+        self._file.write(json.dumps(source, ensure_ascii=False, default=json_default) + "\n")
+        self.spilled += 1
+
+    def extend(self, sources):
+        for source in sources:
+            self.append(source)
+
+    def __len__(self):
+        return len(self.in_memory) + self.spilled
+
+    def __iter__(self):
+        yield from self.in_memory
+        if self._file is None:
+            return
+        self._file.flush()
+        with open(self._file.name, "r", encoding="utf-8") as f:
+            for line in f:
+                yield Source.from_mapping(json.loads(line))
+
+    def close(self):
+        """Delete the spill file"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self.spilled = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class MemoryTracker:
+    """
+    Peak traced memory per pipeline stage
+
+    Stages must not nest: each one resets the tracemalloc peak. The top
+    allocation sites come from a snapshot taken as the stage ends, so they
+    show what the stage left behind rather than what it peaked on.
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    @property
+    def enabled(self):
+        return tracemalloc.is_tracing()
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name):
+        """Record memory for a stage; yields the stats dict, filled in on exit"""
+        stats = {}
+        if not self.enabled:
+            yield stats
+            return
+
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        try:
+            yield stats
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            top = tracemalloc.take_snapshot().statistics("lineno")[:TOP_ALLOCATIONS]
+            stats.update(
+                start_bytes=before,
+                end_bytes=current,
+                peak_bytes=peak,
+                top=[{"site": str(stat.traceback), "bytes": stat.size} for stat in top],
+            )
+            self.stages[name] = stats
+
+    def report(self):
+        if not self.stages:
+            return
+        print("\n🧠 Peak memory by stage:")
+        for name, stats in self.stages.items():
+            print(f"   {name:<12} peak {stats['peak_bytes'] / 2**20:8.1f} MiB   "
+                  f"retained {(stats['end_bytes'] - stats['start_bytes']) / 2**20:+8.1f} MiB")
+            for allocation in stats["top"]:
+                print(f"      {allocation['bytes'] / 2**20:6.1f} MiB  {allocation['site']}")
+
+
+memory = MemoryTracker()
+
+
+def add_memory_arguments(parser):
+    """Add the memory-budget options to an argparse parser"""
+    parser.add_argument(
+        "--memory-budget", type=float, metavar="MB",
+        help="Stream sources through the stages, keeping at most this many MB of them in memory "
+             "and spilling the rest to disk"
+    )
+    parser.add_argument(
+        "--memory-report", action="store_true",
+        help="Trace allocations and report peak memory for each stage"
+    )
+
+
+def memory_from_args(args):
+    """
+    Start tracing if asked for
+
+    Returns:
+        int: The source budget in bytes, or None when sources are kept in memory
+    """
+    if args.memory_report:
+        memory.start()
+    if args.memory_budget is None:
+        return None
+    return int(args.memory_budget * 2**20)
@@ -0,0 +1,75 @@
+"""
+Shared building blocks for the threading and synthesis steps
+"""
+
+from .source import source_payload
+
+
+def build_sources(relevant_chunks):
+    """
+    Retrieved chunks in the threading schema
+
+    Chunks are Sources from retriever.chunk_sources, which keep their
+    source's type and contribute their shared payload rather than a copy, or
+    plain text chunks.
+
+    Returns:
+        list: Source dicts with only the 'type' and 'contents' properties
+    """
+    return [
+        {"type": "text", "contents": chunk} if isinstance(chunk, str) else source_payload(chunk)
+        for chunk in relevant_chunks
+    ]
+
+
+def select_threads(threads, choice, quiet=False):
+    """
+    Resolve a user's thread choice
+
+    Args:
+        threads (list): Threads returned by thread_ideas
+        choice (str): A 1-based thread number or 'all'
+        quiet (bool): Don't announce the selection
+
+    Returns:
+        tuple: (choice_key, selected_threads) where choice_key is 'all' or the thread number
+    """
+    announce = (lambda message: None) if quiet else print
+
+    choice = str(choice or "").strip()
+    if choice.lower() == 'all':
+        announce("Using all threads for synthesis...")
+        return 'all', threads
+
+    try:
+        thread_index = int(choice) - 1
+    except ValueError:
+        announce("Invalid input. Using all threads...")
+        return 'all', threads
+
+    if 0 <= thread_index < len(threads):
+        announce(f"Selected thread: {threads[thread_index]['title']}")
+        return str(thread_index + 1), [threads[thread_index]]
+
+    announce("Invalid choice. Using all threads...")
+    return 'all', threads
+
+
+def build_synthesis_input(question, sources, threads_data, selected_threads, additional_instructions=""):
+    """Build the synthesise_content arguments for the selected threads"""
+    if threads_data is None:
+        return {
+            "input": question,
+            "sources": sources,
+            "threads": [],
+            "thread_summary": "No threads available - using original sources only",
+            "additional_instructions": ""
+        }
+
+    return {
+        "input": question,
+        "sources": sources,
+        "threads": selected_threads,
+        "thread_summary": threads_data["summary"],
+        "additional_instructions": additional_instructions if additional_instructions else ""
+    }
@@ -0,0 +1,88 @@
+"""
+Interactive regenerate loop: re-run synthesis on in-memory threads and sources
+"""
+
+from .inference import stream_inference
+from .pipeline import build_synthesis_input, select_threads
+from .streaming import ScriptPrinter
+
+
+def describe_output(index, output):
+    """One-line label for a generated script"""
+    instructions = output["instructions"] or "no extra instructions"
+    return f"#{index} thread {output['choice']} - {instructions}"
+
+
+def compare_outputs(outputs):
+    """Print the key parts of every generated script next to each other"""
+    print("\n" + "=" * 60)
+    for index, output in enumerate(outputs, 1):
+        print(describe_output(index, output))
+        parsed = output["response"]["parsed"]
+        if parsed is None:
+            print("   (invalid output)")
+            continue
+        script = parsed.get("script", {})
+        print(f"   Title:    {parsed.get('title', '')}")
+        print(f"   Hook:     {script.get('hook', '')}")
+        print(f"   Takeaway: {script.get('takeaway', '')}")
+        print(f"   Ending:   {script.get('ending', '')}")
+    print("=" * 60)
+
+
+def regenerate_loop(client, question, sources, threads_data, episode_id, first_output):
+    """
+    Let the user try other threads or instructions without rebuilding the pipeline
+
+    Every iteration costs a single synthesise_content call on the sources and
+    threads already in memory, recorded under the same episode. A call that
+    fails is reported and the loop carries on with the versions so far.
+
+    Args:
+        first_output (dict): {'choice', 'instructions', 'response'} for the initial script
+
+    Returns:
+        list: Every output generated, starting with first_output
+    """
+    outputs = [first_output]
+    choice_key = first_output["choice"]
+    instructions = first_output["instructions"]
+    threads = threads_data["threads"]
+
+    while True:
+        print("\nTry another version? [t] different thread, [i] new instructions, "
+              "[c] compare versions, [Enter] finish")
+        action = input("Regenerate: ").strip().lower()
+
+        if not action:
+            return outputs
+        if action == 'c':
+            compare_outputs(outputs)
+            continue
+        if action == 't':
+            print("Enter the number (1-{}) or 'all' to use all threads:".format(len(threads)))
+            choice_key, _ = select_threads(threads, input("Your choice: "))
+        elif action == 'i':
+            instructions = input("Additional instructions: ").strip()
+        else:
+            print("Unknown option.")
+            continue
+
+        _, selected_threads = select_threads(threads, choice_key, quiet=True)
+        synthesis_input = build_synthesis_input(question, sources, threads_data, selected_threads, instructions)
+
+        print(f"\nSynthesizing version {len(outputs) + 1}...")
+        try:
+            response = stream_inference(
+                client,
+                "synthesise_content",
+                synthesis_input,
+                ScriptPrinter().parser(),
+                episode_id=episode_id,
+            )
+        except Exception as e:
+            print(f"\n❌ Regeneration failed: {e}")
+            # Back to the last version that exists, so the next try starts from it
+            choice_key, instructions = outputs[-1]["choice"], outputs[-1]["instructions"]
+            continue
+        outputs.append({"choice": choice_key, "instructions": instructions, "response": response})
@@ -0,0 +1,398 @@
+"""
+Record real gateway calls and replay them offline with synthetic latency
+
+RecordingGateway wraps a TensorZero client and appends every inference
+(function calls and direct model calls such as image analysis) to a JSONL
+store. ReplayGateway / AsyncReplayGateway serve those recordings back as real
+tensorzero response objects, so the pipeline runs unchanged without any
+provider behind it.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+from .inference import uuid7
+from .inference_cache import canonical_json
+from .settings import CACHE_DIR, CLICKHOUSE_URL, CONFIG_FILE
+
+STREAM_CHUNK_CHARS = 40
+DEFAULT_FIRST_CHUNK_FRACTION = 0.3
+
+
+def request_target(kwargs):
+    """The function or model a request is for"""
+    return kwargs.get("function_name") or f"model:{kwargs.get('model_name')}"
+
+
+def request_key(kwargs):
+    """Hash of what determines a response: target, variant and input (not episode, tags or streaming)"""
+    payload = canonical_json({
+        "target": request_target(kwargs),
+        "variant_name": kwargs.get("variant_name"),
+        "input": kwargs.get("input"),
+    })
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def usage_dict(usage):
+    if usage is None:
+        return None
+    return {"input_tokens": usage.input_tokens, "output_tokens": usage.output_tokens}
+
+
+def recording_from_response(response, latency_s, first_chunk_s=None):
+    """Serialisable form of a JsonInferenceResponse or ChatInferenceResponse"""
+    recording = {
+        "variant_name": response.variant_name,
+        "usage": usage_dict(getattr(response, "usage", None)),
+        "latency_s": round(latency_s, 4),
+        "first_chunk_s": round(first_chunk_s, 4) if first_chunk_s is not None else None,
+    }
+    if hasattr(response, "output"):
+        recording.update(kind="json", raw=response.output.raw, parsed=response.output.parsed)
+    elif isinstance(response.content, str):
+        recording.update(kind="chat", content=[response.content])
+    else:
+        recording.update(kind="chat", content=[
+            block.text for block in response.content if getattr(block, "text", None) is not None
+        ])
+    return recording
+
+
+class ReplayStore:
+    """
+    Append-only JSONL file of recorded responses, indexed by request key
+
+    Requests that were never recorded can fall back to any recording for the
+    same function or model, which is what a load test on new questions needs.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(CACHE_DIR, "replay.jsonl")
+        self.by_key = {}
+        self.by_target = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return
+        for line in lines:
+            try:
+                self._index(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+
+    def _index(self, entry):
+        self.by_key.setdefault(entry["key"], []).append(entry)
+        self.by_target.setdefault(entry["target"], []).append(entry)
+
+    def __len__(self):
+        return sum(len(entries) for entries in self.by_key.values())
+
+    def add(self, kwargs, recording):
+        entry = {"key": request_key(kwargs), "target": request_target(kwargs), **recording}
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._index(entry)
+
+    def lookup(self, kwargs, rng, strict=False):
+        """
+        A recording for this request
+
+        Raises:
+            KeyError: if nothing matches (or only the fallback would, with strict=True)
+        """
+        entries = self.by_key.get(request_key(kwargs))
+        if not entries and not strict:
+            entries = self.by_target.get(request_target(kwargs))
+        if not entries:
+            raise KeyError(f"No recording for {request_target(kwargs)}")
+        return rng.choice(entries)
+
+
+class LatencyModel:
+    """
+    Synthetic latency for replayed calls
+
+    Specs:
+        recorded[:SCALE]            the latency measured when recording, optionally scaled
+        none                        no delay
+        fixed:SECONDS
+        uniform:LOW,HIGH
+        lognormal:MEDIAN,SIGMA      heavy-tailed, like real provider latency
+    """
+
+    def __init__(self, spec="recorded", seed=None):
+        self.spec = spec
+        self.rng = random.Random(seed)
+        name, _, params = spec.partition(":")
+        self.name = name
+        self.params = [float(value) for value in params.split(",")] if params else []
+
+        expected = {"recorded": (0, 1), "none": (0,), "fixed": (1,), "uniform": (2,), "lognormal": (2,)}
+        if name not in expected or len(self.params) not in expected[name]:
+            raise ValueError(f"Invalid latency spec: {spec}")
+
+    def sample(self, recording):
+        if self.name == "none":
+            return 0.0
+        if self.name == "fixed":
+            return self.params[0]
+        if self.name == "uniform":
+            return self.rng.uniform(*self.params)
+        if self.name == "lognormal":
+            median, sigma = self.params
+            return self.rng.lognormvariate(math.log(median), sigma)
+        scale = self.params[0] if self.params else 1.0
+        return (recording.get("latency_s") or 0.0) * scale
+
+
+def first_chunk_delay(recording, latency_s):
+    """Time to first chunk, in the same proportion to the total as when recorded"""
+    recorded_total = recording.get("latency_s")
+    recorded_first = recording.get("first_chunk_s")
+    fraction = DEFAULT_FIRST_CHUNK_FRACTION
+    if recorded_total and recorded_first is not None:
+        fraction = min(1.0, recorded_first / recorded_total)
+    return latency_s * fraction
+
+
+def build_response(recording, episode_id):
+    from tensorzero.types import ChatInferenceResponse, JsonInferenceOutput, JsonInferenceResponse, Text, Usage
+
+    ids = {
+        "inference_id": uuid7(),
+        "episode_id": episode_id or uuid7(),
+        "variant_name": recording["variant_name"],
+        "usage": Usage(**(recording.get("usage") or {"input_tokens": 0, "output_tokens": 0})),
+    }
+    if recording["kind"] == "json":
+        return JsonInferenceResponse(output=JsonInferenceOutput(raw=recording["raw"], parsed=recording["parsed"]), **ids)
+    return ChatInferenceResponse(content=[Text(text=text) for text in recording["content"]], **ids)
+
+
+def stream_pieces(recording):
+    raw = recording.get("raw") or ""
+    return [raw[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(raw), STREAM_CHUNK_CHARS)] or [""]
+
+
+def stream_plan(recording, latency_s, episode_id):
+    """(delay before it, JsonChunk) for each chunk of a replayed stream; usage comes on the last"""
+    from tensorzero.types import JsonChunk
+
+    response = build_response(recording, episode_id)
+    pieces = stream_pieces(recording)
+    first = first_chunk_delay(recording, latency_s)
+    gap = (latency_s - first) / max(1, len(pieces) - 1)
+    for i, piece in enumerate(pieces):
+        yield (gap if i else first), JsonChunk(
+            inference_id=response.inference_id,
+            episode_id=response.episode_id,
+            variant_name=response.variant_name,
+            raw=piece,
+            usage=response.usage if i == len(pieces) - 1 else None,
+        )
+
+
+class _ReplayBase:
+    def __init__(self, store, latency=None, strict=False, seed=None):
+        self.store = store
+        self.latency = latency or LatencyModel(seed=seed)
+        self.strict = strict
+        self.rng = random.Random(seed)
+        self.calls = 0
+
+    def _plan(self, kwargs):
+        self.calls += 1
+        recording = self.store.lookup(kwargs, self.rng, self.strict)
+        return recording, self.latency.sample(recording)
+
+
+class ReplayGateway(_ReplayBase):
+    """Drop-in for a TensorZeroGateway that serves recorded responses"""
+
+    def inference(self, stream=False, episode_id=None, **kwargs):
+        recording, latency_s = self._plan(kwargs)
+        if stream:
+            return self._stream(recording, latency_s, episode_id)
+        time.sleep(latency_s)
+        return build_response(recording, episode_id)
+
+    def _stream(self, recording, latency_s, episode_id):
+        for delay, chunk in stream_plan(recording, latency_s, episode_id):
+            time.sleep(delay)
+            yield chunk
+
+    def feedback(self, **kwargs):
+        return None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+class AsyncReplayGateway(_ReplayBase):
+    """Drop-in for an AsyncTensorZeroGateway that serves recorded responses"""
+
+    async def inference(self, stream=False, episode_id=None, **kwargs):
+        recording, latency_s = self._plan(kwargs)
+        if stream:
+            # Like the real async gateway: awaiting the call gives an async iterator of chunks
+            return self._stream(recording, latency_s, episode_id)
+        await asyncio.sleep(latency_s)
+        return build_response(recording, episode_id)
+
+    async def _stream(self, recording, latency_s, episode_id):
+        for delay, chunk in stream_plan(recording, latency_s, episode_id):
+            await asyncio.sleep(delay)
+            yield chunk
+
+    async def feedback(self, **kwargs):
+        return None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+
+class RecordingGateway:
+    """Wrap a TensorZeroGateway and record every inference it makes"""
+
+    def __init__(self, client, store):
+        self.client = client
+        self.store = store
+
+    def inference(self, **kwargs):
+        started = time.perf_counter()
+        response = self.client.inference(**kwargs)
+        if kwargs.get("stream"):
+            return self._record_stream(kwargs, response, started)
+        self.store.add(kwargs, recording_from_response(response, time.perf_counter() - started))
+        return response
+
+    def _record_stream(self, kwargs, stream, started):
+        first_chunk_s = None
+        raw = []
+        last = None
+        for chunk in stream:
+            if first_chunk_s is None:
+                first_chunk_s = time.perf_counter() - started
+            raw.append(getattr(chunk, "raw", None) or "")
+            last = chunk
+            yield chunk
+        if last is None:
+            return
+
+        text = "".join(raw)
+        try:
+            parsed = json.loads(text)
+        except json.JSONDecodeError:
+            parsed = None
+        self.store.add(kwargs, {
+            "kind": "json",
+            "variant_name": last.variant_name,
+            "usage": usage_dict(getattr(last, "usage", None)),
+            "latency_s": round(time.perf_counter() - started, 4),
+            "first_chunk_s": round(first_chunk_s, 4),
+            "raw": text,
+            "parsed": parsed,
+        })
+
+    def __getattr__(self, name):
+        # feedback() and anything else go straight to the real client
+        return getattr(self.client, name)
+
+    def __enter__(self):
+        self.client.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self.client.__exit__(*exc_info)
+
+
+class AsyncRecordingGateway:
+    """Wrap an AsyncTensorZeroGateway and record every (non-streaming) inference it makes"""
+
+    def __init__(self, client, store):
+        self.client = client
+        self.store = store
+
+    async def inference(self, **kwargs):
+        started = time.perf_counter()
+        response = await self.client.inference(**kwargs)
+        self.store.add(kwargs, recording_from_response(response, time.perf_counter() - started))
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    async def __aenter__(self):
+        await self.client.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return await self.client.__aexit__(*exc_info)
+
+
+def add_replay_arguments(parser):
+    """Add the record/replay options to an argparse parser"""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--record", action="store_true",
+                       help="Record every gateway call (including image analysis) to the replay store")
+    group.add_argument("--replay", action="store_true",
+                       help="Serve gateway calls from the replay store instead of calling any model")
+    parser.add_argument("--replay-store", help="Replay store file (default: .content_maker/replay.jsonl)")
+    parser.add_argument("--replay-latency", default="recorded",
+                        help="Replayed latency: recorded[:SCALE], none, fixed:S, uniform:LO,HI "
+                             "or lognormal:MEDIAN,SIGMA (default: recorded)")
+
+
+@contextmanager
+def open_gateway(args):
+    """Sync client for the run: embedded gateway, recorded embedded gateway, or replay"""
+    if getattr(args, "replay", False):
+        yield ReplayGateway(ReplayStore(args.replay_store), LatencyModel(args.replay_latency))
+        return
+    from tensorzero import TensorZeroGateway
+    with TensorZeroGateway.build_embedded(clickhouse_url=CLICKHOUSE_URL, config_file=CONFIG_FILE) as client:
+        yield RecordingGateway(client, ReplayStore(args.replay_store)) if getattr(args, "record", False) else client
+
+
+async def build_async_gateway(args):
+    """Async client for the run: embedded gateway, recorded embedded gateway, or replay"""
+    if getattr(args, "replay", False):
+        return AsyncReplayGateway(ReplayStore(args.replay_store), LatencyModel(args.replay_latency))
+    from tensorzero import AsyncTensorZeroGateway
+    client = await AsyncTensorZeroGateway.build_embedded(clickhouse_url=CLICKHOUSE_URL, config_file=CONFIG_FILE)
+    if getattr(args, "record", False):
+        return AsyncRecordingGateway(client, ReplayStore(args.replay_store))
+    return client
+
+
+def image_gateway(args):
+    """
+    Sync client for image analysis in async modes
+
+    Only needed when recording or replaying; otherwise the image processor
+    keeps building its own embedded gateway.
+    """
+    if getattr(args, "record", False) or getattr(args, "replay", False):
+        return open_gateway(args)
+    return nullcontext(None)
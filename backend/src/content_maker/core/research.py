@@ -0,0 +1,88 @@
+"""
+Multi-query retrieval: focused research queries fused into one ranking
+
+generate_research_query turns a long, conversational question into a few
+short search queries. Chunks are ranked for each of them and for the
+question itself, the rankings are merged with reciprocal rank fusion, and an
+MMR rerank keeps near-duplicate chunks out of the prompt.
+"""
+
+import logging
+
+from .inference import async_inference, run_inference
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUERY_COUNT = 3
+# Chunks sent to thread_ideas at most; the MMR rerank often returns fewer
+DEFAULT_TOP_K = 6
+
+
+def research_queries(result, question, count):
+    """The question plus up to count generated queries from a generate_research_query result"""
+    parsed = result["parsed"] if result is not None else None
+    generated = [query.strip() for query in (parsed or {}).get("queries", []) if query.strip()]
+    # The question always gets a ranking of its own, so a poor generation cannot lose its matches
+    return [question, *generated[:count]]
+
+
+def generate_queries(client, question, count=DEFAULT_QUERY_COUNT, cache=None):
+    """
+    Focused search queries for a question
+
+    Results are cached per question by the inference cache; if the call
+    fails, retrieval falls back to the question alone.
+
+    Returns:
+        list: The question, then the generated queries
+    """
+    try:
+        result = run_inference(client, "generate_research_query", {"user_text": question, "count": count}, cache=cache)
+    except Exception as e:
+        logger.warning("⚠️  Research query generation failed, searching with the question only: %s", e)
+        result = None
+    return research_queries(result, question, count)
+
+
+async def async_generate_queries(client, question, count=DEFAULT_QUERY_COUNT, cache=None):
+    """generate_queries on an AsyncTensorZeroGateway"""
+    try:
+        result = await async_inference(
+            client, "generate_research_query", {"user_text": question, "count": count}, cache=cache
+        )
+    except Exception as e:
+        logger.warning("⚠️  Research query generation failed, searching with the question only: %s", e)
+        result = None
+    return research_queries(result, question, count)
+
+
+def retrieve_chunks(client, question, index, query_count=0, cache=None, top_k=DEFAULT_TOP_K):
+    """
+    Top chunks of a ChunkIndex for a question: ranked for the question alone,
+    or with query_count generated research queries fused in
+    """
+    queries = generate_queries(client, question, query_count, cache) if query_count else [question]
+    return index.multi_search(queries, top_k)
+
+
+async def async_retrieve_chunks(client, question, index, query_count=0, cache=None, top_k=DEFAULT_TOP_K):
+    """retrieve_chunks on an AsyncTensorZeroGateway"""
+    queries = await async_generate_queries(client, question, query_count, cache) if query_count else [question]
+    return index.multi_search(queries, top_k)
+
+
+def add_research_arguments(parser):
+    """Add the multi-query retrieval options to an argparse parser"""
+    parser.add_argument(
+        "--multi-query", action="store_true",
+        help="Retrieve with several generated research queries, fused and diversified, instead of the raw question"
+    )
+    parser.add_argument(
+        "--research-queries", type=int, default=DEFAULT_QUERY_COUNT,
+        help=f"Research queries generated per question with --multi-query (default: {DEFAULT_QUERY_COUNT})"
+    )
+
+
+def research_from_args(args):
+    """Research queries to generate per question, or 0 for keyword retrieval"""
+    return args.research_queries if args.multi_query else 0
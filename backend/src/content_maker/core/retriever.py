@@ -1,15 +1,27 @@
 # backend/retriever.py
-import glob
-import json
-
-def load_sources(path="sources/*.json"):
-    """Load all JSON files from the sources folder."""
-    sources = []
-    for file in glob.glob(path):
-        with open(file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            sources.append(data["content"])
-    return sources
+import hashlib
+import heapq
+import itertools
+import logging
+import math
+import re
+from collections import Counter, defaultdict
+
+from .source import Source
+
+# Reciprocal rank fusion constant; 60 is the usual choice and damps the very top ranks
+RRF_K = 60
+# Candidates per query that fusion and the diversity rerank consider
+RANK_DEPTH = 20
+# Weight of redundancy against relevance in the MMR rerank
+DEFAULT_DIVERSITY = 0.5
+
+logger = logging.getLogger(__name__)
+
+STOPWORDS = frozenset(
+    "the and for with that this from what how why when who are was were can will about into your our "
+    "you they their them its not but have has had all any out use using".split()
+)
 
 def chunk_text(text, chunk_size=500):
     """Split long text into word chunks of ~chunk_size words."""
@@ -19,16 +31,210 @@ def chunk_text(text, chunk_size=500):
         for i in range(0, len(words), chunk_size)
     ]
 
-def build_chunks():
-    """Load all sources and break them into chunks."""
-    chunks = []
-    for content in load_sources():
-        chunks.extend(chunk_text(content))
-    return chunks
+def chunk_sources(sources, chunk_size=500):
+    """
+    Split processed sources into Source chunks that keep the source's type, URL and title.
 
-def get_relevant_chunks(query, chunks, top_k=3):
-    """Retrieve top_k chunks matching query words (naive keyword search)."""
-    return [
-        c for c in chunks
-        if any(word in c.lower() for word in query.lower().split())
-    ][:top_k]
+    Sources that fit in one chunk are yielded as they are, formatting intact.
+    Identical chunks (the same page linked from two notes) are yielded once;
+    only a digest of each is remembered, not its text.
+    """
+    seen = set()
+    for source in sources:
+        source = Source.from_mapping(source)
+        if len(source.contents.split()) <= chunk_size:
+            chunks = [source] if source.contents.strip() else []
+        else:
+            chunks = [
+                Source(source.type, chunk, source.source_url, source.source_title)
+                for chunk in chunk_text(source.contents, chunk_size)
+            ]
+        for chunk in chunks:
+            digest = hashlib.blake2b(chunk.contents.encode("utf-8"), digest_size=16).digest()
+            if digest not in seen:
+                seen.add(digest)
+                yield chunk
+
+def chunk_contents(chunk):
+    """Text of a chunk: a plain string or a Source from chunk_sources."""
+    return chunk if isinstance(chunk, str) else chunk["contents"]
+
+def query_terms(text):
+    """Content words of a query: lowercased, without stopwords and very short words."""
+    return {word for word in re.findall(r"[a-z0-9]+", text.lower()) if len(word) > 2 and word not in STOPWORDS}
+
+def present_terms(lowered, vocabulary):
+    """The vocabulary terms a lowercased chunk contains."""
+    return frozenset(term for term in vocabulary if term in lowered)
+
+def no_content_words(queries):
+    """Warn that queries have nothing to rank by, so retrieval falls back to the leading chunks."""
+    logger.warning("⚠️  No content words in %r; using the first chunks instead of ranked ones", queries)
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """Merge rankings (lists of items, best first) into [(item, score)], best first."""
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, 1):
+            scores[item] += 1 / (k + rank)
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+def mmr(candidates, texts, top_k, diversity=DEFAULT_DIVERSITY):
+    """
+    Maximal marginal relevance: pick up to top_k of [(item, relevance)],
+    trading relevance against word overlap (Jaccard) with the items already
+    picked, and stopping early once the rest are mostly repeats.
+    """
+    if not candidates:
+        return []
+    words = {item: set(texts[item].split()) for item, _ in candidates}
+    best_relevance = candidates[0][1] or 1.0
+
+    def overlap(a, b):
+        union = len(words[a] | words[b])
+        return len(words[a] & words[b]) / union if union else 0.0
+
+    def marginal(candidate):
+        item, relevance = candidate
+        redundancy = max((overlap(item, chosen) for chosen in selected), default=0.0)
+        return (1 - diversity) * relevance / best_relevance - diversity * redundancy
+
+    selected = []
+    remaining = list(candidates)
+    while remaining and len(selected) < top_k:
+        best = max(remaining, key=marginal)
+        # Everything left repeats what was picked more than it adds; return fewer chunks instead
+        if selected and marginal(best) <= 0:
+            break
+        selected.append(best[0])
+        remaining.remove(best)
+    return selected
+
+class ChunkIndex:
+    """
+    Chunks kept in memory with their lowercased text, for repeated queries.
+
+    Chunks are plain strings or Sources from chunk_sources; searches return
+    them as they were added.
+    """
+
+    def __init__(self, chunks=None):
+        self.chunks = []
+        self._lowered = []
+        self.add(chunks or [])
+
+    def add(self, chunks):
+        """Add chunks to the index."""
+        for chunk in chunks:
+            self.chunks.append(chunk)
+            self._lowered.append(chunk_contents(chunk).lower())
+
+    def splice(self, start, stop, chunks):
+        """Replace chunks[start:stop] with new chunks, lowercasing only the new ones."""
+        self.chunks[start:stop] = chunks
+        self._lowered[start:stop] = [chunk_contents(chunk).lower() for chunk in chunks]
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def rank(self, queries, depth=RANK_DEPTH):
+        """
+        Rank chunks for several queries in one pass over the index.
+
+        A chunk scores the idf-weighted sum of the query terms it contains, so
+        rare, specific words count for more than ones every chunk mentions.
+
+        Returns:
+            list: One list of chunk positions per query, best first, at most depth long
+        """
+        term_sets = [query_terms(query) for query in queries]
+        vocabulary = sorted(set().union(*term_sets))
+        if not vocabulary:
+            return [[] for _ in queries]
+
+        # Each chunk is scanned once for every query's terms together
+        present = []
+        document_frequency = Counter()
+        for lowered in self._lowered:
+            found = present_terms(lowered, vocabulary)
+            present.append(found)
+            document_frequency.update(found)
+        idf = {term: math.log(1 + len(present) / count) for term, count in document_frequency.items()}
+
+        rankings = []
+        for terms in term_sets:
+            scored = [
+                (sum(idf[term] for term in found & terms), position)
+                for position, found in enumerate(present) if found & terms
+            ]
+            scored.sort(key=lambda item: (-item[0], item[1]))
+            rankings.append([position for _, position in scored[:depth]])
+        return rankings
+
+    def multi_search(self, queries, top_k=3, depth=RANK_DEPTH, diversity=DEFAULT_DIVERSITY):
+        """
+        Top chunks for several queries: ranked per query, fused with RRF, diversified with MMR.
+
+        Queries without a single content word have nothing to rank by; the leading
+        chunks are returned instead, so the caller still gets some context.
+        """
+        if not any(query_terms(query) for query in queries):
+            no_content_words(queries)
+            return self.chunks[:max(top_k, 0)]
+        fused = reciprocal_rank_fusion(self.rank(queries, depth))[:depth]
+        return [self.chunks[position] for position in mmr(fused, self._lowered, top_k, diversity)]
+
+class StreamingChunkIndex:
+    """
+    ChunkIndex.multi_search over chunks that are read twice instead of held.
+
+    chunk_stream is called once per pass and must yield the same chunks in the
+    same order, as chunk_sources over a SourceSpill does. The first pass counts
+    document frequencies; the second keeps only the best depth chunks per query,
+    so memory follows depth and the number of queries, not the sources.
+    """
+
+    def __init__(self, chunk_stream):
+        self.chunk_stream = chunk_stream
+
+    def multi_search(self, queries, top_k=3, depth=RANK_DEPTH, diversity=DEFAULT_DIVERSITY):
+        """Same results as ChunkIndex(chunk_stream()).multi_search(queries, ...)."""
+        term_sets = [query_terms(query) for query in queries]
+        vocabulary = sorted(set().union(*term_sets))
+        if not vocabulary:
+            no_content_words(queries)
+            return list(itertools.islice(self.chunk_stream(), max(top_k, 0)))
+
+        document_frequency = Counter()
+        total = 0
+        for chunk in self.chunk_stream():
+            document_frequency.update(present_terms(chunk_contents(chunk).lower(), vocabulary))
+            total += 1
+        idf = {term: math.log(1 + total / count) for term, count in document_frequency.items()}
+
+        # One min-heap per query of (score, -position): the root is the worst chunk kept
+        heaps = [[] for _ in term_sets]
+        kept = {}
+        for position, chunk in enumerate(self.chunk_stream()):
+            lowered = chunk_contents(chunk).lower()
+            found = present_terms(lowered, vocabulary)
+            for terms, heap in zip(term_sets, heaps):
+                if not found & terms:
+                    continue
+                entry = (sum(idf[term] for term in found & terms), -position)
+                if len(heap) < depth:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    heapq.heapreplace(heap, entry)
+                else:
+                    continue
+                kept[position] = (chunk, lowered)
+            # Forget chunks every heap has since dropped
+            if len(kept) > 2 * depth * len(heaps):
+                ranked = {-negative for heap in heaps for _, negative in heap}
+                kept = {position: kept[position] for position in ranked}
+
+        rankings = [[-negative for _, negative in sorted(heap, reverse=True)] for heap in heaps]
+        fused = reciprocal_rank_fusion(rankings)[:depth]
+        texts = {position: kept[position][1] for position, _ in fused}
+        return [kept[position][0] for position in mmr(fused, texts, top_k, diversity)]
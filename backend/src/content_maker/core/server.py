@@ -0,0 +1,474 @@
+"""
+Long-running HTTP service that keeps gateway clients and processed sources warm
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+from .feedback import AsyncFeedbackQueue
+from .inference import async_inference
+from .hedging import add_hedging_arguments, hedger_from_args
+from .inference_cache import add_cache_arguments, cache_from_args
+from .instrumentation import add_instrumentation_arguments, instrumentation_from_args, span, tracer
+from .pipeline import build_sources, build_synthesis_input, select_threads
+from .replay import add_replay_arguments, build_async_gateway, image_gateway
+from .research import add_research_arguments, async_retrieve_chunks, research_from_args
+from .source_store import ProcessedSourceStore
+from .watch import SourceWatcher, add_watch_arguments
+from ..processors.image_processor import MultimodalImageProcessor
+from ..processors.source_detector import SmartSourceDetector
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8080
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_MAX_PENDING = 64
+# Request bodies are small JSON objects; anything larger is refused before it is read
+DEFAULT_MAX_BODY_BYTES = 1 << 20
+WATCH_WAKEUP_S = 1.0
+MAX_EPISODES = 256
+
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ContentService:
+    """
+    Request handlers for the content pipeline
+
+    Threading results are remembered per episode (bounded), so /synthesize only
+    needs the episode ID and a thread choice, never the sources again.
+    """
+
+    def __init__(self, client, sources_dir="sources",
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY, max_pending=DEFAULT_MAX_PENDING, cache=None,
+                 hedger=None, feedback_queue=None, detector=None, research_queries=0):
+        self.client = client
+        self.research_queries = research_queries
+        self.cache = cache
+        self.hedger = hedger
+        self.feedback_queue = feedback_queue
+        self.store = ProcessedSourceStore(detector or SmartSourceDetector(), sources_dir)
+        self.episodes = OrderedDict()
+        self.max_pending = max_pending
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._ingest_lock = asyncio.Lock()
+        self._pending = 0
+        self._ingested = False
+        self.stats = {"requests": 0, "rejected": 0, "errors": 0}
+
+    async def _limited(self, coroutine):
+        """Run an LLM-bound handler under the request concurrency limit"""
+        if self._pending >= self.max_pending:
+            coroutine.close()
+            self.stats["rejected"] += 1
+            raise HttpError(503, "Too many pending requests, retry later")
+
+        self._pending += 1
+        try:
+            async with self._semaphore:
+                return await coroutine
+        finally:
+            self._pending -= 1
+
+    async def ingest(self, body):
+        """Re-scan the sources directory, processing only added or changed files"""
+        started = time.perf_counter()
+        async with self._ingest_lock:
+            with span("stage.ingest"):
+                changes = await asyncio.to_thread(self.store.refresh)
+            self._ingested = True
+        return {
+            "changes": changes,
+            "sources": len(self.store.processed_sources()),
+            "chunks": len(self.store.index),
+            "elapsed_s": round(time.perf_counter() - started, 3),
+        }
+
+    async def watch(self, watcher):
+        """
+        Apply the watcher's file changes to the warm store until cancelled
+
+        A file that fails to process is logged and skipped; the watch carries on.
+        Once cancelled, it returns only after the worker thread has left
+        watcher.changes(), so the watcher can then be closed safely.
+        """
+        while True:
+            # A timeout so the worker thread notices cancellation promptly
+            waiting = asyncio.ensure_future(asyncio.to_thread(watcher.changes, WATCH_WAKEUP_S))
+            try:
+                paths = await asyncio.shield(waiting)
+            except asyncio.CancelledError:
+                await asyncio.wait([waiting])
+                raise
+            except Exception as e:
+                logger.warning("❌ Watching failed: %s", e)
+                continue
+            if not paths:
+                continue
+            started = time.perf_counter()
+            async with self._ingest_lock:
+                with span("stage.ingest", files=len(paths)):
+                    # Process off the loop, then swap entries in on it so no request sees a half-spliced index
+                    updates = await asyncio.to_thread(self._process_changes, sorted(paths))
+                    outcomes = [(path, self.store.apply_change(update)) for path, update in updates]
+            changed = [str(path) for path, outcome in outcomes if outcome != 'unchanged']
+            if changed:
+                logger.info("🔄 Re-processed %s in %.2fs", ", ".join(changed), time.perf_counter() - started)
+
+    def _process_changes(self, paths):
+        """[(path, process_change result)] for the paths that processed without an error"""
+        updates = []
+        for path in paths:
+            try:
+                updates.append((path, self.store.process_change(path)))
+            except Exception as e:
+                logger.warning("❌ Could not process %s: %s", path, e)
+        return updates
+
+    async def thread(self, body):
+        question = body.get("question")
+        if not question:
+            raise HttpError(400, "'question' is required")
+        if not self._ingested:
+            await self.ingest({})
+
+        # Retrieval is under the limit too: with research queries it makes LLM calls of its own
+        cleaned_sources, threading_response = await self._limited(self._retrieve_and_thread(question))
+
+        episode_id = str(threading_response["episode_id"])
+        self.episodes[episode_id] = {
+            "question": question,
+            "sources": cleaned_sources,
+            "threads": threading_response["parsed"],
+        }
+        while len(self.episodes) > MAX_EPISODES:
+            self.episodes.popitem(last=False)
+
+        return {
+            "episode_id": episode_id,
+            "inference_id": str(threading_response["inference_id"]),
+            "threads": threading_response["parsed"],
+            "cached": bool(threading_response.get("cached")),
+        }
+
+    async def _retrieve_and_thread(self, question):
+        with span("stage.retrieve"):
+            relevant_chunks = await async_retrieve_chunks(
+                self.client, question, self.store.index, self.research_queries, self.cache
+            )
+        cleaned_sources = build_sources(relevant_chunks)
+
+        threading_response = await async_inference(
+            self.client,
+            "thread_ideas",
+            {"input": question, "sources": cleaned_sources},
+            cache=self.cache,
+            hedger=self.hedger,
+        )
+        return cleaned_sources, threading_response
+
+    async def synthesize(self, body):
+        episode_id = body.get("episode_id")
+        episode = self.episodes.get(str(episode_id))
+        if episode is None:
+            raise HttpError(404, f"Unknown episode: {episode_id} (call /thread first)")
+
+        threads_data = episode["threads"]
+        choice_key, selected_threads = None, []
+        if threads_data is not None:
+            choice_key, selected_threads = select_threads(
+                threads_data["threads"], body.get("thread", "all"), quiet=True
+            )
+
+        synthesis_input = build_synthesis_input(
+            episode["question"], episode["sources"], threads_data,
+            selected_threads, body.get("instructions", "")
+        )
+        response = await self._limited(async_inference(
+            self.client,
+            "synthesise_content",
+            synthesis_input,
+            episode_id=episode_id,
+            cache=self.cache,
+            hedger=self.hedger,
+        ))
+
+        return {
+            "episode_id": str(response["episode_id"]),
+            "inference_id": str(response["inference_id"]),
+            "variant_name": response["variant_name"],
+            "thread_choice": choice_key,
+            "script": response["parsed"],
+        }
+
+    async def feedback(self, body):
+        """Queue feedback; it is sent in the background, off the request path"""
+        if "value" not in body:
+            raise HttpError(400, "'value' is required")
+        try:
+            self.feedback_queue.submit(
+                body.get("metric_name", "user_rating"),
+                body["value"],
+                episode_id=body.get("episode_id"),
+                inference_id=body.get("inference_id"),
+            )
+        except (TypeError, ValueError) as e:
+            raise HttpError(400, str(e))
+        return {"queued": True}
+
+    async def health(self, body):
+        return {
+            "status": "ok",
+            "ingested": self._ingested,
+            "sources": len(self.store.processed_sources()),
+            "chunks": len(self.store.index),
+            "pending": self._pending,
+            **self.stats,
+            "hedging": self.hedger.stats if self.hedger else None,
+            "feedback": self.feedback_queue.stats if self.feedback_queue else None,
+        }
+
+    async def metrics(self, body):
+        """Span metrics in the Prometheus text format"""
+        return tracer.prometheus_text()
+
+    def routes(self):
+        return {
+            ("POST", "/ingest"): self.ingest,
+            ("POST", "/thread"): self.thread,
+            ("POST", "/synthesize"): self.synthesize,
+            ("POST", "/feedback"): self.feedback,
+            ("GET", "/health"): self.health,
+            ("GET", "/metrics"): self.metrics,
+        }
+
+
+class HttpServer:
+    """Minimal HTTP/1.1 JSON server on asyncio streams, with keep-alive"""
+
+    def __init__(self, service, max_body_bytes=DEFAULT_MAX_BODY_BYTES):
+        self.service = service
+        self.routes = service.routes()
+        self.max_body_bytes = max_body_bytes
+
+    def content_length(self, headers):
+        """The request body's length from its headers; HttpError 400/413 if invalid or too large"""
+        value = headers.get('content-length', '') or '0'
+        if not value.isdigit():
+            raise HttpError(400, f"Invalid Content-Length: {value!r}")
+        length = int(value)
+        if length > self.max_body_bytes:
+            raise HttpError(413, f"Request body is {length} bytes, the limit is {self.max_body_bytes}")
+        return length
+
+    async def dispatch(self, method, path, body):
+        handler = self.routes.get((method, path))
+        if handler is None:
+            if any(route_path == path for _, route_path in self.routes):
+                raise HttpError(405, f"{method} not allowed on {path}")
+            raise HttpError(404, f"No route for {path}")
+
+        try:
+            payload = json.loads(body) if body else {}
+        except json.JSONDecodeError as e:
+            raise HttpError(400, f"Invalid JSON body: {e}")
+        if not isinstance(payload, dict):
+            raise HttpError(400, "JSON body must be an object")
+        return await handler(payload)
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                self.service.stats["requests"] += 1
+                try:
+                    length = self.content_length(headers)
+                except HttpError as e:
+                    # The body can't be skipped safely, so the connection ends with the error
+                    await self.respond(writer, e.status, {"error": e.message}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length)
+
+                path = urlsplit(target).path
+                # Unknown paths share one span name to keep metric cardinality bounded
+                route = path if any(route_path == path for _, route_path in self.routes) else "other"
+                with span(f"http {route}", method=method, bytes=len(body)) as request_span:
+                    try:
+                        status, payload = 200, await self.dispatch(method, path, body)
+                    except HttpError as e:
+                        status, payload = e.status, {"error": e.message}
+                    except Exception as e:
+                        self.service.stats["errors"] += 1
+                        status, payload = 500, {"error": str(e)}
+                    request_span.set(http_status=status)
+                    if status >= 500:
+                        request_span.status = "error"
+
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                await self.respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, payload, keep_alive):
+        if isinstance(payload, str):
+            content_type = "text/plain; version=0.0.4"
+            data = payload.encode('utf-8')
+        else:
+            content_type = "application/json"
+            data = json.dumps(payload, default=str).encode('utf-8')
+        writer.write(
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            f"\r\n".encode('latin-1') + data
+        )
+        await writer.drain()
+
+
+async def stop_watch(watch_task, watcher):
+    """Cancel ContentService.watch() and close its watcher once no thread is waiting on it"""
+    watch_task.cancel()
+    try:
+        await watch_task
+    except asyncio.CancelledError:
+        pass
+    watcher.close()
+
+
+async def serve(host="127.0.0.1", port=DEFAULT_PORT, sources_dir="sources",
+                max_concurrency=DEFAULT_MAX_CONCURRENCY, max_pending=DEFAULT_MAX_PENDING, cache=None,
+                hedger=None, gateway_options=None, watcher=None, research_queries=0,
+                max_body_bytes=DEFAULT_MAX_BODY_BYTES):
+    """
+    Build the warm clients and caches, then serve until cancelled
+
+    gateway_options are the parsed --record/--replay options (see replay.py).
+    With a SourceWatcher, changed files are re-processed as they land.
+    research_queries > 0 switches /thread to multi-query retrieval.
+    """
+    client = await build_async_gateway(gateway_options)
+    with image_gateway(gateway_options) as image_client:
+        async with client, AsyncFeedbackQueue(client) as feedback_queue:
+            detector = SmartSourceDetector(image_processor=MultimodalImageProcessor(client=image_client))
+            service = ContentService(
+                client, sources_dir, max_concurrency=max_concurrency, max_pending=max_pending, cache=cache,
+                hedger=hedger, feedback_queue=feedback_queue, detector=detector, research_queries=research_queries
+            )
+            warmup = await service.ingest({})
+            print(f"🔥 Warm: {warmup['sources']} source(s), {warmup['chunks']} chunk(s) in {warmup['elapsed_s']}s")
+
+            watch_task = None
+            if watcher is not None:
+                watch_task = asyncio.create_task(service.watch(watcher))
+                print(f"👀 Watching {sources_dir} ({watcher.backend})")
+
+            server = await asyncio.start_server(HttpServer(service, max_body_bytes).handle_connection, host, port)
+            print(f"🚀 Content Maker service listening on http://{host}:{port}")
+            try:
+                async with server:
+                    await server.serve_forever()
+            finally:
+                if watch_task is not None:
+                    await stop_watch(watch_task, watcher)
+                if hedger is not None:
+                    hedger.tracker.save()
+
+
+def main(argv=None):
+    """Command line entry point for the HTTP service"""
+    parser = argparse.ArgumentParser(description="Content Maker HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--sources", default="sources", help="Sources directory to keep warm")
+    parser.add_argument(
+        "--max-concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY,
+        help=f"Maximum LLM-bound requests in flight (default: {DEFAULT_MAX_CONCURRENCY})"
+    )
+    parser.add_argument(
+        "--max-pending", type=int, default=DEFAULT_MAX_PENDING,
+        help=f"Requests allowed to wait before new ones get 503 (default: {DEFAULT_MAX_PENDING})"
+    )
+    parser.add_argument(
+        "--max-body-bytes", type=int, default=DEFAULT_MAX_BODY_BYTES,
+        help=f"Largest request body accepted; larger ones get 413 (default: {DEFAULT_MAX_BODY_BYTES})"
+    )
+    parser.add_argument(
+        "--watch", action="store_true",
+        help="Re-process files in the sources directory as they are added or changed"
+    )
+    add_research_arguments(parser)
+    add_watch_arguments(parser)
+    add_cache_arguments(parser)
+    add_hedging_arguments(parser)
+    add_replay_arguments(parser)
+    add_instrumentation_arguments(parser)
+    args = parser.parse_args(argv)
+    instrumentation_from_args(args)
+
+    watcher = None
+    if args.watch:
+        watcher = SourceWatcher(args.sources, args.debounce, args.poll_interval,
+                                use_inotify=False if args.poll else None)
+    try:
+        asyncio.run(serve(
+            host=args.host,
+            port=args.port,
+            sources_dir=args.sources,
+            max_concurrency=args.max_concurrency,
+            max_pending=args.max_pending,
+            cache=cache_from_args(args),
+            hedger=hedger_from_args(args),
+            gateway_options=args,
+            watcher=watcher,
+            research_queries=research_from_args(args),
+            max_body_bytes=args.max_body_bytes,
+        ))
+    except KeyboardInterrupt:
+        print("\n👋 Shutting down")
+    finally:
+        if args.trace_dir:
+            tracer.export(args.trace_dir)
+
+
+if __name__ == "__main__":
+    main()
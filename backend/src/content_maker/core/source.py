@@ -0,0 +1,77 @@
+"""
+Compact record for a processed source
+"""
+
+from collections.abc import Mapping
+
+
+class Source(Mapping):
+    """
+    One processed source, as the detector produces it and the stages pass it on
+
+    Slotted, so a run with thousands of sources carries no per-source dict,
+    but it reads like the dicts it replaces (source["contents"],
+    source.get("source_title"), dict(source)) and compares equal to them.
+    The inference payload ({type, contents}) is built on first use and shared
+    by every prompt that includes the source.
+    """
+
+    __slots__ = ("type", "contents", "source_url", "source_title", "_payload")
+    FIELDS = ("type", "contents", "source_url", "source_title")
+
+    def __init__(self, type, contents, source_url=None, source_title=None):
+        self.type = type
+        self.contents = contents
+        self.source_url = source_url
+        self.source_title = source_title
+        self._payload = None
+
+    @classmethod
+    def from_mapping(cls, source):
+        """A Source for a source dict (such as one read back from a checkpoint)"""
+        if isinstance(source, cls):
+            return source
+        return cls(source["type"], source["contents"], source.get("source_url"), source.get("source_title"))
+
+    def __getitem__(self, key):
+        if key in self.FIELDS:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        raise KeyError(key)
+
+    def __iter__(self):
+        return (field for field in self.FIELDS if getattr(self, field) is not None)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"Source({self.type!r}, {self.contents[:40]!r}..., source_title={self.source_title!r})"
+
+    def payload(self):
+        """The source as the threading and synthesis schemas take it"""
+        if self._payload is None:
+            self._payload = {"type": self.type, "contents": self.contents}
+        return self._payload
+
+    def with_contents(self, contents):
+        """Same source with new contents (e.g. a summary)"""
+        return Source(self.type, contents, self.source_url, self.source_title)
+
+    def to_dict(self):
+        return dict(self)
+
+
+def source_payload(source):
+    """Schema payload for a Source or a plain source dict"""
+    if isinstance(source, Source):
+        return source.payload()
+    return {"type": source["type"], "contents": source["contents"]}
+
+
+def json_default(value):
+    """json.dump default that writes Sources as plain dicts"""
+    if isinstance(value, Source):
+        return value.to_dict()
+    return str(value)
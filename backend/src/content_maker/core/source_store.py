@@ -0,0 +1,142 @@
+"""
+In-memory store of processed sources, refreshed incrementally per file
+"""
+
+import logging
+from pathlib import Path
+
+from .retriever import ChunkIndex, chunk_sources
+
+logger = logging.getLogger(__name__)
+
+
+def file_fingerprint(path):
+    """Cheap change detector for a source file: (size, mtime in ns)"""
+    stat = Path(path).stat()
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+class ProcessedSourceStore:
+    """
+    Keep SmartSourceDetector results for a sources directory warm between runs
+
+    Each file's processed sources are cached with the file's fingerprint, so a
+    refresh only re-detects and re-processes files that were added or changed
+    (re-scraping their URLs and re-analysing their images); removed files are dropped.
+    Each file's processed sources are chunked into the retrieval index.
+    """
+
+    def __init__(self, detector, sources_dir="sources"):
+        self.detector = detector
+        self.sources_dir = Path(sources_dir)
+        self.entries = {}
+        self.index = ChunkIndex()
+
+    def refresh(self):
+        """
+        Bring the store up to date with the sources directory
+
+        Returns:
+            dict: {'added': [...], 'updated': [...], 'removed': [...], 'unchanged': int}
+        """
+        changes = {'added': [], 'updated': [], 'removed': [], 'unchanged': 0}
+        if not self.sources_dir.exists():
+            logger.warning("⚠️  Sources directory '%s' not found", self.sources_dir)
+            changes['removed'] = sorted(self.entries)
+            self.entries = {}
+            self._rebuild_index()
+            return changes
+
+        seen = set()
+        for file_path in sorted(self.sources_dir.iterdir()):
+            if not file_path.is_file():
+                continue
+            key = str(file_path)
+            seen.add(key)
+            fingerprint = file_fingerprint(file_path)
+
+            entry = self.entries.get(key)
+            if entry and entry['fingerprint'] == fingerprint:
+                changes['unchanged'] += 1
+                continue
+
+            self.entries[key] = self._process_file(file_path, fingerprint)
+            changes['updated' if entry else 'added'].append(key)
+
+        for key in sorted(set(self.entries) - seen):
+            del self.entries[key]
+            changes['removed'].append(key)
+
+        if changes['added'] or changes['updated'] or changes['removed']:
+            self._rebuild_index()
+        return changes
+
+    def update_file(self, file_path):
+        """
+        Bring one file up to date, updating the chunk index in place
+
+        Re-processes the file if it was added or changed and drops it if it
+        was removed; the other files' sources and chunks are not touched.
+
+        Returns:
+            str: 'added', 'updated', 'removed' or 'unchanged'
+        """
+        return self.apply_change(self.process_change(file_path))
+
+    def process_change(self, file_path):
+        """
+        The slow half of update_file: detect and process the file, without touching the store
+
+        Returns:
+            tuple: (key, new entry or None if the file is gone), or None if nothing changed
+        """
+        file_path = self.sources_dir / Path(file_path).name
+        key = str(file_path)
+        entry = self.entries.get(key)
+        if not file_path.is_file():
+            return None if entry is None else (key, None)
+
+        fingerprint = file_fingerprint(file_path)
+        if entry and entry['fingerprint'] == fingerprint:
+            return None
+        return key, self._process_file(file_path, fingerprint)
+
+    def apply_change(self, change):
+        """The fast half of update_file: swap the entry in and splice its chunks into the index"""
+        if change is None:
+            return 'unchanged'
+        key, new_entry = change
+        entry = self.entries.get(key)
+
+        # Entries are indexed in key order, so this file's chunks start after every earlier key's
+        start = sum(len(self.entries[other]['chunks']) for other in self.entries if other < key)
+        stop = start + (len(entry['chunks']) if entry else 0)
+        self.index.splice(start, stop, new_entry['chunks'] if new_entry else [])
+
+        if new_entry is None:
+            del self.entries[key]
+            return 'removed'
+        self.entries[key] = new_entry
+        return 'updated' if entry else 'added'
+
+    def _process_file(self, file_path, fingerprint):
+        source_info = self.detector.detect_source_type(file_path)
+        processed = self.detector.process_source(source_info)
+        return {
+            'fingerprint': fingerprint,
+            'processed': processed,
+            'chunks': list(chunk_sources(processed)),
+        }
+
+    def _rebuild_index(self):
+        index = ChunkIndex()
+        for key in sorted(self.entries):
+            index.add(self.entries[key]['chunks'])
+        self.index = index
+
+    def processed_sources(self):
+        """All processed sources, in file name order"""
+        sources = []
+        for key in sorted(self.entries):
+            sources.extend(self.entries[key]['processed'])
+        return sources
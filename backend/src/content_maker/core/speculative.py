@@ -0,0 +1,117 @@
+"""
+Speculative synthesis while the user is choosing a thread
+"""
+
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from .inference import build_inference_input, inference_result
+from .pipeline import build_synthesis_input
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CALLS = 3
+DEFAULT_TOKEN_BUDGET = 60000
+
+# Rough prompt size estimate used for the cost cap
+CHARS_PER_TOKEN = 4
+
+
+def estimate_prompt_tokens(arguments):
+    """Estimate the prompt tokens a set of function arguments will render to"""
+    return len(json.dumps(arguments)) // CHARS_PER_TOKEN
+
+
+class SpeculativeSynthesizer:
+    """
+    Run synthesise_content for likely thread choices in the background
+
+    Candidates are the first thread, then 'all', then the remaining threads in
+    order, so the default 'all' is speculated on whatever the thread count.
+    At most `max_calls` calls are started; a candidate whose estimated prompt
+    tokens would take the total past `token_budget` is skipped for cheaper ones.
+    """
+
+    def __init__(self, client, question, sources, threads_data, episode_id,
+                 max_calls=DEFAULT_MAX_CALLS, token_budget=DEFAULT_TOKEN_BUDGET):
+        self.client = client
+        self.question = question
+        self.sources = sources
+        self.threads_data = threads_data
+        self.episode_id = episode_id
+        self.max_calls = max_calls
+        self.token_budget = token_budget
+        self.futures = {}
+        self.estimated_tokens = 0
+        self._executor = None
+
+    def _candidates(self):
+        threads = self.threads_data["threads"]
+        singles = [(str(index), [thread]) for index, thread in enumerate(threads, 1)]
+        yield from singles[:1]
+        yield 'all', threads
+        yield from singles[1:]
+
+    def start(self):
+        """Start background synthesis for each candidate choice within the cost cap"""
+        if self.max_calls <= 0:
+            return self
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_calls, thread_name_prefix="speculative")
+        for choice_key, selected_threads in self._candidates():
+            if len(self.futures) >= self.max_calls:
+                break
+
+            synthesis_input = build_synthesis_input(
+                self.question, self.sources, self.threads_data, selected_threads
+            )
+            tokens = estimate_prompt_tokens(synthesis_input)
+            if self.estimated_tokens + tokens > self.token_budget:
+                continue
+
+            self.estimated_tokens += tokens
+            self.futures[choice_key] = self._executor.submit(self._synthesize, choice_key, synthesis_input)
+
+        logger.info("⚡ Speculating on %d choice(s) (~%d prompt tokens)", len(self.futures), self.estimated_tokens)
+        return self
+
+    def _synthesize(self, choice_key, synthesis_input):
+        response = self.client.inference(
+            function_name="synthesise_content",
+            input=build_inference_input(synthesis_input),
+            episode_id=self.episode_id,
+            tags={"speculative_choice": choice_key},
+        )
+        return inference_result(response)
+
+    def keep_only(self, choice_key):
+        """Cancel every speculation except the one for choice_key"""
+        for key, future in list(self.futures.items()):
+            if key != choice_key:
+                future.cancel()
+                del self.futures[key]
+
+    def take(self, choice_key):
+        """
+        Wait for the speculative result for choice_key
+
+        Returns:
+            dict: Same shape as stream_inference results, or None if that choice
+                was not speculated on or its call failed
+        """
+        self.keep_only(choice_key)
+        future = self.futures.pop(choice_key, None)
+        if future is None or future.cancelled():
+            return None
+        try:
+            return future.result()
+        except Exception as e:
+            logger.warning("❌ Speculative synthesis failed: %s", e)
+            return None
+
+    def discard(self):
+        """Drop all outstanding speculation; calls already in flight are left to finish and ignored"""
+        self.keep_only(None)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
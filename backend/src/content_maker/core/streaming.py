@@ -0,0 +1,226 @@
+"""
+Incremental JSON parsing for streamed inference output
+"""
+
+import io
+import json
+import sys
+
+WHITESPACE = ' \t\r\n'
+# What malformed output makes the parser raise; feed() absorbs them, close() raises JSONDecodeError
+PARSER_ERRORS = (ValueError, IndexError, KeyError)
+SCALAR_END = ',]}' + WHITESPACE
+
+
+class IncrementalJsonParser:
+    """
+    Parse a JSON document that arrives in arbitrary text fragments
+
+    Callbacks fire as soon as enough text has arrived:
+        on_value(path, value)          - a value (object, array, string or scalar) is complete
+        on_string(path, delta, done)   - new decoded text of a string value
+
+    Paths are tuples of object keys and array indices from the root,
+    e.g. ('threads', 0) or ('script', 'context_curiosity_gaps', 1).
+
+    Output that turns out not to be JSON (a ```json fence, a stray brace) sets
+    `failed`: callbacks stop, the text is still collected, and close() raises
+    json.JSONDecodeError as json.loads would.
+    """
+
+    def __init__(self, on_value=None, on_string=None):
+        self.on_value = on_value
+        self.on_string = on_string
+        self.failed = False
+        # Appends and slices are both linear in their own length, unlike str +=
+        self._buffer = io.StringIO()
+        self._length = 0
+        self._stack = []
+        self._string = None
+        self._scalar = None
+
+    @property
+    def text(self):
+        """All text fed so far"""
+        return self._buffer.getvalue()
+
+    def _slice(self, start, end):
+        self._buffer.seek(start)
+        return self._buffer.read(end - start)
+
+    def feed(self, fragment):
+        """Consume the next fragment of JSON text"""
+        offset = self._length
+        self._buffer.seek(offset)
+        self._buffer.write(fragment)
+        self._length += len(fragment)
+        if self.failed:
+            return
+        try:
+            self._parse(fragment, offset)
+        except PARSER_ERRORS:
+            self.failed = True
+
+    def _parse(self, fragment, offset):
+        for i, c in enumerate(fragment, offset):
+            if self._string is not None:
+                self._consume_string_char(c, i)
+                continue
+
+            if self._scalar is not None:
+                if c not in SCALAR_END:
+                    continue
+                self._finish_scalar(i)
+
+            if c in WHITESPACE:
+                continue
+            elif c == '{' or c == '[':
+                path = self._begin_value()
+                self._stack.append({
+                    'kind': 'object' if c == '{' else 'array',
+                    'path': path,
+                    'start': i,
+                    'key': None,
+                    'expect_key': c == '{',
+                    'count': 0,
+                })
+            elif c == '}' or c == ']':
+                frame = self._stack.pop()
+                self._emit_value(frame['path'], frame['start'], i + 1)
+            elif c == '"':
+                is_key = bool(self._stack) and self._stack[-1]['expect_key']
+                path = None if is_key else self._begin_value()
+                self._string = {
+                    'path': path,
+                    'is_key': is_key,
+                    'start': i,
+                    'emitted': i + 1,
+                    'escape': False,
+                    'unicode': 0,
+                }
+            elif c == ':':
+                self._stack[-1]['expect_key'] = False
+            elif c == ',':
+                if self._stack[-1]['kind'] == 'object':
+                    self._stack[-1]['expect_key'] = True
+            else:
+                self._scalar = {'path': self._begin_value(), 'start': i}
+
+        # Flush whatever part of an open string value can be decoded so far
+        if self._string is not None and not self._string['is_key']:
+            self._flush_string(self._length, done=False)
+
+    def close(self):
+        """
+        Finish parsing
+
+        Returns:
+            The fully parsed document (raises json.JSONDecodeError if incomplete)
+        """
+        if self._scalar is not None and not self.failed:
+            self._finish_scalar(self._length)
+        return json.loads(self.text)
+
+    def _begin_value(self):
+        """Return the path of a value that starts at the current position"""
+        if not self._stack:
+            return ()
+        frame = self._stack[-1]
+        if frame['kind'] == 'array':
+            frame['count'] += 1
+            return frame['path'] + (frame['count'] - 1,)
+        return frame['path'] + (frame['key'],)
+
+    def _consume_string_char(self, c, i):
+        state = self._string
+        if state['unicode']:
+            state['unicode'] -= 1
+        elif state['escape']:
+            state['escape'] = False
+            if c == 'u':
+                state['unicode'] = 4
+        elif c == '\\':
+            state['escape'] = True
+        elif c == '"':
+            if state['is_key']:
+                self._stack[-1]['key'] = json.loads(self._slice(state['start'], i + 1))
+            else:
+                self._flush_string(i, done=True)
+                self._emit_value(state['path'], state['start'], i + 1)
+            self._string = None
+
+    def _flush_string(self, end, done):
+        """Emit decoded string text between the last emitted position and end"""
+        state = self._string
+        if not done and (state['escape'] or state['unicode']):
+            # Hold back an escape sequence that has not fully arrived yet
+            end = state['emitted'] + self._slice(state['emitted'], end).rindex('\\')
+        if self.on_string and (end > state['emitted'] or done):
+            delta = json.loads('"' + self._slice(state['emitted'], end) + '"')
+            self.on_string(state['path'], delta, done)
+        state['emitted'] = max(state['emitted'], end)
+
+    def _finish_scalar(self, end):
+        state = self._scalar
+        self._scalar = None
+        self._emit_value(state['path'], state['start'], end)
+
+    def _emit_value(self, path, start, end):
+        if self.on_value:
+            self.on_value(path, json.loads(self._slice(start, end)))
+
+
+class ThreadPrinter:
+    """Print each thread from a streamed `thread_ideas` response as soon as it is complete"""
+
+    def __init__(self, out=None):
+        self.out = out or sys.stdout
+
+    def on_value(self, path, value):
+        if len(path) == 2 and path[0] == 'threads' and isinstance(value, dict):
+            print(f"{path[1] + 1}. {value.get('title', '')}", file=self.out)
+            print(f"   {value.get('insight', '')}", file=self.out)
+            print(file=self.out, flush=True)
+
+    def parser(self):
+        return IncrementalJsonParser(on_value=self.on_value)
+
+
+class ScriptPrinter:
+    """Print the text of a streamed `synthesise_content` response as it arrives"""
+
+    LABELS = {
+        ('title',): "Title",
+        ('viewer',): "Viewer",
+        ('script', 'hook'): "Hook",
+        ('script', 'context_curiosity_gaps'): "Context",
+        ('script', 'takeaway'): "Takeaway",
+        ('script', 'ending'): "Ending",
+        ('shotlist',): "Shot",
+    }
+
+    def __init__(self, out=None):
+        self.out = out or sys.stdout
+        self._current = None
+
+    def _label(self, path):
+        if path in self.LABELS:
+            return self.LABELS[path]
+        if path and isinstance(path[-1], int) and path[:-1] in self.LABELS:
+            return f"{self.LABELS[path[:-1]]} {path[-1] + 1}"
+        return None
+
+    def on_string(self, path, delta, done):
+        label = self._label(path)
+        if label is None:
+            return
+        if path != self._current:
+            self._current = path
+            print(f"{label}: ", end="", file=self.out)
+        print(delta, end="", file=self.out, flush=True)
+        if done:
+            print(file=self.out, flush=True)
+            self._current = None
+
+    def parser(self):
+        return IncrementalJsonParser(on_string=self.on_string)
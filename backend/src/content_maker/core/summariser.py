@@ -0,0 +1,138 @@
+"""
+Map-reduce summarisation of long sources before threading
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from .inference import async_inference, run_inference
+from .source import Source, source_payload
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIN_CHARS = 4000
+DEFAULT_MAX_WORKERS = 4
+
+
+def render_summary(source, parsed):
+    """Source contents made of the summary plus its verbatim quotes"""
+    title = source.get("source_title")
+    lines = [f"Summary of {title}:" if title else "Summary:", parsed["summary"]]
+    if parsed.get("key_quotes"):
+        lines.append("")
+        lines.append("Key quotes (verbatim):")
+        lines.extend(f'- "{quote}"' for quote in parsed["key_quotes"])
+    return "\n".join(lines)
+
+
+class SourceSummariser:
+    """
+    Replace each long source with a short summary and its key quotes
+
+    Sources shorter than min_chars pass through untouched. Summaries come from
+    the cheap `summarise_source` function; with an InferenceCache they are keyed
+    by the source's content, so each distinct source is summarised once.
+    """
+
+    def __init__(self, client, cache=None, min_chars=DEFAULT_MIN_CHARS, max_workers=DEFAULT_MAX_WORKERS):
+        self.client = client
+        self.cache = cache
+        self.min_chars = min_chars
+        self.max_workers = max_workers
+
+    def _needs_summary(self, source):
+        return len(source["contents"]) >= self.min_chars
+
+    def _arguments(self, source):
+        return source_payload(source)
+
+    def _apply(self, source, result):
+        if result is None or result["parsed"] is None:
+            return source
+        return Source.from_mapping(source).with_contents(render_summary(source, result["parsed"]))
+
+    def _report(self, sources, summarised):
+        before = sum(len(source["contents"]) for source in sources)
+        after = sum(len(source["contents"]) for source in summarised)
+        logger.info("🗜️  Summarised sources: %d → %d characters", before, after)
+
+    def _summarise_one(self, source):
+        try:
+            return run_inference(self.client, "summarise_source", self._arguments(source), cache=self.cache)
+        except Exception as e:
+            logger.warning("❌ Failed to summarise source, keeping full text: %s", e)
+            return None
+
+    def _summarise_batch(self, sources, executor):
+        long_sources = [source for source in sources if self._needs_summary(source)]
+        results = dict(zip(map(id, long_sources), executor.map(self._summarise_one, long_sources)))
+        return [self._apply(source, results.get(id(source))) for source in sources]
+
+    def summarise_sources(self, sources):
+        """
+        Summarise long sources in parallel on a thread pool
+
+        Returns:
+            list: Sources in the same order, long ones with summarised contents
+        """
+        long_sources = [source for source in sources if self._needs_summary(source)]
+        if not long_sources:
+            return list(sources)
+
+        logger.info("🗜️  Summarising %d long source(s)...", len(long_sources))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            summarised = self._summarise_batch(sources, executor)
+        self._report(sources, summarised)
+        return summarised
+
+    def iter_summarised(self, sources, batch_size=None):
+        """
+        Summarise a stream of sources a batch at a time
+
+        Only one batch (max_workers sources by default) is held at once, so
+        this works on a SourceSpill without loading it all.
+
+        Yields:
+            dict: Sources in the same order, long ones with summarised contents
+        """
+        batch_size = batch_size or self.max_workers
+        sources = iter(sources)
+        before = after = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                batch = list(islice(sources, batch_size))
+                if not batch:
+                    break
+                for source in self._summarise_batch(batch, executor):
+                    after += len(source["contents"])
+                    yield source
+                before += sum(len(source["contents"]) for source in batch)
+        logger.info("🗜️  Summarised sources: %d → %d characters", before, after)
+
+    async def async_summarise_sources(self, sources):
+        """Same as summarise_sources, for an AsyncTensorZeroGateway client"""
+        long_sources = [source for source in sources if self._needs_summary(source)]
+        if not long_sources:
+            return list(sources)
+
+        logger.info("🗜️  Summarising %d long source(s)...", len(long_sources))
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def summarise_one(source):
+            async with semaphore:
+                try:
+                    return await async_inference(
+                        self.client, "summarise_source", self._arguments(source), cache=self.cache
+                    )
+                except Exception as e:
+                    logger.warning("❌ Failed to summarise source, keeping full text: %s", e)
+                    return None
+
+        results = await asyncio.gather(*(summarise_one(source) for source in long_sources))
+        results = dict(zip(map(id, long_sources), results))
+
+        summarised = [self._apply(source, results.get(id(source))) for source in sources]
+        self._report(sources, summarised)
+        return summarised
@@ -0,0 +1,336 @@
+"""
+Watch the sources directory and process files as they are added or changed
+
+SourceWatcher reports debounced batches of changed files, using inotify on
+Linux and polling elsewhere. The watch command keeps a ProcessedSourceStore
+current from those batches and can keep threads warm for a standing question.
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import json
+import logging
+import os
+import select
+import struct
+import sys
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+from .inference import run_inference
+from .inference_cache import add_cache_arguments, cache_from_args
+from .instrumentation import add_instrumentation_arguments, instrumentation_from_args, span, tracer
+from .pipeline import build_sources
+from .replay import add_replay_arguments, image_gateway, open_gateway
+from .research import retrieve_chunks
+from .settings import CACHE_DIR
+from .source_store import ProcessedSourceStore
+from ..processors.image_processor import MultimodalImageProcessor
+from ..processors.source_detector import SmartSourceDetector
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEBOUNCE_S = 0.5
+DEFAULT_POLL_INTERVAL_S = 1.0
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+IGNORED_SUFFIXES = ('.tmp', '.swp', '.part', '~')
+
+
+def is_ignored(name):
+    """Hidden files and editor or download temporaries"""
+    return name.startswith('.') or name.endswith(IGNORED_SUFFIXES)
+
+
+class _Inotify:
+    """Minimal inotify binding over libc, for one directory"""
+
+    def __init__(self, directory):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+    def read(self, timeout):
+        """Names with events within timeout seconds (None waits indefinitely)"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        names = set()
+        offset = 0
+        while offset < len(data):
+            _, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if name:
+                names.add(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _Poller:
+    """Fallback that compares (size, mtime) snapshots of the directory"""
+
+    def __init__(self, directory, interval_s):
+        self.directory = Path(directory)
+        self.interval_s = interval_s
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return snapshot
+        for entry in entries:
+            try:
+                if entry.is_file():
+                    stat = entry.stat()
+                    snapshot[entry.name] = (stat.st_size, stat.st_mtime_ns)
+            except OSError:
+                continue
+        return snapshot
+
+    def read(self, timeout):
+        time.sleep(self.interval_s if timeout is None else min(timeout, self.interval_s))
+        current = self._scan()
+        changed = {name for name in current.keys() | self.snapshot.keys()
+                   if current.get(name) != self.snapshot.get(name)}
+        self.snapshot = current
+        return changed
+
+    def close(self):
+        pass
+
+
+class SourceWatcher:
+    """
+    Debounced change notifications for the files in one directory
+
+    Events for a file are gathered until the directory has been quiet for
+    debounce_s, so a file that is still being copied is reported once.
+    """
+
+    def __init__(self, directory, debounce_s=DEFAULT_DEBOUNCE_S, poll_interval_s=DEFAULT_POLL_INTERVAL_S,
+                 use_inotify=None):
+        self.directory = Path(directory)
+        self.debounce_s = debounce_s
+        if use_inotify is None:
+            use_inotify = sys.platform.startswith("linux")
+
+        self._backend = None
+        if use_inotify:
+            try:
+                self._backend = _Inotify(self.directory)
+                self.backend = "inotify"
+            except (OSError, AttributeError) as e:
+                logger.warning("⚠️  inotify unavailable (%s), polling instead", e)
+        if self._backend is None:
+            self._backend = _Poller(self.directory, poll_interval_s)
+            self.backend = "poll"
+
+    def changes(self, timeout=None):
+        """
+        Wait for the next batch of changes
+
+        Returns:
+            set: Paths of changed, added or removed files; empty if timeout passed first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        pending = set()
+        last_event = None
+        while True:
+            now = time.monotonic()
+            if pending:
+                quiet_for = now - last_event
+                if quiet_for >= self.debounce_s:
+                    return {self.directory / name for name in sorted(pending)}
+                wait = self.debounce_s - quiet_for
+            elif deadline is not None:
+                if now >= deadline:
+                    return set()
+                wait = deadline - now
+            else:
+                wait = None
+
+            names = {name for name in self._backend.read(wait) if not is_ignored(name)}
+            if names:
+                pending |= names
+                last_event = time.monotonic()
+
+    def close(self):
+        self._backend.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def apply_changes(store, paths):
+    """
+    Update the store for a batch of changed files
+
+    A file that fails to process (removed mid-read, unreadable, a detector
+    error) is logged and left as it was; the rest of the batch still applies.
+
+    Returns:
+        dict: {'added': [...], 'updated': [...], 'removed': [...], 'failed': [...], 'unchanged': int}
+    """
+    changes = {'added': [], 'updated': [], 'removed': [], 'failed': [], 'unchanged': 0}
+    for path in sorted(paths):
+        try:
+            outcome = store.update_file(path)
+        except Exception as e:
+            logger.warning("❌ Could not process %s: %s", path, e)
+            changes['failed'].append(str(path))
+            continue
+        if outcome == 'unchanged':
+            changes['unchanged'] += 1
+        else:
+            changes[outcome].append(str(path))
+    return changes
+
+
+def standing_question(sources_dir, question=None):
+    """The question to keep threads warm for: the given one, or the sources' input.json"""
+    if question:
+        return question
+    try:
+        with open(Path(sources_dir) / "input.json", "r", encoding="utf-8") as f:
+            return json.load(f)["content"]
+    except (OSError, json.JSONDecodeError, KeyError):
+        return None
+
+
+def warm_threads(client, store, question, cache=None, output_path=None):
+    """Thread the current sources for the standing question and save the result"""
+    sources = build_sources(retrieve_chunks(client, question, store.index))
+    result = run_inference(client, "thread_ideas", {"input": question, "sources": sources}, cache=cache)
+    if output_path:
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump({"question": question, "updated_at": time.time(), **result}, f, default=str)
+    return result
+
+
+def print_changes(changes, elapsed_s):
+    for kind, icon in (('added', '➕'), ('updated', '🔄'), ('removed', '➖')):
+        for path in changes[kind]:
+            print(f"{icon} {kind.capitalize()}: {Path(path).name}")
+    for path in changes['failed']:
+        logger.warning("❌ Failed: %s", Path(path).name)
+    print(f"⚡ Sources up to date in {elapsed_s:.2f}s")
+
+
+def watch(args):
+    """Process the sources directory, then keep it processed until interrupted"""
+    cache = cache_from_args(args)
+    threads_path = os.path.join(CACHE_DIR, "watch", "threads.json")
+
+    with image_gateway(args) as image_client, \
+            (open_gateway(args) if args.warm_threads else nullcontext(None)) as client:
+        detector = SmartSourceDetector(image_processor=MultimodalImageProcessor(client=image_client))
+        store = ProcessedSourceStore(detector, args.sources)
+
+        def refresh_threads():
+            question = standing_question(args.sources, args.question)
+            if client is None or question is None:
+                return
+            with span("stage.thread"):
+                result = warm_threads(client, store, question, cache, threads_path)
+            if result["parsed"] is not None:
+                print(f"🧵 Threads for the standing question ({threads_path}):")
+                for i, thread in enumerate(result["parsed"]["threads"], 1):
+                    print(f"   {i}. {thread['title']}")
+
+        started = time.perf_counter()
+        with span("stage.ingest"):
+            store.refresh()
+        print(f"📊 {len(store.entries)} file(s), {len(store.processed_sources())} source(s), "
+              f"{len(store.index)} chunk(s) in {time.perf_counter() - started:.2f}s")
+        refresh_threads()
+
+        with SourceWatcher(args.sources, args.debounce, args.poll_interval,
+                           use_inotify=False if args.poll else None) as watcher:
+            print(f"👀 Watching {args.sources} ({watcher.backend}), Ctrl+C to stop")
+            while True:
+                paths = watcher.changes()
+                started = time.perf_counter()
+                with span("stage.process", files=len(paths)):
+                    changes = apply_changes(store, paths)
+                if not (changes['added'] or changes['updated'] or changes['removed']):
+                    continue
+                print_changes(changes, time.perf_counter() - started)
+                try:
+                    refresh_threads()
+                except Exception as e:
+                    logger.warning("❌ Could not refresh threads: %s", e)
+
+
+def add_watch_arguments(parser):
+    """Add the watcher tuning options to an argparse parser"""
+    parser.add_argument(
+        "--debounce", type=float, default=DEFAULT_DEBOUNCE_S,
+        help=f"Seconds without file events before a batch is processed (default: {DEFAULT_DEBOUNCE_S})"
+    )
+    parser.add_argument("--poll", action="store_true", help="Poll for changes instead of using inotify")
+    parser.add_argument(
+        "--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL_S,
+        help=f"Seconds between polls (default: {DEFAULT_POLL_INTERVAL_S})"
+    )
+
+
+def main(argv=None):
+    """Command line entry point for watch mode"""
+    parser = argparse.ArgumentParser(description="Content Maker watch mode")
+    parser.add_argument("--sources", default="sources", help="Sources directory to watch")
+    parser.add_argument(
+        "--warm-threads", action="store_true",
+        help="Re-run thread_ideas for the standing question after every change"
+    )
+    parser.add_argument("--question", help="Standing question (default: the content of sources/input.json)")
+    add_watch_arguments(parser)
+    add_cache_arguments(parser)
+    add_replay_arguments(parser)
+    add_instrumentation_arguments(parser)
+    args = parser.parse_args(argv)
+    instrumentation_from_args(args)
+
+    try:
+        watch(args)
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+    finally:
+        if args.trace_dir:
+            tracer.export(args.trace_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,541 @@
+"""
+Bounded link-following crawl for hub and index pages
+
+WebCrawler starts from the URLs found in a source and follows links up to a
+maximum depth, within the seed's site and the include/exclude rules, until
+the run's page budget is spent. Links wait in a priority frontier scored by
+how well their anchor text matches the question, and pages are fetched in
+parallel by an AsyncFetcher. Canonical URLs of fetched pages go into a Bloom
+filter kept in the cache directory, next to a store of the parsed pages.
+A stored page is served from the store until it is max_age_s old; after that,
+and always for seed URLs, it is revalidated with its ETag/Last-Modified, so an
+unchanged page costs a 304 and an edited one is fetched again.
+"""
+
+import asyncio
+import hashlib
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import struct
+import time
+from itertools import count
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlunparse
+
+from ..core.instrumentation import span
+from ..core.retriever import query_terms
+from ..core.settings import CACHE_DIR
+from .web_scraper import USER_AGENT
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_DEPTH = 1
+DEFAULT_MAX_PAGES = 20
+DEFAULT_CONCURRENCY = 4
+DEFAULT_CAPACITY = 100_000
+DEFAULT_ERROR_RATE = 0.01
+# Stored pages younger than this are used without asking the site
+DEFAULT_MAX_AGE_S = 24 * 3600.0
+
+# Followed links lose a little priority per hop, so a strong match near the seed wins ties
+DEPTH_PENALTY = 0.1
+
+TRACKING_PARAMS = re.compile(r"^(utm_\w+|fbclid|gclid|mc_cid|mc_eid|ref)$")
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonical_url(url):
+    """
+    One spelling per page: lowercase scheme and host, no default port,
+    fragment or tracking parameters, and sorted query parameters
+    """
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or "").lower()
+    if parsed.port and parsed.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parsed.port}"
+    query = sorted((key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+                   if not TRACKING_PARAMS.match(key))
+    return urlunparse((scheme, host, parsed.path or "/", "", urlencode(query), ""))
+
+
+def site_of(url):
+    """Host without a leading www., which is what same-site rules compare"""
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class BloomFilter:
+    """
+    Fixed-size set of strings with no false negatives, saved to one file
+
+    Sized for capacity items at error_rate false positives. Membership of a
+    full filter only degrades its error rate, so it never needs resizing.
+    """
+
+    HEADER = struct.Struct("<4sIIQ")
+    MAGIC = b"BLM1"
+
+    def __init__(self, path=None, capacity=DEFAULT_CAPACITY, error_rate=DEFAULT_ERROR_RATE):
+        self.path = Path(path) if path else None
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.count = 0
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        if self.path is not None and self.path.exists():
+            self._load()
+
+    def _load(self):
+        data = self.path.read_bytes()
+        try:
+            magic, num_bits, num_hashes, count = self.HEADER.unpack_from(data)
+        except struct.error:
+            magic = None
+        if magic != self.MAGIC or len(data) != self.HEADER.size + (num_bits + 7) // 8:
+            logger.warning("⚠️  Ignoring unreadable crawl filter %s", self.path)
+            return
+        self.num_bits, self.num_hashes, self.count = num_bits, num_hashes, count
+        self.bits = bytearray(data[self.HEADER.size:])
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first, second = struct.unpack("<QQ", digest)
+        # Double hashing: k positions from two independent 64-bit hashes
+        return ((first + i * second) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, item):
+        added = False
+        for position in self._positions(item):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                self.bits[byte] |= 1 << bit
+                added = True
+        self.count += added
+        return added
+
+    def __contains__(self, item):
+        return all(self.bits[position // 8] & (1 << (position % 8)) for position in self._positions(item))
+
+    def __len__(self):
+        return self.count
+
+    def save(self):
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.num_bits, self.num_hashes, self.count))
+            f.write(self.bits)
+        os.replace(tmp_path, self.path)
+
+
+class PageStore:
+    """Parsed pages by canonical URL, one JSON file each"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def _path(self, key):
+        return self.directory / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.json"
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def put(self, key, page):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(page, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+class CrawlRules:
+    """Which links a crawl may follow"""
+
+    def __init__(self, max_depth=DEFAULT_MAX_DEPTH, max_pages=DEFAULT_MAX_PAGES, same_site=True,
+                 include=(), exclude=()):
+        """
+        Args:
+            max_depth (int): Hops from a seed URL (0 fetches only the seeds)
+            max_pages (int): Followed pages per run, across every seed
+            same_site (bool): Only follow links on the seed's site
+            include (list): Regexes; when given, a followed URL must match one
+            exclude (list): Regexes; a URL matching any is never followed
+        """
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.same_site = same_site
+        self.include = [re.compile(pattern) for pattern in include]
+        self.exclude = [re.compile(pattern) for pattern in exclude]
+
+    def allows(self, url, seed_site, depth):
+        if depth > self.max_depth:
+            return False
+        if urlparse(url).scheme not in ("http", "https"):
+            return False
+        if self.same_site and site_of(url) != seed_site:
+            return False
+        if self.include and not any(pattern.search(url) for pattern in self.include):
+            return False
+        return not any(pattern.search(url) for pattern in self.exclude)
+
+
+class Frontier:
+    """Links waiting to be fetched, best anchor-text match first"""
+
+    def __init__(self, question=None):
+        self.question_terms = query_terms(question or "")
+        self._heap = []
+        self._order = count()
+
+    def score(self, anchor, url, depth):
+        """Share of the question's terms in the link's anchor text and URL path"""
+        if not self.question_terms:
+            return -DEPTH_PENALTY * depth
+        matched = self.question_terms & (query_terms(anchor) | query_terms(urlparse(url).path))
+        return len(matched) / len(self.question_terms) - DEPTH_PENALTY * depth
+
+    def push(self, url, depth, seed_site, anchor="", score=None):
+        if score is None:
+            score = self.score(anchor, url, depth)
+        order = next(self._order)
+        heapq.heappush(self._heap, (-score, order, url, depth, seed_site))
+        return order
+
+    def pop(self):
+        """(order, url, depth, seed_site) of the best link"""
+        _, order, url, depth, seed_site = heapq.heappop(self._heap)
+        return order, url, depth, seed_site
+
+    def __len__(self):
+        return len(self._heap)
+
+
+class AsyncFetcher:
+    """Shared httpx client with bounded concurrency and retries"""
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, timeout=15, max_retries=2, delay=1, user_agent=None):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.delay = delay
+        self.user_agent = user_agent
+        self._client = None
+
+    async def __aenter__(self):
+        # Imported here so runs that never crawl don't load httpx
+        import httpx
+        headers = {"User-Agent": self.user_agent} if self.user_agent else {}
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout, follow_redirects=True, headers=headers,
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._client.aclose()
+        self._client = None
+
+    async def fetch(self, url, headers=None):
+        """
+        GET a URL, retrying transport errors
+
+        Args:
+            headers (dict): Extra request headers, e.g. If-None-Match to revalidate a stored copy
+
+        Returns:
+            dict: {'url': final URL, 'status_code' (200 or 304), 'content_type', 'content': bytes,
+                   'etag', 'last_modified'}
+        """
+        import httpx
+        for attempt in range(self.max_retries):
+            try:
+                response = await self._client.get(url, headers=headers)
+                if response.status_code != 304:
+                    response.raise_for_status()
+                return {
+                    'url': str(response.url),
+                    'status_code': response.status_code,
+                    'content_type': response.headers.get("content-type", ""),
+                    'content': response.content,
+                    'etag': response.headers.get("etag"),
+                    'last_modified': response.headers.get("last-modified"),
+                }
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                # Client errors (404, 403...) will not change on a retry
+                client_error = isinstance(e, httpx.HTTPStatusError) and e.response.status_code < 500
+                if client_error or attempt == self.max_retries - 1:
+                    raise
+                await asyncio.sleep(self.delay * (attempt + 1))
+
+
+class WebCrawler:
+    """
+    Crawl outward from seed URLs within CrawlRules, fetching each page once
+
+    The page budget is shared by every crawl() in the run and covers followed
+    pages only; the seed URLs themselves are always fetched (or revalidated).
+    """
+
+    def __init__(self, scraper=None, rules=None, question=None, concurrency=DEFAULT_CONCURRENCY,
+                 cache_dir=None, fetcher=None, budget=None, seen=None, max_age_s=DEFAULT_MAX_AGE_S):
+        """
+        Args:
+            scraper (WebScraper): Supplies the title/content extraction (defaults to a new one)
+            rules (CrawlRules): Depth, site, include/exclude and budget rules
+            question (str): Anchor text relevant to it is followed first
+            concurrency (int): Pages fetched at once
+            cache_dir (str): Where the seen-URL filter and page store live
+            fetcher (AsyncFetcher): Fetcher to use (defaults to one built from the scraper's settings)
+            budget (callable): Returns True while one more followed page may be fetched; for a
+                               budget shared beyond this crawler (defaults to rules.max_pages)
+            seen: Set of stored canonical URLs with add() and save() (defaults to a Bloom
+                  filter in cache_dir)
+            max_age_s (float): How long a stored followed page is used before it is revalidated
+        """
+        if scraper is None:
+            from .web_scraper import WebScraper
+            scraper = WebScraper()
+        self.scraper = scraper
+        self.rules = rules or CrawlRules()
+        self.question = question
+        self.fetcher = fetcher or AsyncFetcher(
+            concurrency, scraper.timeout, scraper.max_retries, scraper.delay, USER_AGENT
+        )
+        cache_dir = Path(cache_dir or os.path.join(CACHE_DIR, "crawl"))
+        self.seen = BloomFilter(cache_dir / "seen.bloom") if seen is None else seen
+        self.pages = PageStore(cache_dir / "pages")
+        self.budget = budget
+        self.max_age_s = max_age_s
+        self.pages_followed = 0
+        self.stats = {"fetched": 0, "from_store": 0, "not_modified": 0, "failed": 0, "skipped": 0}
+
+    def crawl_sync(self, urls):
+        """crawl() for synchronous callers (the detector runs in a thread of its own)"""
+        return asyncio.run(self.crawl(urls))
+
+    async def crawl(self, urls):
+        """
+        Fetch the seed URLs and the links worth following from them
+
+        Returns:
+            list: Page dicts shaped like WebScraper.scrape_webpage() results, plus
+                  'depth'; seeds first, then followed pages in discovery order.
+                  Failed seeds are included with their error; failed followed
+                  pages are left out.
+        """
+        frontier = Frontier(self.question)
+        queued = set()
+        for url in urls:
+            key = canonical_url(url)
+            if key not in queued:
+                queued.add(key)
+                frontier.push(url, 0, site_of(url), score=math.inf)
+
+        pages = []
+        in_flight = set()
+        async with self.fetcher:
+            while frontier or in_flight:
+                while frontier and len(in_flight) < self.fetcher.concurrency:
+                    order, url, depth, seed_site = frontier.pop()
+                    if depth > 0:
+                        if not self._take_page():
+                            self.stats["skipped"] += 1
+                            continue
+                        self.pages_followed += 1
+                    in_flight.add(asyncio.create_task(self._visit(order, url, depth, seed_site)))
+                if not in_flight:
+                    break
+
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    order, depth, seed_site, page, links = task.result()
+                    if page is not None:
+                        pages.append((order, page))
+                    for link, anchor in links:
+                        key = canonical_url(link)
+                        if key in queued or not self.rules.allows(key, seed_site, depth + 1):
+                            continue
+                        queued.add(key)
+                        frontier.push(link, depth + 1, seed_site, anchor)
+        self.seen.save()
+
+        logger.info("🕸️  Crawled %d page(s): %s", len(pages), self.stats)
+        return [page for _, page in sorted(pages, key=lambda item: item[0])]
+
+    def _take_page(self):
+        if self.budget is not None:
+            return self.budget()
+        return self.pages_followed < self.rules.max_pages
+
+    async def _visit(self, order, url, depth, seed_site):
+        """(order, depth, seed_site, page or None, [(link, anchor text)]) for one frontier entry"""
+        try:
+            page, links = await self._visit_page(url, depth)
+        except Exception as e:
+            # One unparseable page or full disk must not end the crawl
+            self.stats["failed"] += 1
+            logger.warning("❌ Crawl failed for %s: %s", url, e)
+            page, links = (self._failure(url, e) if depth == 0 else None), []
+        return order, depth, seed_site, page, links
+
+    async def _visit_page(self, url, depth):
+        key = canonical_url(url)
+        # The filter answers "definitely new" without touching the store
+        stored = self.pages.get(key) if key in self.seen else None
+        # Seeds are what the user linked to, so they are always checked for changes
+        if stored is not None and depth > 0 and time.time() - stored.get('fetched_at', 0) < self.max_age_s:
+            self.stats["from_store"] += 1
+            return self._stored_page(stored, depth)
+
+        headers = {}
+        if stored and stored.get('etag'):
+            headers["If-None-Match"] = stored['etag']
+        if stored and stored.get('last_modified'):
+            headers["If-Modified-Since"] = stored['last_modified']
+        with span("fetch", url=url, depth=depth, crawl=True) as fetch_span:
+            try:
+                response = await self.fetcher.fetch(url, headers)
+            except Exception as e:
+                self.stats["failed"] += 1
+                fetch_span.status = "error"
+                logger.warning("❌ Crawl fetch failed for %s: %s", url, e)
+                return (self._failure(url, e) if depth == 0 else None), []
+            fetch_span.set(bytes=len(response['content']), http_status=response['status_code'])
+
+        if response['status_code'] == 304 and stored is not None:
+            self.stats["not_modified"] += 1
+            self.pages.put(key, {**stored, 'fetched_at': time.time()})
+            return self._stored_page(stored, depth)
+        if depth > 0 and "html" not in response['content_type']:
+            return None, []
+
+        # Parsing is CPU work; keep it off the event loop so other fetches progress
+        page, links = await asyncio.to_thread(self._parse, url, response['content'])
+        self.stats["fetched"] += 1
+        record = {**page, 'links': links, 'fetched_at': time.time(),
+                  'etag': response['etag'], 'last_modified': response['last_modified']}
+        # Stored under the redirect target too, so links to either spelling hit the store
+        for stored_key in {key, canonical_url(response['url'])}:
+            self.pages.put(stored_key, record)
+            self.seen.add(stored_key)
+        return {**page, 'depth': depth}, links
+
+    @staticmethod
+    def _stored_page(stored, depth):
+        """(page, links) from a page store record"""
+        page = {name: value for name, value in stored.items()
+                if name not in ('links', 'fetched_at', 'etag', 'last_modified')}
+        return {**page, 'depth': depth}, stored.get('links', [])
+
+    def _parse(self, url, content):
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(content, 'html.parser')
+        # Links first: main-content extraction drops the nav and asides that hubs link from
+        links = extract_links(soup, url)
+        page = {
+            'url': url,
+            'title': self.scraper._extract_title(soup),
+            'description': self.scraper._extract_description(soup),
+            'content': self.scraper._clean_content(self.scraper._extract_main_content(soup)),
+            'status': 'success',
+        }
+        return page, links
+
+    @staticmethod
+    def _failure(url, error):
+        import httpx
+        timeout = isinstance(error, httpx.TimeoutException)
+        return {
+            'url': url,
+            'title': 'Connection Timeout' if timeout else 'Scraping Failed',
+            'description': f'Failed to scrape: {error}',
+            'content': f'[Webpage scraping failed: {url}]\n\nError: {error}',
+            'status': 'timeout' if timeout else 'error',
+            'error': str(error),
+            'depth': 0,
+        }
+
+
+def extract_links(soup, base_url):
+    """[(absolute URL, anchor text)] for a page's http(s) links, first occurrence of each"""
+    links = {}
+    for anchor in soup.select("a[href]"):
+        url = urljoin(base_url, anchor["href"]).split("#")[0]
+        if urlparse(url).scheme not in ("http", "https") or url in links:
+            continue
+        links[url] = anchor.get_text(" ", strip=True) or anchor.get("title", "")
+    return list(links.items())
+
+
+def add_crawl_arguments(parser):
+    """Add the crawl options to an argparse parser"""
+    parser.add_argument(
+        "--crawl", action="store_true",
+        help="Follow links from webpage sources (hub and index pages) instead of fetching only the linked URLs"
+    )
+    parser.add_argument(
+        "--crawl-depth", type=int, default=DEFAULT_MAX_DEPTH,
+        help=f"Link hops to follow from each source URL (default: {DEFAULT_MAX_DEPTH})"
+    )
+    parser.add_argument(
+        "--crawl-pages", type=int, default=DEFAULT_MAX_PAGES,
+        help=f"Followed pages per run, across all sources (default: {DEFAULT_MAX_PAGES})"
+    )
+    parser.add_argument(
+        "--crawl-concurrency", type=int, default=DEFAULT_CONCURRENCY,
+        help=f"Pages fetched at once while crawling (default: {DEFAULT_CONCURRENCY})"
+    )
+    parser.add_argument(
+        "--crawl-max-age", type=float, default=DEFAULT_MAX_AGE_S / 3600, metavar="HOURS",
+        help=f"Use stored copies of followed pages this recent without revalidating them "
+             f"(default: {DEFAULT_MAX_AGE_S / 3600:g})"
+    )
+    parser.add_argument(
+        "--crawl-any-site", action="store_true",
+        help="Also follow links that leave the source URL's site"
+    )
+    parser.add_argument(
+        "--crawl-include", action="append", default=[], metavar="REGEX",
+        help="Only follow URLs matching this pattern (repeatable)"
+    )
+    parser.add_argument(
+        "--crawl-exclude", action="append", default=[], metavar="REGEX",
+        help="Never follow URLs matching this pattern (repeatable)"
+    )
+
+
+def crawl_options(args):
+    """The crawl options that change processed sources, for checkpoint fingerprints"""
+    if not getattr(args, "crawl", False):
+        return {}
+    return {"crawl": {
+        "depth": args.crawl_depth, "pages": args.crawl_pages, "same_site": not args.crawl_any_site,
+        "include": args.crawl_include, "exclude": args.crawl_exclude,
+        "max_age_s": args.crawl_max_age * 3600,
+    }}
+
+
+def crawler_from_options(options, question=None, concurrency=DEFAULT_CONCURRENCY, **crawler_args):
+    """Build the WebCrawler for crawl_options() (as stored with queued jobs), or None if crawling is off"""
+    crawl = options.get("crawl")
+    if not crawl:
+        return None
+    rules = CrawlRules(crawl["depth"], crawl["pages"], crawl["same_site"], crawl["include"], crawl["exclude"])
+    max_age_s = crawl.get("max_age_s", DEFAULT_MAX_AGE_S)
+    return WebCrawler(rules=rules, question=question, concurrency=concurrency, max_age_s=max_age_s, **crawler_args)
+
+
+def crawler_from_args(args, question=None):
+    """Build the WebCrawler selected by command line options, or None if crawling is off"""
+    return crawler_from_options(crawl_options(args), question, getattr(args, "crawl_concurrency", DEFAULT_CONCURRENCY))
@@ -4,20 +4,65 @@ Smart Source Detection and Processing System
 Automatically detects and processes different types of sources
 """
 
-import re
 import json
+import logging
 import os
 import mimetypes
 from pathlib import Path
-from tensorzero import TensorZeroGateway
-from .web_scraper import WebScraper
-from .image_processor import MultimodalImageProcessor
+from ..core.instrumentation import span
+from ..core.source import Source
+from .urls import scan_file, scan_urls
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_DOCS_BASE_URL = "https://docs.google.com"
 
 class SmartSourceDetector:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, web_scraper=None, image_processor=None, docs_base_url=None, crawler=None,
+                 docs_fetcher=None):
+        """
+        Args:
+            api_key (str): Google API key (defaults to $GOOGLE_API_KEY)
+            web_scraper (WebScraper): Scraper to use (defaults to a new one)
+            image_processor (MultimodalImageProcessor): Image processor to use (defaults to a new one)
+            docs_base_url (str): Where Google Docs exports are fetched from (defaults to docs.google.com)
+            crawler (WebCrawler): Follow links from webpage URLs with this crawler instead of
+                                  fetching only the URLs themselves
+            docs_fetcher (GoogleDocsFetcher): Fetcher for Google Docs exports (defaults to one for
+                                              docs_base_url and api_key)
+        """
         self.api_key = api_key or os.getenv('GOOGLE_API_KEY')
-        self.web_scraper = WebScraper()
-        self.image_processor = MultimodalImageProcessor()
+        self._web_scraper = web_scraper
+        self._image_processor = image_processor
+        self.docs_base_url = (docs_base_url or GOOGLE_DOCS_BASE_URL).rstrip('/')
+        self.crawler = crawler
+        self._docs_fetcher = docs_fetcher
+        # Google Docs exported ahead of processing by iter_sources_directory, by URL
+        self._prefetched_docs = {}
+
+    # Processors (and their dependencies) are only loaded once a source needs them
+    @property
+    def web_scraper(self):
+        if self._web_scraper is None:
+            from .web_scraper import WebScraper
+            self._web_scraper = WebScraper()
+        return self._web_scraper
+
+    @property
+    def docs_fetcher(self):
+        if self._docs_fetcher is None:
+            from .google_docs import GoogleDocsFetcher
+            self._docs_fetcher = GoogleDocsFetcher(
+                self.docs_base_url, self.api_key, extract_text=self._extract_text_from_doc
+            )
+        return self._docs_fetcher
+
+    @property
+    def image_processor(self):
+        if self._image_processor is None:
+            from .image_processor import MultimodalImageProcessor
+            self._image_processor = MultimodalImageProcessor()
+        return self._image_processor
         
     def detect_source_type(self, source_path):
         """
@@ -27,7 +72,8 @@ class SmartSourceDetector:
             dict: {
                 'type': 'image'|'google_docs'|'webpage'|'text'|'unknown',
                 'path': str,
-                'content': str (if applicable),
+                'content': str (if applicable; None for .txt/.md/.rst files, which
+                           are read when processed rather than held from detection),
                 'metadata': dict
             }
         """
@@ -59,16 +105,17 @@ class SmartSourceDetector:
                     
                     # Check if it contains a Google Docs URL
                     content = data.get('content', '')
-                    google_docs_urls = self._find_google_docs_urls(content)
+                    urls = scan_urls(content)
                     
-                    if google_docs_urls:
+                    if urls.google_docs_urls:
                         return {
                             'type': 'google_docs',
                             'path': str(source_path),
                             'content': content,
                             'metadata': {
                                 'file_type': 'json',
-                                'google_docs_urls': google_docs_urls,
+                                'google_docs_urls': urls.google_docs_urls,
+                                'webpage_urls': urls.webpage_urls,
                                 'filename': source_path.name
                             }
                         }
@@ -79,6 +126,7 @@ class SmartSourceDetector:
                             'content': content,
                             'metadata': {
                                 'file_type': 'json',
+                                'webpage_urls': urls.webpage_urls,
                                 'filename': source_path.name
                             }
                         }
@@ -97,32 +145,32 @@ class SmartSourceDetector:
             # Text file detection
             elif ext in ['.txt', '.md', '.rst']:
                 try:
-                    with open(source_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    
-                    # Check for URLs in text
-                    google_docs_urls = self._find_google_docs_urls(content)
-                    webpage_urls = self._find_webpage_urls(content)
+                    # Read in blocks, finding both kinds of URL in the same pass; the
+                    # lists travel in metadata so processing never scans the text again,
+                    # and the text itself is read only when the source is processed
+                    urls = scan_file(source_path)
+                    content = None
                     
-                    if google_docs_urls:
+                    if urls.google_docs_urls:
                         return {
                             'type': 'google_docs',
                             'path': str(source_path),
                             'content': content,
                             'metadata': {
                                 'file_type': 'text',
-                                'google_docs_urls': google_docs_urls,
+                                'google_docs_urls': urls.google_docs_urls,
+                                'webpage_urls': urls.webpage_urls,
                                 'filename': source_path.name
                             }
                         }
-                    elif webpage_urls:
+                    elif urls.webpage_urls:
                         return {
                             'type': 'webpage',
                             'path': str(source_path),
                             'content': content,
                             'metadata': {
                                 'file_type': 'text',
-                                'webpage_urls': webpage_urls,
+                                'webpage_urls': urls.webpage_urls,
                                 'filename': source_path.name
                             }
                         }
@@ -133,6 +181,7 @@ class SmartSourceDetector:
                             'content': content,
                             'metadata': {
                                 'file_type': 'text',
+                                'webpage_urls': [],
                                 'filename': source_path.name
                             }
                         }
@@ -175,260 +224,262 @@ class SmartSourceDetector:
     
     def _find_google_docs_urls(self, text):
         """Find Google Docs URLs in text"""
-        pattern = r'https://docs\.google\.com/document/d/[a-zA-Z0-9_-]+'
-        return re.findall(pattern, text)
+        return scan_urls(text).google_docs_urls
     
     def _find_webpage_urls(self, text):
         """Find general webpage URLs in text"""
-        pattern = r'https?://[^\s]+'
-        urls = re.findall(pattern, text)
-        # Filter out Google Docs URLs
-        return [url for url in urls if 'docs.google.com' not in url]
+        return scan_urls(text).webpage_urls
+
+    def _text_webpage_urls(self, source_info):
+        """Webpage URLs found at detection, scanning only sources built without detect_source_type"""
+        webpage_urls = source_info['metadata'].get('webpage_urls')
+        if webpage_urls is None:
+            webpage_urls = scan_urls(self.source_content(source_info)).webpage_urls
+        return webpage_urls
+
+    def source_content(self, source_info):
+        """A source's text: as detected, or read from its file for text files detection only scanned"""
+        if source_info.get('content') is not None:
+            return source_info['content']
+        with open(source_info['path'], 'r', encoding='utf-8') as f:
+            return f.read()
     
-    def process_source(self, source_info):
+    def process_source(self, source_info, fetch_urls=True):
         """
         Process a source based on its detected type
         
         Args:
             source_info (dict): Source information from detect_source_type
+            fetch_urls (bool): Also fetch the Google Docs and webpages it links to; when
+                               False, the caller fetches source_urls() with process_url()
+                               and puts those sources ahead of these
             
         Returns:
             list: List of processed source objects for the main workflow
         """
+        with span("process_source", type=source_info['type'],
+                  file=source_info['metadata'].get('filename')) as source_span:
+            processed_sources = self._process_source(source_info, fetch_urls)
+            source_span.set(chars=sum(len(source['contents']) for source in processed_sources))
+            return processed_sources
+
+    def _process_source(self, source_info, fetch_urls=True):
         source_type = source_info['type']
+        content = self.source_content(source_info)
         processed_sources = []
         
         if source_type == 'google_docs':
             # Processing Google Docs source
             urls = source_info['metadata']['google_docs_urls']
             
-            for url in urls:
-                extracted_content = self._extract_google_doc_content(url)
-                if extracted_content:
-                    processed_sources.append(extracted_content)
+            if fetch_urls:
+                # The file's docs are exported together, in parallel
+                processed_sources.extend(self._google_doc_sources(urls))
             
             # Also keep the original source if it has other content
-            if source_info['content'] and not all(url in source_info['content'] for url in urls):
-                processed_sources.append({
-                    "type": "text",
-                    "contents": source_info['content']
-                })
+            if content and not all(url in content for url in urls):
+                processed_sources.append(Source(
+                    type="text",
+                    contents=content
+                ))
         
         elif source_type == 'image':
-            print(f"🖼️  Processing image source: {source_info['metadata']['filename']}")
+            logger.info("🖼️  Processing image source: %s", source_info['metadata']['filename'])
             
             # Use multimodal AI to analyze the image
             image_path = source_info['path']
             analysis_result = self.image_processor.process_image(image_path)
             
             if analysis_result['status'] == 'success':
-                processed_sources.append({
-                    "type": "text",
-                    "contents": analysis_result['content'],
-                    "source_url": f"file://{image_path}",
-                    "source_title": f"Image Analysis: {analysis_result['filename']}"
-                })
+                processed_sources.append(Source(
+                    type="text",
+                    contents=analysis_result['content'],
+                    source_url=f"file://{image_path}",
+                    source_title=f"Image Analysis: {analysis_result['filename']}"
+                ))
             else:
                 # Fallback to basic reference if analysis fails
-                processed_sources.append({
-                    "type": "text",
-                    "contents": f"Image reference: {source_info['content']} (Analysis failed: {analysis_result.get('error', 'Unknown error')})"
-                })
+                processed_sources.append(Source(
+                    type="text",
+                    contents=f"Image reference: {content} (Analysis failed: {analysis_result.get('error', 'Unknown error')})"
+                ))
         
         elif source_type == 'webpage':
-            print(f"🌐 Processing webpage source: {source_info['metadata']['filename']}")
+            logger.info("🌐 Processing webpage source: %s", source_info['metadata']['filename'])
             
             # Extract and scrape webpage URLs
             webpage_urls = source_info['metadata'].get('webpage_urls', [])
-            if webpage_urls:
-                print(f"🔍 Found {len(webpage_urls)} webpage URL(s) to scrape")
+            if webpage_urls and fetch_urls:
+                logger.info("🔍 Found %d webpage URL(s) to scrape", len(webpage_urls))
                 
-                for url in webpage_urls:
-                    scraped_result = self.web_scraper.scrape_webpage(url)
-                    
-                    if scraped_result['status'] == 'success':
-                        processed_sources.append({
-                            "type": "text",
-                            "contents": f"Title: {scraped_result['title']}\n\n{scraped_result['content']}",
-                            "source_url": url,
-                            "source_title": scraped_result['title']
-                        })
-                    else:
-                        # Add placeholder for failed scraping with helpful context
-                        error_status = scraped_result.get('status', 'error')
-                        error_message = scraped_result.get('error', 'Unknown error')
-                        
-                        if error_status == 'timeout':
-                            processed_sources.append({
-                                "type": "text",
-                                "contents": f"[Webpage scraping failed due to timeout: {url}]\n\nThis appears to be a paywalled or protected content source. The Financial Times and similar news sites often block automated scrapers.\n\nConsider:\n1. Manually copying the relevant content from the article\n2. Using alternative sources for the same information\n3. Checking if the content is available on a different platform\n\nOriginal URL: {url}",
-                                "source_url": url,
-                                "source_title": "Scraping Failed - Timeout"
-                            })
-                        else:
-                            processed_sources.append({
-                                "type": "text",
-                                "contents": f"[Webpage scraping failed: {url}]\n\nError: {error_message}\n\nThis URL could not be automatically scraped. Consider manually extracting the relevant content or finding alternative sources.",
-                                "source_url": url,
-                                "source_title": "Scraping Failed"
-                            })
+                processed_sources.extend(self._scrape_sources(webpage_urls))
             
             # Also keep the original source content if it has other text
-            if source_info['content'] and not all(url in source_info['content'] for url in webpage_urls):
-                processed_sources.append({
-                    "type": "text",
-                    "contents": source_info['content']
-                })
+            if content and not all(url in content for url in webpage_urls):
+                processed_sources.append(Source(
+                    type="text",
+                    contents=content
+                ))
         
         elif source_type == 'text':
-            print(f"📝 Processing text source: {source_info['metadata']['filename']}")
+            logger.info("📝 Processing text source: %s", source_info['metadata']['filename'])
             
             # Check if text contains webpage URLs
-            webpage_urls = self.web_scraper.extract_webpage_urls(source_info['content'])
-            if webpage_urls:
-                print(f"🔍 Found {len(webpage_urls)} webpage URL(s) in text content")
+            webpage_urls = self._text_webpage_urls(source_info)
+            if webpage_urls and fetch_urls:
+                logger.info("🔍 Found %d webpage URL(s) in text content", len(webpage_urls))
                 
-                for url in webpage_urls:
-                    scraped_result = self.web_scraper.scrape_webpage(url)
-                    
-                    if scraped_result['status'] == 'success':
-                        processed_sources.append({
-                            "type": "text",
-                            "contents": f"Title: {scraped_result['title']}\n\n{scraped_result['content']}",
-                            "source_url": url,
-                            "source_title": scraped_result['title']
-                        })
-                    else:
-                        # Add placeholder for failed scraping with helpful context
-                        error_status = scraped_result.get('status', 'error')
-                        error_message = scraped_result.get('error', 'Unknown error')
-                        
-                        if error_status == 'timeout':
-                            processed_sources.append({
-                                "type": "text",
-                                "contents": f"[Webpage scraping failed due to timeout: {url}]\n\nThis appears to be a paywalled or protected content source. The Financial Times and similar news sites often block automated scrapers.\n\nConsider:\n1. Manually copying the relevant content from the article\n2. Using alternative sources for the same information\n3. Checking if the content is available on a different platform\n\nOriginal URL: {url}",
-                                "source_url": url,
-                                "source_title": "Scraping Failed - Timeout"
-                            })
-                        else:
-                            processed_sources.append({
-                                "type": "text",
-                                "contents": f"[Webpage scraping failed: {url}]\n\nError: {error_message}\n\nThis URL could not be automatically scraped. Consider manually extracting the relevant content or finding alternative sources.",
-                                "source_url": url,
-                                "source_title": "Scraping Failed"
-                            })
+                processed_sources.extend(self._scrape_sources(webpage_urls))
             
             # Always add the original text content
-            processed_sources.append({
-                "type": "text",
-                "contents": source_info['content']
-            })
+            processed_sources.append(Source(
+                type="text",
+                contents=content
+            ))
         
         else:
             # Processing unknown source
-            processed_sources.append({
-                "type": "text",
-                "contents": source_info['content']
-            })
+            processed_sources.append(Source(
+                type="text",
+                contents=content
+            ))
         
         return processed_sources
     
+    def source_urls(self, source_info):
+        """
+        The URLs process_source() would fetch for a source
+
+        Returns:
+            list: (kind, url) pairs, kind being 'google_doc' or 'webpage'
+        """
+        if source_info['type'] == 'google_docs':
+            return [('google_doc', url) for url in source_info['metadata']['google_docs_urls']]
+        if source_info['type'] == 'webpage':
+            return [('webpage', url) for url in source_info['metadata'].get('webpage_urls', [])]
+        if source_info['type'] == 'text':
+            return [('webpage', url) for url in self._text_webpage_urls(source_info)]
+        return []
+
+    def process_url(self, kind, url):
+        """Sources for one URL from source_urls()"""
+        if kind == 'google_doc':
+            extracted_content = self._extract_google_doc_content(url)
+            return [extracted_content] if extracted_content else []
+        return self._scrape_sources([url])
+    
+    def _scrape_sources(self, urls):
+        """Sources for webpage URLs: one per page, or a placeholder for a failed fetch"""
+        if self.crawler is not None:
+            # Crawling also follows links from the pages and fetches in parallel
+            results = self.crawler.crawl_sync(urls)
+        else:
+            results = (self.web_scraper.scrape_webpage(url) for url in urls)
+
+        processed_sources = []
+        for scraped_result in results:
+            url = scraped_result['url']
+            
+            if scraped_result['status'] == 'success':
+                processed_sources.append(Source(
+                    type="text",
+                    contents=f"Title: {scraped_result['title']}\n\n{scraped_result['content']}",
+                    source_url=url,
+                    source_title=scraped_result['title']
+                ))
+            else:
+                # Add placeholder for failed scraping with helpful context
+                error_status = scraped_result.get('status', 'error')
+                error_message = scraped_result.get('error', 'Unknown error')
+                
+                if error_status == 'timeout':
+                    processed_sources.append(Source(
+                        type="text",
+                        contents=f"[Webpage scraping failed due to timeout: {url}]\n\nThis appears to be a paywalled or protected content source. The Financial Times and similar news sites often block automated scrapers.\n\nConsider:\n1. Manually copying the relevant content from the article\n2. Using alternative sources for the same information\n3. Checking if the content is available on a different platform\n\nOriginal URL: {url}",
+                        source_url=url,
+                        source_title="Scraping Failed - Timeout"
+                    ))
+                else:
+                    processed_sources.append(Source(
+                        type="text",
+                        contents=f"[Webpage scraping failed: {url}]\n\nError: {error_message}\n\nThis URL could not be automatically scraped. Consider manually extracting the relevant content or finding alternative sources.",
+                        source_url=url,
+                        source_title="Scraping Failed"
+                    ))
+        return processed_sources
+    
     def _extract_google_doc_content(self, google_doc_url):
         """Extract content from a publicly accessible Google Doc"""
-        # Extracting content from Google Doc
-        
+        sources = self._google_doc_sources([google_doc_url])
+        return sources[0] if sources else None
+
+    def prefetch_google_docs(self, urls):
+        """Export Google Docs concurrently ahead of processing the sources that link them"""
+        urls = [url for url in dict.fromkeys(urls) if url not in self._prefetched_docs]
+        if not urls:
+            return
         try:
-            # Extract document ID from URL
-            doc_id = self._extract_doc_id(google_doc_url)
-            if not doc_id:
-                print(f"❌ Could not extract document ID from URL: {google_doc_url}")
-                return None
-            
-            # Try to extract from public Google Doc
-            import requests
-            from bs4 import BeautifulSoup
-            
-            # Try different export formats
-            export_urls = [
-                f"https://docs.google.com/document/d/{doc_id}/export?format=txt",
-                f"https://docs.google.com/document/d/{doc_id}/export?format=html",
-            ]
-            
-            for export_url in export_urls:
-                try:
-                    print(f"🔗 Trying export: {export_url}")
-                    response = requests.get(export_url, timeout=10)
-                    
-                    if response.status_code == 200:
-                        content_type = response.headers.get('content-type', '')
-                        
-                        if 'text/plain' in content_type:
-                            content = response.text
-                            # Successfully extracted text content
-                            return {
-                                "type": "text",
-                                "contents": content,
-                                "source_url": google_doc_url,
-                                "source_title": f"Google Doc {doc_id}"
-                            }
-                        
-                        elif 'text/html' in content_type:
-                            # Parse HTML content
-                            soup = BeautifulSoup(response.text, 'html.parser')
-                            
-                            # Remove script and style elements
-                            for script in soup(["script", "style"]):
-                                script.decompose()
-                            
-                            # Get text content
-                            content = soup.get_text()
-                            
-                            # Clean up the text
-                            lines = (line.strip() for line in content.splitlines())
-                            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-                            content = '\n'.join(chunk for chunk in chunks if chunk)
-                            
-                            # Successfully extracted HTML content
-                            return {
-                                "type": "text",
-                                "contents": content,
-                                "source_url": google_doc_url,
-                                "source_title": f"Google Doc {doc_id}"
-                            }
-                    
-                    else:
-                        print(f"❌ Export failed with status {response.status_code}")
-                        
-                except Exception as e:
-                    print(f"❌ Export error: {e}")
-                    continue
-            
+            self._prefetched_docs.update(zip(urls, self.docs_fetcher.fetch_all_sync(urls)))
+        except Exception as e:
+            # Each source fetches its own docs instead
+            logger.warning("⚠️  Google Docs prefetch failed: %s", e)
+
+    def _google_doc_sources(self, urls):
+        """Sources for Google Doc URLs: prefetched exports first, the rest fetched in one batch"""
+        missing = [url for url in urls if url not in self._prefetched_docs]
+        try:
+            fetched = dict(zip(missing, self.docs_fetcher.fetch_all_sync(missing))) if missing else {}
+        except Exception as e:
+            logger.error("❌ Failed to extract Google Docs content: %s", e)
+            fetched = {}
+
+        processed_sources = []
+        for url in urls:
+            # Prefetched results are handed out once, so the detector does not keep every doc in memory
+            result = self._prefetched_docs.pop(url, None) or fetched.get(url)
+            if result is None:
+                continue
+            if result['status'] == 'success':
+                processed_sources.append(Source(
+                    type="text",
+                    contents=result['contents'],
+                    source_url=url,
+                    source_title=f"Google Doc {result['doc_id']}"
+                ))
+                continue
+            if result['status'] == 'error':
+                logger.warning("❌ Could not export Google Doc %s; it may be reachable on a later run", url)
+                processed_sources.append(Source(
+                    type="text",
+                    contents=f"[Google Doc content could not be fetched: {url}]",
+                    source_url=url,
+                    source_title=f"Google Doc {result['doc_id']} (Unavailable)"
+                ))
+                continue
+
             # If all exports failed, provide helpful message
-            print(f"❌ Could not extract content from Google Doc")
-            print(f"💡 To make this Google Doc accessible:")
-            print(f"   1. Open the Google Doc in your browser")
-            print(f"   2. Click 'Share' button")
-            print(f"   3. Change permissions to 'Anyone with the link can view'")
-            print(f"   4. Save and try again")
+            logger.warning(
+                "❌ Could not extract content from Google Doc\n"
+                "💡 To make this Google Doc accessible:\n"
+                "   1. Open the Google Doc in your browser\n"
+                "   2. Click 'Share' button\n"
+                "   3. Change permissions to 'Anyone with the link can view'\n"
+                "   4. Save and try again"
+            )
             
             # Return a placeholder with instructions
-            return {
-                "type": "text",
-                "contents": f"[Google Doc content not accessible - please make the document public: {google_doc_url}]",
-                "source_url": google_doc_url,
-                "source_title": f"Google Doc {doc_id} (Not Public)"
-            }
-                
-        except Exception as e:
-            print(f"❌ Failed to extract Google Docs content: {e}")
-            return None
+            processed_sources.append(Source(
+                type="text",
+                contents=f"[Google Doc content not accessible - please make the document public: {url}]",
+                source_url=url,
+                source_title=f"Google Doc {result['doc_id']} (Not Public)"
+            ))
+        return processed_sources
     
     def _extract_doc_id(self, google_doc_url):
         """Extract document ID from Google Docs URL"""
-        import re
-        pattern = r'/document/d/([a-zA-Z0-9_-]+)'
-        match = re.search(pattern, google_doc_url)
-        return match.group(1) if match else None
+        from .google_docs import doc_id_from_url
+        return doc_id_from_url(google_doc_url)
     
     def _extract_text_from_doc(self, doc_data):
         """Extract text content from Google Docs API response"""
@@ -464,35 +515,49 @@ class SmartSourceDetector:
         
         return '\n\n'.join(content_parts)
     
-    def process_sources_directory(self, sources_dir="sources"):
+    def iter_sources_directory(self, sources_dir="sources"):
         """
-        Process all sources in a directory with smart detection
+        Process the sources in a directory one file at a time
         
         Args:
             sources_dir (str): Path to sources directory
             
-        Returns:
-            list: List of all processed sources
+        Yields:
+            dict: Each processed source, as soon as its file is done
         """
         sources_path = Path(sources_dir)
         if not sources_path.exists():
-            print(f"⚠️  Sources directory '{sources_dir}' not found")
-            return []
+            logger.warning("⚠️  Sources directory '%s' not found", sources_dir)
+            return
         
-        all_processed_sources = []
+        # Each file is detected once. Text files' infos carry only their URLs (the text is read
+        # when processed), so holding every info leaves one file's content in memory at a time
+        detected = [self.detect_source_type(file_path) for file_path in sources_path.iterdir() if file_path.is_file()]
         
-        for file_path in sources_path.iterdir():
-            if file_path.is_file():
-                # Detect source type
-                source_info = self.detect_source_type(file_path)
-                
-                # Process the source
-                processed_sources = self.process_source(source_info)
-                all_processed_sources.extend(processed_sources)
-        return all_processed_sources
+        # Every file's Google Docs are exported together, instead of a round-trip per doc
+        self.prefetch_google_docs(
+            url for source_info in detected if source_info['type'] == 'google_docs'
+            for url in source_info['metadata']['google_docs_urls']
+        )
+        
+        for source_info in detected:
+            yield from self.process_source(source_info)
+    
+    def process_sources_directory(self, sources_dir="sources"):
+        """
+        Process all sources in a directory with smart detection
+        
+        Args:
+            sources_dir (str): Path to sources directory
+            
+        Returns:
+            list: List of all processed sources
+        """
+        return list(self.iter_sources_directory(sources_dir))
 
 # Example usage and testing
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     detector = SmartSourceDetector()
     
     # Test with individual files
@@ -0,0 +1,104 @@
+"""
+Single-pass URL extraction for source text
+
+One regex finds every http(s) URL; each match is then sorted into a Google
+Docs document URL or a webpage URL. UrlScanner takes text in blocks, so a
+multi-megabyte file is scanned once, in linear time, without holding more
+than a block and a possibly unfinished URL.
+"""
+
+import re
+from urllib.parse import urlparse
+
+URL_PATTERN = re.compile(r'https?://[^\s<>"{}|\\^`\[\]]+')
+GOOGLE_DOC_URL = re.compile(r'https://docs\.google\.com/document/d/[a-zA-Z0-9_-]+')
+GOOGLE_DOCS_HOSTS = ('https://docs.google.com', 'http://docs.google.com')
+TRAILING_PUNCTUATION = re.compile(r'[.,;:!?]+$')
+
+# Characters read per block when streaming a file
+BLOCK_CHARS = 1 << 16
+# A block's last few characters may be the start of a scheme ("htt"); they are scanned with the next block
+HOLD_BACK = len("https://")
+# Longer runs of URL characters are taken as they are rather than carried into the next block
+MAX_URL_CHARS = 8192
+
+
+def is_valid_url(url):
+    """Check if URL is valid and accessible"""
+    try:
+        parsed = urlparse(url)
+        return bool(parsed.netloc) and parsed.scheme in ['http', 'https']
+    except ValueError:
+        return False
+
+
+class UrlScanner:
+    """
+    Google Docs and webpage URLs of a text fed in blocks, in first-seen order
+
+    A URL running into the end of a block may continue in the next one, so
+    it is held back and scanned with that block; everything else is scanned
+    exactly once.
+    """
+
+    def __init__(self):
+        self.google_docs_urls = []
+        self.webpage_urls = []
+        self._seen = set()
+        self._tail = ""
+
+    def feed(self, block, final=False):
+        text = self._tail + block
+        cut = len(text) if final else max(0, len(text) - HOLD_BACK)
+        scanned = 0
+        for match in URL_PATTERN.finditer(text):
+            if not final and match.end() == len(text) and len(match.group()) < MAX_URL_CHARS:
+                cut = match.start()
+                break
+            if match.start() >= cut:
+                break
+            self._add(match.group())
+            scanned = match.end()
+        self._tail = text[max(cut, scanned):]
+        return self
+
+    def close(self):
+        """Scan whatever is held back; call once after the last block"""
+        return self.feed("", final=True)
+
+    def _add(self, url):
+        doc = GOOGLE_DOC_URL.match(url)
+        if doc:
+            found, url = self.google_docs_urls, doc.group()
+        elif url.startswith(GOOGLE_DOCS_HOSTS):
+            # Sheets, slides and the like are neither docs we can export nor pages worth scraping
+            return
+        else:
+            found, url = self.webpage_urls, TRAILING_PUNCTUATION.sub('', url)
+            if not is_valid_url(url):
+                return
+        if url not in self._seen:
+            self._seen.add(url)
+            found.append(url)
+
+
+def scan_urls(text):
+    """UrlScanner results for text that is already in memory"""
+    return UrlScanner().feed(text, final=True)
+
+
+def scan_file(path, block_chars=BLOCK_CHARS):
+    """
+    Read a text file in blocks, scanning each block for URLs as it is read
+
+    Only a block is held at a time; callers that need the text read it
+    when they use it.
+
+    Returns:
+        UrlScanner: The file's URLs
+    """
+    scanner = UrlScanner()
+    with open(path, 'r', encoding='utf-8') as f:
+        for block in iter(lambda: f.read(block_chars), ''):
+            scanner.feed(block)
+    return scanner.close()
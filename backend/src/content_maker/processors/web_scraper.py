@@ -3,17 +3,18 @@
 Web Scraping RAG Layer for processing webpage URLs
 """
 
-import requests
 import re
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 import time
 import logging
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+from ..core.instrumentation import span
+from .urls import is_valid_url, scan_urls
+
 logger = logging.getLogger(__name__)
 
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
 class WebScraper:
     def __init__(self, timeout=15, max_retries=2, delay=1):
         """
@@ -27,12 +28,7 @@ class WebScraper:
         self.timeout = timeout
         self.max_retries = max_retries
         self.delay = delay
-        self.session = requests.Session()
-        
-        # Set user agent to avoid blocking
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        self._session = None
         
         # Known problematic domains that frequently timeout or block scrapers
         self.problematic_domains = {
@@ -40,13 +36,22 @@ class WebScraper:
             'washingtonpost.com', 'bloomberg.com', 'reuters.com'
         }
     
+    @property
+    def session(self):
+        """HTTP session, created (and requests imported) on the first fetch"""
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+            
+            # Set user agent to avoid blocking
+            self._session.headers.update({
+                'User-Agent': USER_AGENT
+            })
+        return self._session
+    
     def is_valid_url(self, url):
         """Check if URL is valid and accessible"""
-        try:
-            parsed = urlparse(url)
-            return bool(parsed.netloc) and parsed.scheme in ['http', 'https']
-        except:
-            return False
+        return is_valid_url(url)
     
     def is_problematic_domain(self, url):
         """Check if URL is from a known problematic domain"""
@@ -62,19 +67,7 @@ class WebScraper:
     
     def extract_webpage_urls(self, text):
         """Extract webpage URLs from text content"""
-        # Pattern to match URLs (excluding Google Docs)
-        url_pattern = r'https?://(?!docs\.google\.com)[^\s<>"{}|\\^`\[\]]+'
-        urls = re.findall(url_pattern, text)
-        
-        # Filter and validate URLs
-        valid_urls = []
-        for url in urls:
-            # Clean up URL (remove trailing punctuation)
-            url = re.sub(r'[.,;:!?]+$', '', url)
-            if self.is_valid_url(url):
-                valid_urls.append(url)
-        
-        return list(set(valid_urls))  # Remove duplicates
+        return scan_urls(text).webpage_urls
     
     def scrape_webpage(self, url):
         """
@@ -86,19 +79,33 @@ class WebScraper:
         Returns:
             dict: Scraped content with metadata
         """
-        print(f"🌐 Scraping webpage: {url}")
+        with span("fetch", url=url) as fetch_span:
+            result = self._scrape_webpage(url, fetch_span)
+            fetch_span.set(chars=len(result['content']))
+            if result['status'] != 'success':
+                fetch_span.status = result['status']
+            return result
+
+    def _scrape_webpage(self, url, fetch_span):
+        # Imported here so runs without webpages never load requests or bs4
+        import requests
+        from bs4 import BeautifulSoup
+        
+        logger.info("🌐 Scraping webpage: %s", url)
         
         # Check if this is a problematic domain
         if self.is_problematic_domain(url):
-            print(f"⚠️  Warning: {url} is from a known problematic domain that may timeout or block scrapers")
-            print(f"💡 Consider manually extracting content or using alternative sources")
+            logger.warning("⚠️  Warning: %s is from a known problematic domain that may timeout or block scrapers", url)
+            logger.warning("💡 Consider manually extracting content or using alternative sources")
         
         for attempt in range(self.max_retries):
             try:
-                print(f"🔗 Attempt {attempt + 1}/{self.max_retries}")
+                logger.info("🔗 Attempt %d/%d", attempt + 1, self.max_retries)
+                fetch_span.set(attempts=attempt + 1)
                 
                 response = self.session.get(url, timeout=self.timeout)
                 response.raise_for_status()
+                fetch_span.set(bytes=len(response.content), http_status=response.status_code)
                 
                 # Parse HTML content
                 soup = BeautifulSoup(response.content, 'html.parser')
@@ -113,8 +120,8 @@ class WebScraper:
                 # Clean and process content
                 cleaned_content = self._clean_content(content)
                 
-                print(f"✅ Successfully scraped: {title}")
-                print(f"📝 Content length: {len(cleaned_content)} characters")
+                logger.info("✅ Successfully scraped: %s", title)
+                logger.info("📝 Content length: %d characters", len(cleaned_content))
                 
                 return {
                     'url': url,
@@ -125,9 +132,9 @@ class WebScraper:
                 }
                 
             except requests.exceptions.ConnectTimeout as e:
-                print(f"⏰ Connection timeout (attempt {attempt + 1}): {e}")
+                logger.warning("⏰ Connection timeout (attempt %d): %s", attempt + 1, e)
                 if self.is_problematic_domain(url):
-                    print(f"🚫 This domain is known to frequently timeout. Skipping further attempts.")
+                    logger.warning("🚫 This domain is known to frequently timeout. Skipping further attempts.")
                     return {
                         'url': url,
                         'title': 'Connection Timeout',
@@ -149,7 +156,7 @@ class WebScraper:
                     }
                 
             except requests.exceptions.RequestException as e:
-                print(f"❌ Request error (attempt {attempt + 1}): {e}")
+                logger.warning("❌ Request error (attempt %d): %s", attempt + 1, e)
                 if attempt < self.max_retries - 1:
                     time.sleep(self.delay * (attempt + 1))  # Exponential backoff
                 else:
@@ -163,7 +170,7 @@ class WebScraper:
                     }
             
             except Exception as e:
-                print(f"❌ Unexpected error (attempt {attempt + 1}): {e}")
+                logger.warning("❌ Unexpected error (attempt %d): %s", attempt + 1, e)
                 if attempt < self.max_retries - 1:
                     time.sleep(self.delay * (attempt + 1))
                 else:
@@ -309,7 +316,7 @@ class WebScraper:
         if not urls:
             return []
         
-        print(f"🔍 Found {len(urls)} webpage URL(s) to scrape")
+        logger.info("🔍 Found %d webpage URL(s) to scrape", len(urls))
         
         scraped_content = []
         for url in urls:
@@ -323,6 +330,7 @@ class WebScraper:
 
 # Example usage and testing
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     scraper = WebScraper()
     
     # Test with sample text containing URLs
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test script for batch mode: question loading, JSONL results and the concurrency limit
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+from content_maker.core import batch
+from content_maker.core.replay import RecordingGateway, ReplayStore
+from fixtures import FUNCTION_OUTPUTS, FakeGateway
+
+QUESTIONS = [
+    {"id": "gardens", "question": "Why do digital gardens work?", "thread": 2},
+    {"content": "How do notes grow?", "instructions": "Keep it short"},
+    {"id": "broken", "question": "Please fail retrieval"},
+    {"question": "What is an evergreen note?", "thread": "all"},
+    {"question": "Where did gardens start?", "thread": "nine"},
+    {"question": "Who tends a garden?"},
+]
+
+
+def write_questions(directory):
+    path = os.path.join(directory, "questions.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        for record in QUESTIONS[:3]:
+            f.write(json.dumps(record) + "\n")
+        f.write("\n")
+        for record in QUESTIONS[3:]:
+            f.write(json.dumps(record) + "\n")
+    return path
+
+
+def recorded_fake_gateway(directory):
+    """Replay options serving what FakeGateway answers for each function"""
+    store_path = os.path.join(directory, "replay.jsonl")
+    recorder = RecordingGateway(FakeGateway(), ReplayStore(store_path))
+    for function_name in FUNCTION_OUTPUTS:
+        recorder.inference(function_name=function_name, input={"messages": []})
+    return argparse.Namespace(replay=True, record=False, replay_store=store_path, replay_latency="fixed:0.05")
+
+
+def test_load_questions():
+    questions = batch.load_questions(write_questions(tempfile.mkdtemp()))
+    assert [record["id"] for record in questions] == ["gardens", "2", "broken", "5", "6", "7"]
+    assert questions[1] == {"id": "2", "question": "How do notes grow?", "thread": "all",
+                            "instructions": "Keep it short"}
+    print("✅ Questions load with ids, defaults and `content` as the question")
+
+
+def test_run_batch():
+    directory = tempfile.mkdtemp()
+    sources_dir = os.path.join(directory, "sources")
+    os.makedirs(sources_dir)
+    with open(os.path.join(sources_dir, "notes.json"), "w", encoding="utf-8") as f:
+        json.dump({"content": "Digital gardens grow from small notes tended over time."}, f)
+    output_path = os.path.join(directory, "results.jsonl")
+
+    in_flight, peak = 0, 0
+    run_question, retrieve = batch.run_question, batch.async_retrieve_chunks
+
+    async def counted(*args, **kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            return await run_question(*args, **kwargs)
+        finally:
+            in_flight -= 1
+
+    async def flaky_retrieve(client, question, *args):
+        if "fail" in question:
+            raise RuntimeError("retrieval exploded")
+        return await retrieve(client, question, *args)
+
+    batch.run_question, batch.async_retrieve_chunks = counted, flaky_retrieve
+    try:
+        counts = asyncio.run(batch.run_batch(
+            write_questions(directory), output_path, sources_dir, concurrency=2,
+            gateway_options=recorded_fake_gateway(directory)
+        ))
+    finally:
+        batch.run_question, batch.async_retrieve_chunks = run_question, retrieve
+
+    assert counts == {"success": 5, "error": 1}
+    assert peak == 2
+
+    with open(output_path, "r", encoding="utf-8") as f:
+        results = {record["id"]: record for record in map(json.loads, f)}
+    assert sorted(results) == ["2", "5", "6", "7", "broken", "gardens"]
+    assert results["broken"]["status"] == "error" and results["broken"]["error"] == "retrieval exploded"
+    assert "script" not in results["broken"]
+
+    gardens = results["gardens"]
+    assert gardens["status"] == "success" and gardens["thread_choice"] == "2"
+    assert gardens["script"] == FUNCTION_OUTPUTS["synthesise_content"]
+    assert gardens["threads"] == FUNCTION_OUTPUTS["thread_ideas"]
+    # An unknown thread choice falls back to all of them
+    assert results["6"]["thread_choice"] == "all"
+    assert all(record["elapsed_s"] >= 0.1 for record in results.values() if record["status"] == "success")
+    print("✅ Batch writes one JSONL record per question, errors included, within the concurrency limit")
+
+
+if __name__ == "__main__":
+    test_load_questions()
+    test_run_batch()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Smoke test for the offline benchmark suite: every benchmark runs on a tiny corpus
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+from run import compare, run_suite
+from suite import BENCHMARKS
+
+
+def test_suite_runs_offline():
+    results = run_suite("tiny", repeat=1, min_round_s=0.001)
+
+    assert set(results["results"]) == set(BENCHMARKS)
+    assert all(stats["median"] > 0 for stats in results["results"].values())
+    # Webpages and doc exports came from the fixture server, image analysis from the fake gateway
+    assert results["meta"]["fixture_requests"] > 0
+    assert results["meta"]["gateway_calls"] > 0
+
+    slower = {"meta": results["meta"], "results": {
+        name: {**stats, "median": stats["median"] * 2} for name, stats in results["results"].items()
+    }}
+    assert compare(results, slower) == list(BENCHMARKS)
+
+
+if __name__ == "__main__":
+    test_suite_runs_offline()
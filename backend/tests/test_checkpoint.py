@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test script for pipeline stage checkpoints
+"""
+
+import json
+import os
+import sys
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from content_maker.core.checkpoint import RunCheckpoint, input_fingerprint
+
+
+def make_sources():
+    sources_dir = tempfile.mkdtemp()
+    with open(os.path.join(sources_dir, "input.json"), "w", encoding="utf-8") as f:
+        json.dump({"content": "Digital gardens"}, f)
+    return sources_dir
+
+
+def test_fingerprint_tracks_sources_and_options():
+    sources_dir = make_sources()
+    fingerprint = input_fingerprint(sources_dir)
+    assert input_fingerprint(sources_dir) == fingerprint
+    assert input_fingerprint(sources_dir, {"summarise_min_chars": 4000}) != fingerprint
+
+    with open(os.path.join(sources_dir, "notes.json"), "w", encoding="utf-8") as f:
+        json.dump({"content": "More notes"}, f)
+    assert input_fingerprint(sources_dir) != fingerprint
+
+
+def test_resume_latest_run():
+    root = tempfile.mkdtemp()
+    checkpoint = RunCheckpoint.new("abc123", root)
+    checkpoint.save("ingest", {"question": "Digital gardens", "chunks": []})
+    checkpoint.save("retrieve", [])
+
+    resumed = RunCheckpoint.latest("abc123", root)
+    print(f"⏩ Resumed {resumed.run_id}: {resumed.completed}")
+    assert resumed.run_id == checkpoint.run_id
+    assert resumed.load("ingest")["question"] == "Digital gardens"
+    assert resumed.load("retrieve") == []
+    assert resumed.load("thread") is None
+
+    assert RunCheckpoint.latest("other", root) is None
+
+
+def test_changed_inputs_refuse_resume():
+    root = tempfile.mkdtemp()
+    checkpoint = RunCheckpoint.new("abc123", root)
+    checkpoint.save("ingest", {"question": "Digital gardens", "chunks": []})
+
+    # A run on other inputs is refused, and its checkpoints are left alone
+    for run_id, fingerprint in ((checkpoint.run_id, "def456"), ("../..", "abc123"), ("20240101-000000-x/..", "abc123")):
+        try:
+            RunCheckpoint(run_id, fingerprint, root)
+            assert False, f"{run_id} should not resume"
+        except ValueError as e:
+            print(f"🚫 {e}")
+    assert RunCheckpoint(checkpoint.run_id, "abc123", root).load("ingest")["question"] == "Digital gardens"
+
+
+if __name__ == "__main__":
+    test_fingerprint_tracks_sources_and_options()
+    test_resume_latest_run()
+    test_changed_inputs_refuse_resume()
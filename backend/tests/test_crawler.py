@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Tests for the link-following crawl mode
+"""
+
+import os
+import random
+import sys
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+from content_maker.processors.crawler import BloomFilter, CrawlRules, WebCrawler, canonical_url
+from content_maker.processors.source_detector import SmartSourceDetector
+from fixtures import FixtureServer
+
+QUESTION = "What is the history of digital gardens?"
+
+HUB_PAGE = """<html><head><title>Garden index</title></head><body>
+<nav><a href="/page/1">A short history of digital gardens</a></nav>
+<main><article><h1>Garden index</h1>
+<p>Everything we have written about gardens, notes and knowledge work.</p>
+<ul>
+<li><a href="/page/2">Weeknight pasta recipes</a></li>
+<li><a href="/page/3#top">Digital garden starter kit</a></li>
+<li><a href="/page/4?utm_source=hub">Tax season checklist</a></li>
+<li><a href="/private/garden-history">Garden history drafts</a></li>
+<li><a href="https://elsewhere.invalid/digital-garden-history">History of digital gardens elsewhere</a></li>
+<li><a href="mailto:hello@example.com">Email us</a></li>
+</ul></article></main></body></html>"""
+
+
+def crawler_for(cache_dir, **rules):
+    return WebCrawler(rules=CrawlRules(**rules), question=QUESTION, concurrency=4, cache_dir=cache_dir)
+
+
+def test_canonical_url():
+    assert canonical_url("HTTPS://Example.COM:443/a?b=2&a=1&utm_source=x#frag") == "https://example.com/a?a=1&b=2"
+    assert canonical_url("http://example.com") == "http://example.com/"
+    assert canonical_url("http://127.0.0.1:8080/page/3#top") == "http://127.0.0.1:8080/page/3"
+    print("✅ URLs canonicalise to one spelling per page")
+
+
+def test_bloom_filter_persists():
+    path = os.path.join(tempfile.mkdtemp(), "seen.bloom")
+    seen = BloomFilter(path, capacity=1000)
+    urls = [f"https://example.com/{i}" for i in range(1000)]
+    for url in urls:
+        seen.add(url)
+    seen.save()
+
+    reloaded = BloomFilter(path, capacity=1000)
+    assert all(url in reloaded for url in urls)
+    rng = random.Random(7)
+    false_positives = sum(f"https://example.com/new/{rng.random()}" in reloaded for _ in range(2000))
+    print(f"📊 False positive rate at capacity: {false_positives / 2000:.3%}")
+    assert false_positives / 2000 < 0.03
+    print("✅ Seen URLs survive a reload with no false negatives")
+
+
+def test_crawl_follows_relevant_links_within_budget():
+    cache_dir = tempfile.mkdtemp()
+    with FixtureServer(page_words=200, pages={"/hub": HUB_PAGE}) as server:
+        hub = f"{server.base_url}/hub"
+        pages = crawler_for(cache_dir, max_pages=2, exclude=[r"/private/"]).crawl_sync([hub])
+
+        # The seed, then the two links whose anchor text matches the question
+        urls = [page['url'] for page in pages]
+        assert urls[0] == hub
+        assert sorted(urls[1:]) == [f"{server.base_url}/page/1", f"{server.base_url}/page/3"]
+        assert all(page['status'] == 'success' and page['content'] for page in pages)
+        assert [page['depth'] for page in pages] == [0, 1, 1]
+        assert server.requests == 3
+
+        # A later run is served from the page store: same pages, and only the seed is asked for changes
+        later = crawler_for(cache_dir, max_pages=2, exclude=[r"/private/"])
+        again = later.crawl_sync([hub])
+        assert [page['url'] for page in again] == urls
+        assert server.requests == 4 and later.stats["not_modified"] == 1 and later.stats["from_store"] == 2
+
+        # Depth 0 fetches only the seed; include rules narrow what is followed
+        assert len(crawler_for(tempfile.mkdtemp(), max_depth=0).crawl_sync([hub])) == 1
+        included = crawler_for(tempfile.mkdtemp(), max_pages=10, include=[r"/page/[24]"]).crawl_sync([hub])
+        assert sorted(page['url'].rsplit("/", 1)[-1] for page in included[1:]) == ["2", "4?utm_source=hub"]
+    print("✅ Crawl follows the best links within depth, site, rules and budget")
+
+
+def test_stored_pages_are_revalidated():
+    cache_dir = tempfile.mkdtemp()
+    with FixtureServer(page_words=200, pages={"/hub": HUB_PAGE}) as server:
+        hub = f"{server.base_url}/hub"
+        crawler_for(cache_dir, max_pages=2, exclude=[r"/private/"]).crawl_sync([hub])
+
+        # An edited seed is fetched again and its new links are followed
+        server.set_page("/hub", HUB_PAGE.replace("/page/3#top", "/page/5"))
+        edited = crawler_for(cache_dir, max_pages=2, exclude=[r"/private/"])
+        pages = edited.crawl_sync([hub])
+        assert f"{server.base_url}/page/5" in [page['url'] for page in pages]
+        assert edited.stats["not_modified"] == 0 and edited.stats["fetched"] == 2
+
+        # Past max_age_s, followed pages are revalidated too; unchanged ones answer 304
+        stale = WebCrawler(rules=CrawlRules(max_pages=2, exclude=[r"/private/"]), question=QUESTION,
+                           cache_dir=cache_dir, max_age_s=0)
+        requests = server.requests
+        again = stale.crawl_sync([hub])
+        assert [page['url'] for page in again] == [page['url'] for page in pages]
+        assert stale.stats["not_modified"] == 3 and stale.stats["fetched"] == 0
+        assert server.requests == requests + 3
+    print("✅ Seeds and stale pages are revalidated against the site")
+
+
+def test_parse_errors_do_not_end_the_crawl():
+    with FixtureServer(page_words=200, pages={"/hub": HUB_PAGE}) as server:
+        crawler = crawler_for(tempfile.mkdtemp(), max_pages=2, exclude=[r"/private/"])
+        parse = crawler._parse
+
+        def flaky_parse(url, content):
+            if url.endswith("/page/1"):
+                raise ValueError("broken markup")
+            return parse(url, content)
+        crawler._parse = flaky_parse
+        pages = crawler.crawl_sync([f"{server.base_url}/hub", f"{server.base_url}/page/1"])
+
+    # The failing seed is reported like a failed fetch; the rest of the crawl carries on
+    assert [page['status'] for page in pages][:2] == ['success', 'error']
+    assert pages[1]['error'] == "broken markup"
+    assert len(pages) == 4 and crawler.stats["failed"] == 1
+    print("✅ A page that fails to parse is skipped, not fatal")
+
+
+def test_crawl_budget_is_shared_across_sources():
+    with FixtureServer(page_words=200, pages={"/hub": HUB_PAGE, "/hub2": HUB_PAGE}) as server:
+        crawler = crawler_for(tempfile.mkdtemp(), max_pages=3, exclude=[r"/private/"])
+        first = crawler.crawl_sync([f"{server.base_url}/hub"])
+        second = crawler.crawl_sync([f"{server.base_url}/hub2"])
+        # hub2 links to the same pages; none is fetched twice and the budget is already spent
+        assert len(first) == 4
+        assert [page['depth'] for page in second] == [0]
+        assert crawler.pages_followed == 3
+    print("✅ Page budget covers the whole run and pages are never refetched")
+
+
+def test_detector_with_crawler():
+    with FixtureServer(page_words=200, pages={"/hub": HUB_PAGE}) as server:
+        crawler = crawler_for(tempfile.mkdtemp(), max_pages=2)
+        detector = SmartSourceDetector(crawler=crawler)
+        source_info = {
+            'type': 'text',
+            'path': 'notes.txt',
+            'content': f"Start from the index at {server.base_url}/hub and also {server.base_url}/missing",
+            'metadata': {'filename': 'notes.txt'},
+        }
+        sources = detector.process_source(source_info)
+
+    titles = [source.get('source_title') for source in sources]
+    assert "Garden index" in titles
+    assert "Scraping Failed" in titles
+    assert sum(title is not None and title.startswith("Fixture page") for title in titles) == 2
+    assert sources[-1]['contents'] == source_info['content']
+    print("✅ Detector turns crawled pages into sources")
+
+
+if __name__ == "__main__":
+    test_canonical_url()
+    test_bloom_filter_persists()
+    test_crawl_follows_relevant_links_within_budget()
+    test_stored_pages_are_revalidated()
+    test_parse_errors_do_not_end_the_crawl()
+    test_crawl_budget_is_shared_across_sources()
+    test_detector_with_crawler()
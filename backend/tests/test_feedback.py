@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test script for the background feedback queue
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from content_maker.core.feedback import AsyncFeedbackQueue, FeedbackQueue, FeedbackSpool
+
+EPISODE_ID = "0192ced0-947e-74b3-a3d7-02fd2c54d637"
+INFERENCE_ID = "0192ced0-947e-74b3-a3d7-02fd2c54d638"
+
+
+class FakeClient:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.sent = []
+
+    def feedback(self, **kwargs):
+        if self.fail:
+            raise ConnectionError("gateway unavailable")
+        self.sent.append(kwargs)
+
+
+class FakeAsyncClient(FakeClient):
+    async def feedback(self, **kwargs):
+        await asyncio.sleep(0)
+        super().feedback(**kwargs)
+
+
+def make_spool():
+    return FeedbackSpool(os.path.join(tempfile.mkdtemp(), "spool.jsonl"))
+
+
+def test_queue_flushes_on_close():
+    client = FakeClient()
+    with FeedbackQueue(client, spool=make_spool()) as feedback_queue:
+        feedback_queue.submit("user_rating", 4, episode_id=EPISODE_ID)
+        feedback_queue.submit("synthesis_quality", 0.8, inference_id=INFERENCE_ID)
+
+    print(f"📨 Sent: {client.sent}")
+    assert [item["metric_name"] for item in client.sent] == ["user_rating", "synthesis_quality"]
+    assert client.sent[0]["value"] == 4.0
+
+
+def test_unsent_feedback_is_spooled_and_retried():
+    spool = make_spool()
+    with FeedbackQueue(FakeClient(fail=True), spool=spool) as feedback_queue:
+        feedback_queue.submit("user_rating", 5, episode_id=EPISODE_ID)
+    assert os.path.exists(spool.path)
+
+    client = FakeClient()
+    with FeedbackQueue(client, spool=spool):
+        pass
+    assert client.sent[0]["episode_id"] == EPISODE_ID
+    assert not os.path.exists(spool.path)
+
+
+def test_spool_is_retried_once_the_gateway_answers():
+    spool = make_spool()
+    client = FakeClient(fail=True)
+    with FeedbackQueue(client, spool=spool, batch_size=2) as feedback_queue:
+        for rating in range(1, 4):
+            feedback_queue.submit("user_rating", rating, episode_id=EPISODE_ID)
+        while feedback_queue.stats["spooled"] < 3:
+            time.sleep(0.01)
+        assert client.sent == []
+
+        # The gateway recovers: the next clean flush sends what was spooled, without a restart
+        client.fail = False
+        feedback_queue.submit("user_rating", 4, episode_id=EPISODE_ID)
+        while len(client.sent) < 4:
+            time.sleep(0.01)
+    assert sorted(item["value"] for item in client.sent) == [1.0, 2.0, 3.0, 4.0]
+    assert not os.path.exists(spool.path)
+
+    async def run():
+        async_client = FakeAsyncClient()
+        spool.append([{"metric_name": "user_rating", "value": 2.0, "episode_id": EPISODE_ID, "attempts": 1}])
+        async with AsyncFeedbackQueue(async_client, spool=spool, batch_size=2) as async_queue:
+            spool.append([{"metric_name": "user_rating", "value": 3.0, "episode_id": EPISODE_ID, "attempts": 1}])
+            async_queue.submit("user_rating", 5, episode_id=EPISODE_ID)
+            while len(async_client.sent) < 3:
+                await asyncio.sleep(0.01)
+        return async_client
+
+    assert sorted(item["value"] for item in asyncio.run(run()).sent) == [2.0, 3.0, 5.0]
+    assert not os.path.exists(spool.path)
+    print("✅ Spooled feedback is retried after a clean flush")
+
+
+def test_invalid_submission():
+    feedback_queue = FeedbackQueue(FakeClient(), spool=make_spool())
+    for args, kwargs in [(("user_rating", 3), {"inference_id": INFERENCE_ID}), (("unknown_metric", 1), {})]:
+        try:
+            feedback_queue.submit(*args, **kwargs)
+        except ValueError:
+            continue
+        raise AssertionError(f"expected ValueError for {args}")
+
+
+def test_async_queue():
+    client = FakeAsyncClient()
+
+    async def run():
+        async with AsyncFeedbackQueue(client, spool=make_spool(), batch_size=2) as feedback_queue:
+            for rating in range(1, 6):
+                feedback_queue.submit("user_rating", rating, episode_id=EPISODE_ID)
+
+    asyncio.run(run())
+    assert sorted(item["value"] for item in client.sent) == [1.0, 2.0, 3.0, 4.0, 5.0]
+
+
+if __name__ == "__main__":
+    test_queue_flushes_on_close()
+    test_unsent_feedback_is_spooled_and_retried()
+    test_spool_is_retried_once_the_gateway_answers()
+    test_invalid_submission()
+    test_async_queue()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test script for hedged, deadline-aware inference
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from content_maker.core.hedging import DeadlineExceeded, HedgedInference, LatencyTracker
+
+CONFIG_FILE = os.path.join(os.path.dirname(__file__), '..', 'config', 'tensorzero.toml')
+
+
+class FakeClient:
+    """Async client whose variants answer after fixed delays"""
+
+    def __init__(self, delays, invalid=()):
+        self.delays = delays
+        self.invalid = set(invalid)
+        self.calls = []
+
+    async def inference(self, function_name, input, episode_id, variant_name, tags, **kwargs):
+        self.calls.append((variant_name, tags["hedge_role"], episode_id))
+        self.kwargs = {**kwargs, "tags": tags}
+        if self.delays[variant_name] is None:
+            raise RuntimeError(f"{variant_name} is down")
+        await asyncio.sleep(self.delays[variant_name])
+        raw = "not json" if variant_name in self.invalid else '{"threads": [], "summary": "ok"}'
+        return SimpleNamespace(
+            episode_id=episode_id,
+            inference_id=f"inference-{variant_name}",
+            variant_name=variant_name,
+            output=SimpleNamespace(raw=raw, parsed=None if variant_name in self.invalid else {"summary": "ok"}),
+        )
+
+
+def make_hedger(deadline_s=1.0, hedge_after_s=0.05):
+    tracker = LatencyTracker(path=os.path.join(tempfile.mkdtemp(), "latency.json"))
+    hedger = HedgedInference(tracker, deadline_s=deadline_s, default_hedge_after_s=hedge_after_s,
+                             config_file=CONFIG_FILE)
+    # Pin the order so the test does not depend on weighted sampling
+    hedger.pick_variants = lambda function_name: ("claude_sonnet", "gpt_4o_mini")
+    return hedger
+
+
+def test_hedge_wins_when_primary_is_slow():
+    hedger = make_hedger()
+    client = FakeClient({"claude_sonnet": 0.5, "gpt_4o_mini": 0.01})
+    result = asyncio.run(hedger.run(client, "thread_ideas", {"input": "q", "sources": []}))
+
+    print(f"🏁 Winner: {result['variant_name']}, stats: {hedger.stats}")
+    assert result["variant_name"] == "gpt_4o_mini"
+    assert result["hedged"] and result["hedge_won"]
+    assert len({episode_id for _, _, episode_id in client.calls}) == 1
+
+
+def test_fast_primary_is_not_hedged():
+    hedger = make_hedger()
+    client = FakeClient({"claude_sonnet": 0.01, "gpt_4o_mini": 0.01})
+    result = asyncio.run(hedger.run(client, "thread_ideas", {"input": "q", "sources": []}))
+
+    assert result["variant_name"] == "claude_sonnet"
+    assert not result["hedged"]
+    assert [role for _, role, _ in client.calls] == ["primary"]
+
+
+def test_invalid_primary_falls_through_to_hedge():
+    """A result that fails the output schema does not win"""
+    hedger = make_hedger(hedge_after_s=10)
+    client = FakeClient({"claude_sonnet": 0.01, "gpt_4o_mini": 0.05}, invalid={"claude_sonnet"})
+    result = asyncio.run(hedger.run(client, "thread_ideas", {"input": "q", "sources": []}))
+
+    assert result["variant_name"] == "gpt_4o_mini"
+    assert result["parsed"] is not None
+
+
+def test_deadline():
+    hedger = make_hedger(deadline_s=0.1)
+    client = FakeClient({"claude_sonnet": 1.0, "gpt_4o_mini": 1.0})
+    try:
+        asyncio.run(hedger.run(client, "thread_ideas", {"input": "q", "sources": []}))
+    except DeadlineExceeded:
+        assert hedger.stats["deadline_exceeded"] == 1
+    else:
+        raise AssertionError("expected DeadlineExceeded")
+
+
+def test_only_completed_attempts_are_recorded():
+    """Failed and cancelled attempts have no latency to measure and stay out of the p95"""
+    hedger = make_hedger(deadline_s=2.0)
+    client = FakeClient({"claude_sonnet": 0.5, "gpt_4o_mini": 0.01})
+    asyncio.run(hedger.run(client, "thread_ideas", {"input": "q", "sources": []}, tags={"run": "r1"}))
+    samples = hedger.tracker.samples
+    # The primary lost and was cancelled; only the hedge that answered is timed
+    assert "thread_ideas/claude_sonnet" not in samples
+    assert len(samples["thread_ideas/gpt_4o_mini"]) == 1
+    assert samples["thread_ideas/gpt_4o_mini"][0] < 0.5
+    assert client.kwargs["tags"] == {"run": "r1", "hedge_role": "hedge"}
+
+    failing = FakeClient({"claude_sonnet": None, "gpt_4o_mini": 0.01})
+    result = asyncio.run(hedger.run(failing, "thread_ideas", {"input": "q", "sources": []}))
+    assert result["variant_name"] == "gpt_4o_mini"
+    assert "thread_ideas/claude_sonnet" not in samples
+    assert len(samples["thread_ideas/gpt_4o_mini"]) == 2
+
+    try:
+        asyncio.run(hedger.run(client, "thread_ideas", {}, variant_name="claude_sonnet"))
+        raise AssertionError("a pinned variant cannot be hedged")
+    except ValueError:
+        pass
+    print("✅ Only completed attempts reach the latency tracker")
+
+
+def test_latency_percentile_needs_samples():
+    tracker = LatencyTracker(path=os.path.join(tempfile.mkdtemp(), "latency.json"))
+    for i in range(5):
+        tracker.record("thread_ideas", "gpt_4o_mini", i)
+    assert tracker.percentile("thread_ideas", "gpt_4o_mini") is None
+
+    for i in range(5, 20):
+        tracker.record("thread_ideas", "gpt_4o_mini", i)
+    assert tracker.percentile("thread_ideas", "gpt_4o_mini") == 18
+    for i in range(20, 30):
+        tracker.record("thread_ideas", "gpt_4o_mini", i)
+    # 95% of 30 samples is 28.5; the nearest rank is the 29th, not the 28th
+    assert tracker.percentile("thread_ideas", "gpt_4o_mini") == 28
+    assert os.path.exists(tracker.path)
+
+
+if __name__ == "__main__":
+    test_hedge_wins_when_primary_is_slow()
+    test_fast_primary_is_not_hedged()
+    test_invalid_primary_falls_through_to_hedge()
+    test_deadline()
+    test_only_completed_attempts_are_recorded()
+    test_latency_percentile_needs_samples()
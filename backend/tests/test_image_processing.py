@@ -3,11 +3,37 @@
 Test script for multimodal image processing
 """
 
+import base64
+import hashlib
 import os
 import sys
+import tempfile
+import tracemalloc
+from types import SimpleNamespace
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 from content_maker.processors.image_processor import MultimodalImageProcessor
 
+# Stand-in bytes; the processor never decodes the image itself
+PNG_BYTES = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 8
+
+
+class RecordingClient:
+    """Gateway stand-in that keeps each request's content blocks"""
+
+    def __init__(self):
+        self.blocks = []
+
+    def inference(self, model_name=None, input=None, **kwargs):
+        self.blocks.append(input["messages"][0]["content"][1])
+        return SimpleNamespace(content="A chart of notes growing over time.")
+
+
+def write_image(directory, name, data=PNG_BYTES):
+    path = os.path.join(directory, name)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
 def test_multimodal_image_processing():
     """Test multimodal image processing with the existing image"""
     print("🧪 Testing Multimodal Image Processing")
@@ -60,6 +86,100 @@ def test_smart_detection_with_multimodal():
     else:
         print(f"❌ Test file not found: {test_file}")
 
+def test_reference_mode_stores_each_image_once():
+    directory = tempfile.mkdtemp()
+    storage = os.path.join(directory, "storage")
+    processor = MultimodalImageProcessor('reference', storage, "https://cdn.example.com/media/")
+
+    first = write_image(directory, "slide.PNG")
+    copy = write_image(directory, "slide-copy.png")
+    key = processor.store_image(first)
+    assert key == f"images/{hashlib.sha256(PNG_BYTES).hexdigest()}.png"
+    stored = os.path.join(storage, key)
+    written_at = os.stat(stored).st_mtime_ns
+
+    # Same bytes under another name: same key, and the object is not written again
+    assert processor.store_image(copy) == key
+    assert os.stat(stored).st_mtime_ns == written_at
+    other = processor.store_image(write_image(directory, "other.png", PNG_BYTES[::-1]))
+    assert other != key
+    assert sorted(os.listdir(os.path.join(storage, "images"))) == sorted([key[7:], other[7:]])
+    with open(stored, "rb") as f:
+        assert f.read() == PNG_BYTES
+    print("✅ Reference mode stores each distinct image once, by content hash")
+
+
+def test_reference_mode_sends_a_url():
+    directory = tempfile.mkdtemp()
+    client = RecordingClient()
+    processor = MultimodalImageProcessor('reference', os.path.join(directory, "storage"),
+                                         "https://cdn.example.com/media/", client=client)
+    result = processor.process_image(write_image(directory, "slide.png"))
+
+    assert result['status'] == 'success'
+    assert client.blocks == [{
+        "type": "file",
+        "mime_type": "image/png",
+        "url": f"https://cdn.example.com/media/images/{hashlib.sha256(PNG_BYTES).hexdigest()}.png",
+    }]
+    print("✅ Reference mode sends a URL block, not the image bytes")
+
+
+def test_reference_mode_needs_a_base_url():
+    directory = tempfile.mkdtemp()
+    saved = os.environ.pop('IMAGE_STORAGE_BASE_URL', None)
+    try:
+        processor = MultimodalImageProcessor('reference', os.path.join(directory, "storage"))
+    finally:
+        if saved is not None:
+            os.environ['IMAGE_STORAGE_BASE_URL'] = saved
+    assert processor.image_mode == 'inline'
+
+    block = processor._build_file_block(write_image(directory, "slide.png"), "image/png")
+    assert block == {"type": "file", "mime_type": "image/png", "data": base64.b64encode(PNG_BYTES).decode('ascii')}
+    # Nothing was stored, since nothing will fetch it
+    assert not os.path.exists(os.path.join(directory, "storage"))
+
+    try:
+        MultimodalImageProcessor('thumbnail')
+        raise AssertionError("an unknown image mode was accepted")
+    except ValueError:
+        pass
+    print("✅ Without IMAGE_STORAGE_BASE_URL, reference mode falls back to inline images")
+
+
+def test_empty_image_encodes_to_nothing():
+    directory = tempfile.mkdtemp()
+    processor = MultimodalImageProcessor('inline', os.path.join(directory, "storage"))
+    # mmap refuses empty files, so they are special-cased
+    empty = write_image(directory, "empty.jpg", b"")
+    assert processor._encode_image(empty) == ""
+    assert processor._build_file_block(empty, "image/jpeg")["data"] == ""
+    assert processor._encode_image(write_image(directory, "one.jpg", b"x")) == "eA=="
+    print("✅ Empty images encode to an empty string")
+
+
+def test_encoding_peak_memory():
+    directory = tempfile.mkdtemp()
+    processor = MultimodalImageProcessor('inline', os.path.join(directory, "storage"))
+    size = 3 * 1024 * 1024
+    image = write_image(directory, "large.jpg", os.urandom(size))
+
+    tracemalloc.start()
+    encoded = processor._encode_image(image)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(encoded) == size * 4 // 3
+    # Encoded bytes plus the str (8/3 of the size); a copy of the raw image would add another 3/3
+    assert peak < size * 2.8, f"{peak / size:.2f}x the image size"
+    print(f"✅ Encoding peaks at {peak / size:.2f}x the image size")
+
+
 if __name__ == "__main__":
     test_multimodal_image_processing()
     test_smart_detection_with_multimodal()
+    test_reference_mode_stores_each_image_once()
+    test_reference_mode_sends_a_url()
+    test_reference_mode_needs_a_base_url()
+    test_empty_image_encodes_to_nothing()
+    test_encoding_peak_memory()
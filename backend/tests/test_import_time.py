@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Startup budget: the entry modules must import quickly and load no backends
+
+Processor and gateway dependencies (tensorzero, requests, bs4, httpx) are
+imported when a source or call first needs them, not at startup. Override
+the time budget with CONTENT_MAKER_IMPORT_BUDGET_MS on slow machines.
+"""
+
+import os
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(__file__), '..', 'src')
+ENTRY_MODULES = (
+    "content_maker.core.main", "content_maker.core.batch", "content_maker.core.server", "content_maker.core.watch",
+)
+DEFERRED_MODULES = ("tensorzero", "requests", "bs4", "httpx")
+IMPORT_BUDGET_MS = float(os.getenv("CONTENT_MAKER_IMPORT_BUDGET_MS", "200"))
+RUNS = 3
+
+
+def import_in_subprocess(module, *flags):
+    code = (
+        f"import sys; sys.path.insert(0, {os.path.abspath(SRC_DIR)!r}); import {module}; "
+        f"print(','.join(name for name in {DEFERRED_MODULES!r} if name in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, *flags, "-c", code], capture_output=True, text=True, check=True)
+    return result.stdout.strip(), result.stderr
+
+
+def cumulative_import_ms(importtime_output, module):
+    """Cumulative time for a top-level import, from `python -X importtime` output"""
+    for line in importtime_output.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1000
+    raise AssertionError(f"{module} not found in -X importtime output")
+
+
+def test_backends_are_not_imported_at_startup():
+    for module in ENTRY_MODULES:
+        loaded, _ = import_in_subprocess(module)
+        print(f"📦 {module}: {loaded or 'no backends loaded'}")
+        assert loaded == "", f"{module} imports {loaded} at startup"
+    print("✅ No processor or gateway backend is imported at startup")
+
+
+def test_import_time_budget():
+    for module in ENTRY_MODULES:
+        # Best of a few runs; the first may also be compiling bytecode
+        elapsed = min(
+            cumulative_import_ms(import_in_subprocess(module, "-X", "importtime")[1], module)
+            for _ in range(RUNS)
+        )
+        print(f"⏱️  {module}: {elapsed:.1f} ms (budget {IMPORT_BUDGET_MS:.0f} ms)")
+        assert elapsed <= IMPORT_BUDGET_MS, f"{module} took {elapsed:.1f} ms to import"
+    print("✅ Entry modules import within budget")
+
+
+if __name__ == "__main__":
+    test_backends_are_not_imported_at_startup()
+    test_import_time_budget()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test script for the local inference result cache
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from content_maker.core.inference_cache import InferenceCache
+
+CONFIG_FILE = os.path.join(os.path.dirname(__file__), '..', 'config', 'tensorzero.toml')
+
+ARGUMENTS = {
+    "input": "Gardening as a philosophy",
+    "sources": [{"type": "text", "contents": "Digital gardens grow slowly."}]
+}
+
+RESULT = {
+    "episode_id": "0192ced0-947e-74b3-a3d7-02fd2c54d637",
+    "inference_id": "0192ced0-947e-74b3-a3d7-02fd2c54d638",
+    "variant_name": "claude_sonnet",
+    "raw": '{"threads": [], "summary": "Nothing yet"}',
+    "parsed": {"threads": [], "summary": "Nothing yet"},
+}
+
+
+def make_cache(**kwargs):
+    path = os.path.join(tempfile.mkdtemp(), "cache.sqlite")
+    return InferenceCache(path=path, config_file=CONFIG_FILE, **kwargs)
+
+
+def test_cache_round_trip():
+    """A stored result is served back for equal arguments in any key order"""
+    cache = make_cache()
+    assert cache.get("thread_ideas", ARGUMENTS) is None
+
+    cache.put("thread_ideas", ARGUMENTS, RESULT)
+    reordered = {"sources": ARGUMENTS["sources"], "input": ARGUMENTS["input"]}
+    hit = cache.get("thread_ideas", reordered)
+
+    print(f"📦 Cached result: {hit}")
+    assert hit["cached"] is True
+    assert hit["parsed"] == RESULT["parsed"]
+    assert cache.get("thread_ideas", {**ARGUMENTS, "input": "Something else"}) is None
+
+
+def test_key_depends_on_variant_and_function():
+    cache = make_cache()
+    base = cache.key("thread_ideas", ARGUMENTS)
+    assert cache.key("thread_ideas", ARGUMENTS, "gpt_4o_mini") != base
+    assert cache.key("synthesise_content", ARGUMENTS) != base
+
+
+def test_ttl_and_opt_out():
+    """TTL 0 disables caching for a function; synthesis is off by default"""
+    cache = make_cache(ttls={"thread_ideas": 0})
+    cache.put("thread_ideas", ARGUMENTS, RESULT)
+    assert len(cache) == 0
+
+    cache = make_cache()
+    cache.put("synthesise_content", ARGUMENTS, RESULT)
+    assert cache.get("synthesise_content", ARGUMENTS) is None
+
+
+def test_size_bound():
+    """Only the most recently used max_entries results are kept"""
+    cache = make_cache(max_entries=3)
+    for i in range(5):
+        cache.put("thread_ideas", {**ARGUMENTS, "input": f"question {i}"}, RESULT)
+
+    print(f"📊 Entries after 5 puts: {len(cache)}")
+    assert len(cache) == 3
+    assert cache.get("thread_ideas", {**ARGUMENTS, "input": "question 0"}) is None
+    assert cache.get("thread_ideas", {**ARGUMENTS, "input": "question 4"}) is not None
+
+
+if __name__ == "__main__":
+    test_cache_round_trip()
+    test_key_depends_on_variant_and_function()
+    test_ttl_and_opt_out()
+    test_size_bound()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test script for tracing spans and their exporters
+"""
+
+import json
+import os
+import sys
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from content_maker.core.instrumentation import Tracer
+
+
+def test_spans_become_trace_events_and_metrics():
+    tracer = Tracer()
+    with tracer.span("fetch", url="https://example.com") as fetch_span:
+        fetch_span.set(bytes=2048, chars=512)
+    with tracer.span("inference.thread_ideas", cache_hit=True):
+        pass
+    try:
+        with tracer.span("fetch"):
+            raise TimeoutError("slow")
+    except TimeoutError:
+        pass
+
+    trace = tracer.chrome_trace()
+    print(f"🧵 Events: {[event['name'] for event in trace['traceEvents']]}")
+    first = trace["traceEvents"][0]
+    assert first["ph"] == "X" and first["args"]["bytes"] == 2048
+    assert trace["traceEvents"][2]["args"]["status"] == "error"
+
+    metrics = tracer.metrics["fetch"]
+    assert metrics["count"] == 2 and metrics["errors"] == 1 and metrics["bytes"] == 2048
+    assert tracer.metrics["inference.thread_ideas"]["cache_hits"] == 1
+
+
+def test_prometheus_text():
+    tracer = Tracer()
+    for _ in range(3):
+        with tracer.span("stage.process"):
+            pass
+
+    text = tracer.prometheus_text()
+    print(text)
+    assert '# TYPE content_maker_span_seconds histogram' in text
+    assert 'content_maker_span_seconds_bucket{span="stage.process",le="+Inf"} 3' in text
+    assert 'content_maker_span_seconds_count{span="stage.process"} 3' in text
+    assert 'content_maker_span_errors_total{span="stage.process"} 0' in text
+
+
+def test_export():
+    tracer = Tracer()
+    with tracer.span("stage.ingest"):
+        pass
+
+    directory = tempfile.mkdtemp()
+    tracer.export(directory)
+    with open(os.path.join(directory, "trace.json"), encoding="utf-8") as f:
+        assert json.load(f)["traceEvents"][0]["name"] == "stage.ingest"
+    assert os.path.exists(os.path.join(directory, "metrics.prom"))
+
+
+if __name__ == "__main__":
+    test_spans_become_trace_events_and_metrics()
+    test_prometheus_text()
+    test_export()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Tests for the ingestion job queue and its workers
+"""
+
+import os
+import sys
+import tempfile
+import time
+import urllib.error
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+sys.path.append(os.path.dirname(__file__))
+import argparse
+from content_maker.core.jobs import (
+    JobQueue, QueueBroker, RemoteJobQueue, SourceWorker, enqueue_directory, job_generation, job_options,
+    process_sources,
+)
+from content_maker.processors.crawler import add_crawl_arguments
+from content_maker.processors.source_detector import SmartSourceDetector
+from fixtures import FixtureServer
+
+
+def make_sources(directory, base_url, files=12):
+    for i in range(files):
+        with open(os.path.join(directory, f"note_{i:02d}.txt"), "w", encoding="utf-8") as f:
+            f.write(f"Note {i} about digital gardens and how small notes compound into ideas.")
+    with open(os.path.join(directory, "links.txt"), "w", encoding="utf-8") as f:
+        f.write(f"Reading list: {base_url}/page/1 and {base_url}/page/2 and {base_url}/missing")
+
+
+def test_leases_retries_and_dead_letters():
+    queue = JobQueue(os.path.join(tempfile.mkdtemp(), "jobs.sqlite3"), retry_base_s=0)
+    first = queue.enqueue("file", {"path": "a.txt"}, key="a")
+    assert queue.enqueue("file", {"path": "a.txt"}, key="a") == first
+    queue.enqueue("file", {"path": "b.txt"}, key="b", max_attempts=2)
+
+    job = queue.lease("worker-1")
+    assert job['id'] == first and job['attempts'] == 1
+    failing = queue.lease("worker-2")
+    assert failing['key'] == "b"
+    assert queue.lease("worker-3") is None
+
+    # Failures retry until max_attempts, then the job is dead-lettered
+    assert queue.complete(job, {"sources": []})
+    assert queue.fail(failing, "boom") == 'pending'
+    retried = queue.lease("worker-2")
+    assert retried['attempts'] == 2
+    assert queue.fail(retried, "boom again") == 'dead'
+    assert [job['key'] for job in queue.dead_letters()] == ["b"]
+    assert queue.counts() == {'done': 1, 'dead': 1} and queue.drained()
+
+    assert queue.retry_dead() == 1
+    assert queue.lease("worker-2")['attempts'] == 1
+    print("✅ Jobs lease once, retry, dead-letter and re-queue")
+
+
+def test_expired_lease_moves_to_another_worker():
+    queue = JobQueue(os.path.join(tempfile.mkdtemp(), "jobs.sqlite3"))
+    queue.enqueue("file", {"path": "slow.txt"})
+    stalled = queue.lease("worker-1", lease_s=0.05)
+    time.sleep(0.1)
+
+    taken = queue.lease("worker-2")
+    assert taken['id'] == stalled['id'] and taken['lease_owner'] == "worker-2"
+    # The first worker's late result and renewals are refused
+    assert not queue.extend(stalled)
+    assert not queue.complete(stalled, {"sources": []})
+    assert queue.complete(taken, {"sources": []})
+    print("✅ Expired leases are handed on and the old owner is fenced off")
+
+
+def test_job_keys_follow_options_and_age():
+    sources_dir = tempfile.mkdtemp()
+    make_sources(sources_dir, "http://localhost", files=1)
+    queue = JobQueue(os.path.join(tempfile.mkdtemp(), "jobs.sqlite3"))
+    parser = argparse.ArgumentParser()
+    add_crawl_arguments(parser)
+    plain, crawled = job_options(parser.parse_args([]), "gardens"), job_options(parser.parse_args(["--crawl"]), "gardens")
+    assert plain == {} and crawled["question"] == "gardens"
+
+    keys = enqueue_directory(queue, sources_dir, plain)
+    assert enqueue_directory(queue, sources_dir, plain) == keys
+    # A crawled run never gets the plain run's results back, nor the other way round
+    assert not set(enqueue_directory(queue, sources_dir, crawled)) & set(keys)
+    assert queue.counts() == {'pending': 4}
+
+    # Results age out: the next window's keys are new jobs
+    assert job_generation(3600, now=7199) == 1 and job_generation(3600, now=7200) == 2
+    assert job_generation(0) == 0
+    print("✅ File job keys change with crawl options and age out")
+
+
+def test_workers_match_in_process_detection():
+    sources_dir = tempfile.mkdtemp()
+    queue_path = os.path.join(tempfile.mkdtemp(), "jobs.sqlite3")
+    with FixtureServer(page_words=200) as server:
+        make_sources(sources_dir, server.base_url)
+        expected = SmartSourceDetector().process_sources_directory(sources_dir)
+
+        started = time.perf_counter()
+        sources = process_sources(sources_dir, workers=2, queue_location=queue_path)
+        print(f"⏱️  2 worker processes: {time.perf_counter() - started:.2f}s")
+
+    # Sorted: the URLs within a file come back in set order, which differs between processes
+    key = lambda source: (source['contents'], source.get('source_url') or "")
+    assert sorted(sources, key=key) == sorted(expected, key=key)
+    counts = JobQueue(queue_path).counts()
+    # 13 files plus one job per link
+    assert counts == {'done': 16}, counts
+
+    # Unchanged files are not processed again
+    assert len(process_sources(sources_dir, workers=1, queue_location=queue_path)) == len(sources)
+    assert JobQueue(queue_path).counts() == {'done': 16}
+    print("✅ Worker processes produce the same sources as in-process detection")
+
+
+def test_crawl_budget_is_shared_by_workers():
+    from test_crawler import HUB_PAGE
+    sources_dir = tempfile.mkdtemp()
+    queue_path = os.path.join(tempfile.mkdtemp(), "jobs.sqlite3")
+    parser = argparse.ArgumentParser()
+    add_crawl_arguments(parser)
+    args = parser.parse_args(["--crawl", "--crawl-pages", "2", "--crawl-exclude", "/private/"])
+    with FixtureServer(page_words=200, pages={"/hub": HUB_PAGE, "/hub2": HUB_PAGE}) as server:
+        for name in ("hub", "hub2"):
+            with open(os.path.join(sources_dir, f"{name}.txt"), "w", encoding="utf-8") as f:
+                f.write(f"Start from {server.base_url}/{name}")
+        sources = process_sources(sources_dir, workers=2, queue_location=queue_path, crawl_args=args,
+                                  question="What is the history of digital gardens?")
+        # Two seeds and two followed pages for the whole run, not two per worker
+        assert server.requests <= 4, server.requests
+        queue = JobQueue(queue_path)
+        assert queue.is_seen(f"{server.base_url}/hub") and not queue.is_seen(f"{server.base_url}/page/2")
+    assert len(sources) == 4
+    assert queue.take("crawl:demo", 1) and not queue.take("crawl:demo", 1)
+    print("✅ Crawling workers share one page budget and seen-URL set")
+
+
+def test_file_jobs_carry_their_contents():
+    sources_dir = tempfile.mkdtemp()
+    queue = JobQueue(os.path.join(tempfile.mkdtemp(), "jobs.sqlite3"))
+    make_sources(sources_dir, "http://localhost", files=1)
+    outside = os.path.join(tempfile.mkdtemp(), "secret.txt")
+    with open(outside, "w", encoding="utf-8") as f:
+        f.write("not a source")
+    os.symlink(outside, os.path.join(sources_dir, "escape.txt"))
+
+    keys = enqueue_directory(queue, sources_dir)
+    assert len(keys) == 2 and not any("escape" in key for key in keys)
+    # The worker processes what was queued, even once the file is gone from the sources directory
+    os.remove(os.path.join(sources_dir, "note_00.txt"))
+    worker = SourceWorker(queue, worker_id="w")
+    while worker.run_one():
+        pass
+    note = queue.get_by_key(next(key for key in keys if "note_00" in key))
+    assert note['status'] == 'done' and "Note 0 about digital gardens" in note['result']['sources'][0]['contents']
+
+    # A job naming a path instead of carrying a file is refused
+    queue.enqueue("file", {"path": outside}, key="by-path")
+    queue.enqueue("file", {"name": "../secret.txt", "data": ""}, key="traversal", max_attempts=1)
+    worker.run_one(), worker.run_one()
+    assert queue.get_by_key("traversal")['status'] == 'dead'
+    assert "does not carry a source file" in queue.get_by_key("by-path")['error']
+    print("✅ File jobs carry the file, and paths outside the sources directory are refused")
+
+
+def test_broker_requires_token():
+    queue = JobQueue(os.path.join(tempfile.mkdtemp(), "jobs.sqlite3"))
+    try:
+        QueueBroker(queue, host="0.0.0.0", port=0, token="")
+        assert False, "a broker on a public address needs a token"
+    except ValueError:
+        pass
+    with QueueBroker(queue, port=0, token="s3cret") as broker:
+        assert RemoteJobQueue(broker.url, token="s3cret").counts() == {}
+        for token in ("", "wrong"):
+            try:
+                RemoteJobQueue(broker.url, token=token).counts()
+                assert False, "calls without the token are refused"
+            except urllib.error.HTTPError as e:
+                assert e.code == 401
+    print("✅ The broker refuses calls without the shared token")
+
+
+def test_remote_workers_through_broker():
+    sources_dir = tempfile.mkdtemp()
+    queue = JobQueue(os.path.join(tempfile.mkdtemp(), "jobs.sqlite3"))
+    with FixtureServer(page_words=200) as server, QueueBroker(queue, port=0) as broker:
+        make_sources(sources_dir, server.base_url, files=3)
+        remote = RemoteJobQueue(broker.url)
+        sources = process_sources(sources_dir, workers=1, queue_location=broker.url)
+        assert remote.counts() == {'done': 7}
+        assert remote.drained()
+        worker = SourceWorker(remote, worker_id="idle")
+        assert not worker.run_one()
+    assert len(sources) == 6
+    print("✅ Workers drain a queue served by the broker")
+
+
+if __name__ == "__main__":
+    test_leases_retries_and_dead_letters()
+    test_expired_lease_moves_to_another_worker()
+    test_job_keys_follow_options_and_age()
+    test_workers_match_in_process_detection()
+    test_crawl_budget_is_shared_by_workers()
+    test_file_jobs_carry_their_contents()
+    test_broker_requires_token()
+    test_remote_workers_through_broker()
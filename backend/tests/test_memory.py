@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Test script for memory-bounded source handling and per-stage memory accounting
+"""
+
+import os
+import sys
+import tempfile
+import tracemalloc
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+from content_maker.core.checkpoint import RunCheckpoint
+from content_maker.core.memory import MemoryTracker, SourceSpill
+from content_maker.core.pipeline import build_sources
+import random
+from content_maker.core.retriever import ChunkIndex, StreamingChunkIndex, chunk_sources
+from content_maker.core.summariser import SourceSummariser
+from fixtures import FakeGateway
+
+
+def make_sources(count, chars=100):
+    return [{"type": "text", "contents": f"{i} " + "x" * chars} for i in range(count)]
+
+
+def test_spill_over_budget():
+    sources = make_sources(10)
+    spill_dir = tempfile.mkdtemp()
+    spill = SourceSpill.collect(iter(sources), budget_bytes=350, spill_dir=spill_dir)
+
+    print(f"💾 {len(spill.in_memory)} in memory, {spill.spilled} spilled")
+    assert len(spill) == 10
+    assert len(spill.in_memory) == 3
+    assert spill.spilled == 7
+    # Order is preserved and a spill can be read more than once
+    assert list(spill) == sources
+    assert list(spill) == sources
+    assert len(os.listdir(spill_dir)) == 1
+
+    spill.close()
+    assert os.listdir(spill_dir) == []
+    print("✅ Sources past the budget spill to disk and read back in order")
+
+
+def test_streamed_stages():
+    sources = make_sources(5, chars=5000)
+    spill = SourceSpill.collect(sources, budget_bytes=6000, spill_dir=tempfile.mkdtemp())
+
+    # Checkpointed line by line and resumed without loading a list
+    checkpoint = RunCheckpoint.new("abc123", tempfile.mkdtemp())
+    checkpoint.save_lines("process", spill)
+    resumed = RunCheckpoint(checkpoint.run_id, "abc123", checkpoint.root)
+    assert list(resumed.load_lines("process")) == sources
+    assert resumed.load_lines("summarise") is None
+
+    summariser = SourceSummariser(FakeGateway(), min_chars=1000, max_workers=2)
+    summarised = list(summariser.iter_summarised(spill))
+    assert len(summarised) == 5
+    assert all(source["contents"].startswith("Summary:") for source in summarised)
+
+    # The fake summaries are identical, so they chunk to one prompt source
+    cleaned = build_sources(chunk_sources(iter(summarised)))
+    assert cleaned == [{"type": "text", "contents": summarised[0]["contents"]}]
+    spill.close()
+    print("✅ Streamed stages checkpoint, summarise and build prompts")
+
+
+def test_streamed_retrieval_matches_index():
+    rng = random.Random(3)
+    words = "garden notes history digital blog link idea seed prune evergreen video hook".split()
+    sources = [
+        {"type": "text", "contents": " ".join(rng.choice(words) for _ in range(rng.randint(5, 1200)))}
+        for _ in range(400)
+    ]
+    spill = SourceSpill.collect(sources, budget_bytes=20000, spill_dir=tempfile.mkdtemp())
+    queries = ["history of digital gardens", "evergreen notes and links", "video hook"]
+    expected = ChunkIndex(chunk_sources(spill)).multi_search(queries, top_k=6)
+
+    tracemalloc.start()
+    try:
+        streamed = StreamingChunkIndex(lambda: chunk_sources(spill)).multi_search(queries, top_k=6)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert streamed == expected and streamed
+    # The spill is far larger than what ranking holds: a few dozen chunks, not all of them
+    total = sum(len(source["contents"]) for source in sources)
+    print(f"🔎 Streamed retrieval peak {peak / 1e3:.0f}KB over {total / 1e3:.0f}KB of sources")
+    assert peak < total / 2
+    spill.close()
+    print("✅ Retrieval over a spill keeps only the best chunks and matches the in-memory index")
+
+
+def test_stage_peaks():
+    tracker = MemoryTracker()
+    tracker.start()
+    try:
+        with tracker.stage("big") as stats:
+            blob = bytearray(8 * 2**20)
+            del blob
+        with tracker.stage("small"):
+            pass
+    finally:
+        tracemalloc.stop()
+
+    print(f"🧠 big peak {tracker.stages['big']['peak_bytes'] / 2**20:.1f} MiB")
+    assert stats["peak_bytes"] >= 8 * 2**20
+    assert tracker.stages["small"]["peak_bytes"] < 8 * 2**20
+    assert stats["top"]
+    print("✅ Peaks are recorded per stage")
+
+
+if __name__ == "__main__":
+    test_spill_over_budget()
+    test_streamed_stages()
+    test_streamed_retrieval_matches_index()
+    test_stage_peaks()
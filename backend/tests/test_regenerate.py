@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test script for the interactive regenerate loop
+"""
+
+import json
+import os
+import sys
+from types import SimpleNamespace
+from uuid import uuid4
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+from content_maker.core import regenerate
+from fixtures import SCRIPT_OUTPUT, THREADS_OUTPUT
+
+EPISODE_ID = "0192ced0-947e-74b3-a3d7-02fd2c54d637"
+
+
+class StreamingClient:
+    """Streams SCRIPT_OUTPUT in pieces; the calls numbered in `failing` raise partway through"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+
+    def inference(self, function_name=None, input=None, episode_id=None, stream=False, **kwargs):
+        self.calls.append(input)
+        call = len(self.calls)
+        raw = json.dumps(SCRIPT_OUTPUT)
+        inference_id = uuid4()
+        for start in range(0, len(raw), 40):
+            if call in self.failing and start:
+                raise ConnectionError("stream dropped")
+            yield SimpleNamespace(episode_id=episode_id, inference_id=inference_id, variant_name="fixture",
+                                  raw=raw[start:start + 40])
+
+
+def run_loop(client, answers):
+    """regenerate_loop with input() answering from a script"""
+    answers = iter(answers)
+    regenerate.input = lambda prompt="": next(answers)
+    try:
+        first = {"choice": "1", "instructions": "", "response": {"parsed": SCRIPT_OUTPUT}}
+        return regenerate.regenerate_loop(client, "Why gardens?", [], THREADS_OUTPUT, EPISODE_ID, first)
+    finally:
+        del regenerate.input
+
+
+def test_versions_are_collected():
+    client = StreamingClient()
+    outputs = run_loop(client, ["t", "2", "i", "shorter", "x", "c", ""])
+    assert [(output["choice"], output["instructions"]) for output in outputs] == [
+        ("1", ""), ("2", ""), ("2", "shorter"),
+    ]
+    assert all(output["response"]["parsed"] == SCRIPT_OUTPUT for output in outputs)
+    assert outputs[2]["response"]["episode_id"] == EPISODE_ID
+    # Each regeneration is one call on the threads already in memory
+    assert len(client.calls) == 2
+    print("✅ Each regeneration adds a version under the same episode")
+
+
+def test_failed_regeneration_keeps_earlier_versions():
+    client = StreamingClient(failing={2})
+    outputs = run_loop(client, ["t", "2", "t", "all", "i", "again", ""])
+    # The failed 'all' version is reported and skipped; the next one starts from version 2
+    assert [(output["choice"], output["instructions"]) for output in outputs] == [
+        ("1", ""), ("2", ""), ("2", "again"),
+    ]
+    assert len(client.calls) == 3
+    print("✅ A failed regeneration leaves the loop and earlier versions intact")
+
+
+if __name__ == "__main__":
+    test_versions_are_collected()
+    test_failed_regeneration_keeps_earlier_versions()
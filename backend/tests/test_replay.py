@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Tests for recording gateway calls and replaying them offline
+"""
+
+import asyncio
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+from content_maker.core.replay import AsyncReplayGateway, LatencyModel, RecordingGateway, ReplayGateway, ReplayStore
+from fixtures import FUNCTION_OUTPUTS, FakeGateway
+from load import fixture_store, offline_sources, percentile, run_load
+
+SOURCES_DIR = os.path.join(os.path.dirname(__file__), '..', 'sources')
+
+
+def test_record_then_replay():
+    store_path = os.path.join(tempfile.mkdtemp(), "replay.jsonl")
+    recorder = RecordingGateway(FakeGateway(), ReplayStore(store_path))
+    request = {"function_name": "thread_ideas", "input": {"messages": [{"role": "user", "content": "q"}]}}
+    recorded = recorder.inference(**request)
+    recorder.inference(model_name="openai::gpt-4o-mini", input={"messages": []})
+
+    # A fresh store reads the file back; the episode id is not part of the key
+    replay = ReplayGateway(ReplayStore(store_path), LatencyModel("none"))
+    response = replay.inference(episode_id=recorded.episode_id, **request)
+    assert response.output.parsed == FUNCTION_OUTPUTS["thread_ideas"]
+    assert response.episode_id == recorded.episode_id
+
+    # Unseen inputs fall back to another recording for the same function, unless strict
+    other = {"function_name": "thread_ideas", "input": {"messages": [{"role": "user", "content": "new"}]}}
+    assert replay.inference(**other).output.parsed == FUNCTION_OUTPUTS["thread_ideas"]
+    strict = ReplayGateway(ReplayStore(store_path), LatencyModel("none"), strict=True)
+    try:
+        strict.inference(**other)
+        assert False, "strict replay should not fall back"
+    except KeyError:
+        pass
+
+    # Streaming yields the recorded raw JSON in chunks, usage on the last one
+    chunks = list(replay.inference(stream=True, **request))
+    assert json.loads("".join(chunk.raw for chunk in chunks)) == FUNCTION_OUTPUTS["thread_ideas"]
+    assert chunks[-1].usage is not None
+
+    image = replay.inference(model_name="openai::gpt-4o-mini", input={"messages": []})
+    assert image.content[0].text
+
+    # The async gateway streams the same chunks
+    async def stream_async():
+        gateway = AsyncReplayGateway(ReplayStore(store_path), LatencyModel("fixed:0.02"))
+        return [chunk async for chunk in await gateway.inference(stream=True, **request)]
+    async_chunks = asyncio.run(stream_async())
+    assert [chunk.raw for chunk in async_chunks] == [chunk.raw for chunk in chunks]
+    assert async_chunks[-1].usage is not None and async_chunks[0].usage is None
+    print("✅ Recorded calls replay, with fallback and streaming")
+
+
+def test_latency_models():
+    recording = {"latency_s": 2.0}
+    assert LatencyModel("recorded").sample(recording) == 2.0
+    assert LatencyModel("recorded:0.5").sample(recording) == 1.0
+    assert LatencyModel("none").sample(recording) == 0.0
+    assert LatencyModel("fixed:0.25").sample(recording) == 0.25
+    assert all(1 <= LatencyModel("uniform:1,2", seed=i).sample(recording) <= 2 for i in range(20))
+
+    # Nearest rank: the smallest value with at least q% of the samples at or below it
+    assert percentile(list(range(1, 11)), 50) == 5
+    assert percentile(list(range(1, 101)), 99) == 99
+    assert percentile(list(range(1, 101)), 100) == 100 and percentile([3], 50) == 3
+
+    samples = [LatencyModel("lognormal:1,0.5", seed=i).sample(recording) for i in range(200)]
+    assert 0.8 < percentile(samples, 50) < 1.25
+    assert percentile(samples, 99) > percentile(samples, 50)
+
+    for spec in ("gaussian:1", "fixed", "uniform:1"):
+        try:
+            LatencyModel(spec)
+            assert False, f"{spec} should be rejected"
+        except ValueError:
+            pass
+
+    store = fixture_store(latency_s=0.05)
+    started = time.perf_counter()
+    ReplayGateway(store, LatencyModel("recorded")).inference(function_name="thread_ideas", input={})
+    assert time.perf_counter() - started >= 0.05
+    print("✅ Latency specs sample as described")
+
+
+def test_load_driver():
+    # Only text sources, so processing makes no network calls
+    sources_dir = tempfile.mkdtemp()
+    for name in ("input.json", "article1.json"):
+        shutil.copy(os.path.join(SOURCES_DIR, name), sources_dir)
+
+    try:
+        report = run_load(fixture_store(), sources_dir, requests=12, concurrency=4, latency="fixed:0.02", seed=1)
+    finally:
+        shutil.rmtree(sources_dir, ignore_errors=True)
+
+    assert report["statuses"] == {"success": 12}
+    assert report["latency_s"]["count"] == 12
+    assert report["latency_s"]["p50"] <= report["latency_s"]["p95"] <= report["latency_s"]["p99"]
+    assert report["throughput_rps"] > 0
+    # Each request threads then synthesises, so at least two replayed calls of 20ms
+    assert report["latency_s"]["p50"] >= 0.04
+    assert report["spans"]["inference.thread_ideas"]["count"] >= 12
+    print(f"✅ Load driver: {report['throughput_rps']:.1f} req/s")
+
+
+def test_load_driver_generates_an_offline_corpus():
+    report = run_load(fixture_store(latency_s=0.01), requests=4, concurrency=4, latency="none",
+                      seed=1, corpus_size="tiny")
+    assert report["statuses"] == {"success": 4}
+
+    with offline_sources(ReplayGateway(fixture_store(), LatencyModel("none")), corpus_size="tiny") as (index, folder):
+        assert os.path.exists(os.path.join(folder, "input.json"))
+        urls = {chunk.get("source_url") for chunk in index.chunks}
+    # The corpus's webpages and docs were fetched, from the fixture server rather than the internet
+    assert any(url and url.startswith("http://127.0.0.1:") for url in urls)
+    assert any(url and "docs.google.com/document/d/bench-doc-" in url for url in urls)
+    assert not os.path.exists(folder)
+    print("✅ Without --sources the load driver runs over a generated corpus and the fixture server")
+
+
+if __name__ == "__main__":
+    test_record_then_replay()
+    test_latency_models()
+    test_load_driver()
+    test_load_driver_generates_an_offline_corpus()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Tests for multi-query retrieval with rank fusion and MMR
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+from content_maker.core.inference_cache import InferenceCache
+from content_maker.core.pipeline import build_sources
+from content_maker.core.research import DEFAULT_TOP_K, generate_queries, retrieve_chunks
+from content_maker.core.retriever import ChunkIndex, StreamingChunkIndex, chunk_sources, mmr, reciprocal_rank_fusion
+from content_maker.core.source import Source
+from fixtures import FakeGateway
+
+CONFIG_FILE = os.path.join(os.path.dirname(__file__), '..', 'config', 'tensorzero.toml')
+
+QUESTION = ("So I was thinking it would be really cool to make a video about how digital gardens started, "
+            "like the history of them, and maybe something about how people link their notes together")
+
+CHUNKS = [
+    "Weekly meal planning saves time and money when you cook in batches.",
+    "The history of digital gardens goes back to Mark Bernstein's 1998 essay on hypertext gardens.",
+    "The history of digital gardens goes back to Mark Bernstein's 1998 essay on hypertext gardens, reposted.",
+    "Bidirectional links let each note show which other notes point to it, so ideas connect over time.",
+    "Public notebooks are never finished; they grow in small edits instead of one big launch.",
+    "It would be really cool to think about video ideas, maybe something people like.",
+]
+
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "a"], ["b"]])
+    assert [item for item, _ in fused] == ["b", "a", "c"]
+    assert fused[0][1] == 1 / 62 + 1 / 61 + 1 / 61
+    print("✅ RRF rewards items ranked well by several queries")
+
+
+def test_mmr_drops_near_duplicates():
+    texts = {0: "garden history essay hypertext", 1: "garden history essay hypertext copy", 2: "linking notes backlinks"}
+    assert mmr([(0, 1.0), (1, 0.95), (2, 0.6)], texts, top_k=2) == [0, 2]
+    assert mmr([(0, 1.0), (1, 0.95), (2, 0.6)], texts, top_k=2, diversity=0.0) == [0, 1]
+    print("✅ MMR trades a near-duplicate for a different relevant chunk")
+
+
+def test_multi_search_beats_keyword_scan():
+    index = ChunkIndex(CHUNKS)
+    queries = [QUESTION, "digital garden history", "linking notes together", "public notebooks"]
+    results = index.multi_search(queries, top_k=3)
+    print(f"🔎 Multi-query: {[CHUNKS.index(chunk) for chunk in results]}")
+
+    # A keyword scan takes the first chunks sharing any word with the rambling question
+    keyword = [chunk for chunk in CHUNKS if any(word in chunk.lower() for word in QUESTION.lower().split())][:3]
+    assert CHUNKS[0] in keyword
+
+    assert CHUNKS[1] in results and CHUNKS[3] in results
+    assert CHUNKS[2] not in results, "near-duplicate should be diversified away"
+    assert CHUNKS[0] not in results and CHUNKS[5] not in results
+    assert index.multi_search(["zzz qqq"]) == []
+    print("✅ Multi-query retrieval returns relevant, diverse chunks")
+
+
+def test_no_content_words_falls_back_to_leading_chunks():
+    queries = ["why is it so?", "and the"]
+    assert ChunkIndex(CHUNKS).multi_search(queries, top_k=2) == CHUNKS[:2]
+    assert StreamingChunkIndex(lambda: iter(CHUNKS)).multi_search(queries, top_k=2) == CHUNKS[:2]
+    assert retrieve_chunks(None, "what is it?", ChunkIndex(CHUNKS), top_k=3) == CHUNKS[:3]
+    print("✅ Queries with only stopwords still get the leading chunks")
+
+
+def test_generate_queries_is_cached_per_question():
+    client = FakeGateway()
+    cache = InferenceCache(path=os.path.join(tempfile.mkdtemp(), "cache.sqlite"), config_file=CONFIG_FILE)
+    queries = generate_queries(client, QUESTION, count=2, cache=cache)
+    assert queries == [QUESTION, "digital garden history", "note linking habits"]
+    assert generate_queries(client, QUESTION, count=2, cache=cache) == queries
+    assert client.calls == 1
+
+    # A failed generation falls back to the question alone
+    class Broken:
+        def inference(self, **kwargs):
+            raise RuntimeError("gateway down")
+    assert generate_queries(Broken(), QUESTION) == [QUESTION]
+
+    index = ChunkIndex(CHUNKS)
+    assert retrieve_chunks(None, QUESTION, index, top_k=3) == index.multi_search([QUESTION], top_k=3)
+    assert len(retrieve_chunks(client, QUESTION, index, query_count=3, cache=cache, top_k=3)) == 3
+    print("✅ Research queries are generated once per question")
+
+
+def test_processed_sources_compete_for_the_prompt():
+    long_page = " ".join(f"Digital garden history, part {i}." for i in range(300))
+    processed = [
+        Source("text", "My notes: digital garden history and linking notes together."),
+        Source("image", "Image analysis: a hand-drawn map of a digital garden with linked notes."),
+        Source("text", long_page, source_url="https://example.com/history", source_title="History"),
+        # A pasted link list: dozens of scraped pages with nothing to do with the question
+        *(Source("text", f"Page {i}: weeknight pasta recipes and tax season tips.", source_url=f"https://example.com/{i}")
+          for i in range(40)),
+        Source("text", "My notes: digital garden history and linking notes together."),
+    ]
+    index = ChunkIndex(chunk_sources(processed))
+    # The long page splits into chunks that keep its URL; the repeated note is indexed once
+    assert len(index) == 2 + 3 + 40
+    assert index.chunks[2]["source_url"] == "https://example.com/history"
+
+    sources = build_sources(retrieve_chunks(None, QUESTION, index))
+    print(f"🧮 {len(processed)} processed sources -> {len(sources)} prompt chunk(s)")
+    assert 0 < len(sources) <= DEFAULT_TOP_K
+    assert all("pasta" not in source["contents"] for source in sources)
+    assert {"type": "image", "contents": processed[1]["contents"]} in sources
+    print("✅ Only the top-ranked chunks of every source type reach thread_ideas")
+
+
+if __name__ == "__main__":
+    test_reciprocal_rank_fusion()
+    test_mmr_drops_near_duplicates()
+    test_multi_search_beats_keyword_scan()
+    test_no_content_words_falls_back_to_leading_chunks()
+    test_generate_queries_is_cached_per_question()
+    test_processed_sources_compete_for_the_prompt()
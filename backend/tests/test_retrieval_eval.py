@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Tests for the retrieval quality and latency evaluation
+"""
+
+import json
+import os
+import sys
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+from retrieval_eval import (
+    RETRIEVERS, compare, comparison_table, load_labelled_set, main, ndcg_at_k, recall_at_k, reciprocal_rank,
+    run_eval, synthetic_set,
+)
+
+
+def test_metrics():
+    relevant = {"a", "b"}
+    assert recall_at_k(["x", "a", "y"], relevant) == 0.5
+    assert reciprocal_rank(["x", "a", "b"], relevant) == 0.5
+    assert reciprocal_rank(["x", "y"], relevant) == 0.0
+    assert ndcg_at_k(["a", "b", "x"], relevant, 3) == 1.0
+    assert 0 < ndcg_at_k(["x", "a", "b"], relevant, 3) < ndcg_at_k(["a", "x", "b"], relevant, 3) < 1
+    print("✅ recall@k, MRR and nDCG@k match hand-computed values")
+
+
+def test_bundled_set_ranks_retrievers():
+    report = run_eval(load_labelled_set(), k=3, repeat=1)
+    print(comparison_table(report))
+    assert set(report["results"]) == set(RETRIEVERS)
+    results = report["results"]
+    assert all(metrics["p50_s"] <= metrics["p99_s"] for metrics in results.values())
+    assert all(metrics["build_s"] >= 0 and metrics["memory_bytes"] >= 0 for metrics in results.values())
+    # The keyword scan takes the first chunks sharing any word; ranking should find the labelled ones
+    assert results["ranked"]["ndcg"] > results["keyword_scan"]["ndcg"]
+    assert results["ranked"]["recall"] > results["keyword_scan"]["recall"]
+    assert results["ranked"]["mrr"] == 1.0
+
+    worse = json.loads(json.dumps(report))
+    worse["results"]["ranked"]["recall"] -= 0.2
+    assert compare(report, worse) == ["ranked recall"]
+    assert compare(report, report) == []
+    print("✅ Every retriever is scored, and a quality drop is flagged")
+
+
+def test_command_writes_report_and_table():
+    directory = tempfile.mkdtemp()
+    output, table = os.path.join(directory, "eval.json"), os.path.join(directory, "eval.md")
+    assert main(["--synthetic", "300", "--queries", "10", "--repeat", "1", "-o", output, "--table", table]) == 0
+    with open(output, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    assert report["meta"]["chunks"] == 300 and report["meta"]["queries"] == 10
+    with open(table, "r", encoding="utf-8") as f:
+        assert "| ranked |" in f.read()
+    assert main(["--synthetic", "300", "--queries", "10", "--repeat", "1", "--compare", output]) == 0
+
+    labelled = synthetic_set(300, 10)
+    assert all(len(query["relevant"]) == 3 for query in labelled["queries"])
+    print("✅ The command writes a JSON report and a comparison table")
+
+
+if __name__ == "__main__":
+    test_metrics()
+    test_bundled_set_ranks_retrievers()
+    test_command_writes_report_and_table()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test script for the HTTP service: routes, request validation and back-pressure
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+from content_maker.core.feedback import AsyncFeedbackQueue, FeedbackSpool
+from content_maker.core.server import ContentService, HttpServer
+from fixtures import FakeGateway
+
+
+class AsyncFakeGateway(FakeGateway):
+    """FakeGateway for the async service; calls wait for `gate` when one is set"""
+
+    def __init__(self):
+        super().__init__()
+        self.gate = None
+        self.feedback_sent = []
+
+    async def inference(self, **kwargs):
+        if self.gate is not None:
+            await self.gate.wait()
+        return super().inference(**kwargs)
+
+    async def feedback(self, **kwargs):
+        self.feedback_sent.append(kwargs)
+
+
+def make_sources():
+    sources_dir = tempfile.mkdtemp()
+    with open(os.path.join(sources_dir, "notes.json"), "w", encoding="utf-8") as f:
+        json.dump({"content": "Digital gardens grow from small notes tended over time."}, f)
+    return sources_dir
+
+
+async def request(port, method, path, body=None, raw_headers=None):
+    """(status, payload) for one request on a fresh connection"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    data = b"" if body is None else json.dumps(body).encode("utf-8")
+    headers = raw_headers if raw_headers is not None else f"Content-Length: {len(data)}\r\n"
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: test\r\n{headers}\r\n".encode("latin-1") + data)
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    payload = json.loads(await reader.readexactly(length))
+    writer.close()
+    return status, payload
+
+
+async def run_service(check, **service_args):
+    client = AsyncFakeGateway()
+    spool = FeedbackSpool(os.path.join(tempfile.mkdtemp(), "spool.jsonl"))
+    async with AsyncFeedbackQueue(client, spool=spool) as feedback_queue:
+        service = ContentService(client, make_sources(), feedback_queue=feedback_queue, **service_args)
+        server = await asyncio.start_server(HttpServer(service, max_body_bytes=4096).handle_connection, "127.0.0.1", 0)
+        async with server:
+            await check(server.sockets[0].getsockname()[1], client, service)
+    return client, service
+
+
+def test_routes():
+    async def check(port, client, service):
+        status, ingested = await request(port, "POST", "/ingest", {})
+        assert status == 200 and ingested["sources"] == 1 and ingested["chunks"] == 1
+
+        status, threaded = await request(port, "POST", "/thread", {"question": "Why do gardens grow?"})
+        assert status == 200 and len(threaded["threads"]["threads"]) == 3
+
+        status, script = await request(port, "POST", "/synthesize", {"episode_id": threaded["episode_id"], "thread": 2})
+        assert status == 200 and script["thread_choice"] == "2" and script["script"]["title"]
+
+        status, queued = await request(port, "POST", "/feedback", {"episode_id": threaded["episode_id"], "value": 5})
+        assert status == 200 and queued == {"queued": True}
+
+        assert (await request(port, "POST", "/thread", {}))[0] == 400
+        assert (await request(port, "POST", "/feedback", {"episode_id": threaded["episode_id"]}))[0] == 400
+        assert (await request(port, "POST", "/synthesize", {"episode_id": "unknown"}))[0] == 404
+        assert (await request(port, "GET", "/thread"))[0] == 405
+        assert (await request(port, "GET", "/nowhere"))[0] == 404
+        status, health = await request(port, "GET", "/health")
+        assert status == 200 and health["ingested"] and health["requests"] == 10
+
+    client, _ = asyncio.run(run_service(check))
+    # Feedback is flushed when the queue closes
+    assert [item["value"] for item in client.feedback_sent] == [5.0]
+    print("✅ Ingest, thread, synthesize, feedback and health answer over HTTP")
+
+
+def test_bad_bodies_are_refused():
+    async def check(port, client, service):
+        status, payload = await request(port, "POST", "/thread", raw_headers="Content-Length: ten\r\n")
+        assert status == 400 and "Content-Length" in payload["error"]
+        assert (await request(port, "POST", "/thread", raw_headers="Content-Length: -5\r\n"))[0] == 400
+        # Refused from the header alone; the body is never read
+        status, payload = await request(port, "POST", "/ingest", raw_headers="Content-Length: 1000000000\r\n")
+        assert status == 413 and "limit is 4096" in payload["error"]
+
+        status, payload = await request(port, "POST", "/thread", raw_headers="Content-Length: 5\r\n\r\n[1, 2")
+        assert status == 400
+        assert (await request(port, "POST", "/ingest", {}))[0] == 200
+
+    asyncio.run(run_service(check))
+    print("✅ Malformed and oversized bodies get 400 and 413")
+
+
+def test_back_pressure():
+    async def check(port, client, service):
+        client.gate = asyncio.Event()
+        first = asyncio.create_task(request(port, "POST", "/thread", {"question": "Why do gardens grow?"}))
+        while service._pending < 1:
+            await asyncio.sleep(0.01)
+
+        # One request is waiting on the gateway; with max_pending=1 the next is turned away
+        status, payload = await request(port, "POST", "/thread", {"question": "And why do they wilt?"})
+        assert status == 503 and "retry later" in payload["error"]
+        assert service.stats["rejected"] == 1
+
+        client.gate.set()
+        assert (await first)[0] == 200
+
+    asyncio.run(run_service(check, max_concurrency=1, max_pending=1))
+    print("✅ Requests beyond max_pending get 503 and the waiting one completes")
+
+
+def test_research_queries_count_against_the_limit():
+    async def check(port, client, service):
+        client.gate = asyncio.Event()
+        first = asyncio.create_task(request(port, "POST", "/thread", {"question": "Why do gardens grow?"}))
+        # The first request is waiting on its research queries, which hold a slot
+        for _ in range(100):
+            if service._pending:
+                break
+            await asyncio.sleep(0.01)
+        assert service._pending == 1 and client.calls == 0
+
+        status, _ = await request(port, "POST", "/thread", {"question": "And why do they wilt?"})
+        assert status == 503
+        client.gate.set()
+        assert (await first)[0] == 200
+
+    asyncio.run(run_service(check, max_concurrency=1, max_pending=1, research_queries=3))
+    print("✅ Multi-query retrieval runs under the concurrency limit")
+
+
+if __name__ == "__main__":
+    test_routes()
+    test_bad_bodies_are_refused()
+    test_back_pressure()
+    test_research_queries_count_against_the_limit()
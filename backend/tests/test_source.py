@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test script for the slotted Source record
+"""
+
+import json
+import os
+import sys
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from content_maker.core.checkpoint import RunCheckpoint
+from content_maker.core.pipeline import build_sources
+from content_maker.core.source import Source, source_payload
+from content_maker.core.summariser import SourceSummariser
+
+
+def test_reads_like_a_dict():
+    source = Source("text", "Gardens grow.", source_url="https://example.com", source_title="Gardens")
+    as_dict = {"type": "text", "contents": "Gardens grow.",
+               "source_url": "https://example.com", "source_title": "Gardens"}
+
+    assert source == as_dict
+    assert dict(source) == as_dict
+    assert source["contents"] == "Gardens grow."
+    assert Source("text", "Plain").get("source_title") is None
+    assert "source_url" not in Source("text", "Plain")
+    assert not hasattr(source, "__dict__")
+    assert Source.from_mapping(as_dict) == source
+    print("✅ Source behaves like the dict it replaces")
+
+
+def test_payload_is_shared():
+    chunks = [Source("text", f"Source {i}", source_title=f"Title {i}") for i in range(3)]
+    first = build_sources(["chunk", *chunks])
+    second = build_sources(chunks)
+
+    assert first == [{"type": "text", "contents": "chunk"}] + [{"type": "text", "contents": f"Source {i}"} for i in range(3)]
+    # Each prompt reuses the same payload dicts instead of copying the chunks again
+    assert all(a is b for a, b in zip(first[1:], second))
+    assert source_payload({"type": "text", "contents": "x", "source_title": "t"}) == {"type": "text", "contents": "x"}
+    print("✅ Prompt payloads are built once per source")
+
+
+def test_checkpoint_round_trip():
+    checkpoint = RunCheckpoint.new("abc123", tempfile.mkdtemp())
+    sources = [Source("text", "Gardens grow.", source_title="Gardens"), Source("text", "Plain")]
+    checkpoint.save("process", sources)
+
+    with open(checkpoint.path / "process.json", "r", encoding="utf-8") as f:
+        stored = json.load(f)
+    assert stored == [{"type": "text", "contents": "Gardens grow.", "source_title": "Gardens"},
+                      {"type": "text", "contents": "Plain"}]
+    assert checkpoint.load("process") == sources
+
+    summarised = SourceSummariser(client=None)._apply(stored[0], {"parsed": {"summary": "Short."}})
+    assert isinstance(summarised, Source)
+    assert summarised.source_title == "Gardens"
+    assert summarised.contents.startswith("Summary of Gardens:")
+    print("✅ Sources checkpoint as plain JSON and summarise into Sources")
+
+
+if __name__ == "__main__":
+    test_reads_like_a_dict()
+    test_payload_is_shared()
+    test_checkpoint_round_trip()
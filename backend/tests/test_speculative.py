@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test script for speculative synthesis and thread choice resolution
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+from content_maker.core.pipeline import build_synthesis_input, select_threads
+from content_maker.core.speculative import SpeculativeSynthesizer, estimate_prompt_tokens
+from fixtures import SCRIPT_OUTPUT, THREADS_OUTPUT, FakeGateway
+
+QUESTION = "Why do digital gardens work?"
+SOURCES = [{"type": "text", "contents": "Gardens grow from small notes tended over time."}]
+EPISODE_ID = "0192ced0-947e-74b3-a3d7-02fd2c54d637"
+
+
+class FailingGateway(FakeGateway):
+    def inference(self, **kwargs):
+        raise ConnectionError("gateway unavailable")
+
+
+def speculate(client, **limits):
+    return SpeculativeSynthesizer(client, QUESTION, SOURCES, THREADS_OUTPUT, EPISODE_ID, **limits).start()
+
+
+def tokens_for(selected_threads):
+    return estimate_prompt_tokens(build_synthesis_input(QUESTION, SOURCES, THREADS_OUTPUT, selected_threads))
+
+
+def test_candidates_within_the_cap():
+    threads = THREADS_OUTPUT["threads"]
+    # 'all' comes right after the first thread, so the default choice is covered at the default cap
+    speculative = speculate(FakeGateway())
+    assert list(speculative.futures) == ["1", "all", "2"]
+    speculative.discard()
+
+    assert list(speculate(FakeGateway(), max_calls=1).futures) == ["1"]
+    assert speculate(FakeGateway(), max_calls=0).futures == {}
+
+    # Room for the singles but not for 'all': it is skipped, the cheaper threads still run
+    budget = sum(tokens_for([thread]) for thread in threads)
+    assert tokens_for(threads) > budget - tokens_for(threads[:1])
+    speculative = speculate(FakeGateway(), max_calls=4, token_budget=budget)
+    assert list(speculative.futures) == ["1", "2", "3"]
+    assert speculative.estimated_tokens <= budget
+    speculative.discard()
+    assert speculate(FakeGateway(), token_budget=0).futures == {}
+    print("✅ Speculation covers thread 1 and 'all' first, within the call cap and token budget")
+
+
+def test_take_hits_and_misses():
+    client = FakeGateway()
+    speculative = speculate(client)
+    result = speculative.take("all")
+    assert result["parsed"] == SCRIPT_OUTPUT
+    # The other speculations are dropped once a choice is taken
+    assert speculative.futures == {}
+
+    # A choice that was never speculated on, or whose call failed, falls back to a live call
+    assert speculate(FakeGateway()).take("3") is None
+    assert speculate(FailingGateway()).take("1") is None
+    print("✅ The chosen speculation is returned; misses and failures return None")
+
+
+def test_select_threads():
+    threads = THREADS_OUTPUT["threads"]
+    assert select_threads(threads, "all", quiet=True) == ("all", threads)
+    assert select_threads(threads, " ALL ", quiet=True) == ("all", threads)
+    assert select_threads(threads, "2", quiet=True) == ("2", [threads[1]])
+    assert select_threads(threads, 3, quiet=True) == ("3", [threads[2]])
+    # Anything else falls back to every thread
+    for choice in ("0", "4", "-1", "two", "", None):
+        assert select_threads(threads, choice, quiet=True) == ("all", threads), choice
+    print("✅ Thread choices resolve to a number or 'all'")
+
+
+if __name__ == "__main__":
+    test_candidates_within_the_cap()
+    test_take_hits_and_misses()
+    test_select_threads()
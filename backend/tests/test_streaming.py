@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Test script for incremental parsing of streamed inference output
+"""
+
+import io
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from content_maker.core.inference import stream_inference
+from content_maker.core.streaming import IncrementalJsonParser, ScriptPrinter, ThreadPrinter
+
+THREADS_OUTPUT = {
+    "threads": [
+        {
+            "title": "Gardens as \"intentional\" spaces",
+            "insight": "Tending ideas slowly — a counterweight to AI noise.\nSecond line.",
+            "supporting_quotes": ["Gardens grow at the pace of care"]
+        },
+        {
+            "title": "Growth over perfection",
+            "insight": "Unfinished notes are invited, not hidden.",
+            "supporting_quotes": ["Seedlings are allowed to be messy"]
+        }
+    ],
+    "summary": "Both threads frame curation as a human act."
+}
+
+SCRIPT_OUTPUT = {
+    "title": "Why gardens beat feeds",
+    "viewer": "Creatives tired of algorithmic noise",
+    "script": {
+        "hook": "What if your notes could grow?",
+        "context_curiosity_gaps": ["Gardens started as hypertext experiments.", "Now they are a quiet rebellion."],
+        "takeaway": "Curation is a human act.",
+        "ending": "What will you plant?"
+    },
+    "shotlist": ["Talking head", "Close-up of notebook", "Garden b-roll", "Screen recording"]
+}
+
+
+def feed_in_pieces(parser, text, size):
+    for i in range(0, len(text), size):
+        parser.feed(text[i:i + size])
+
+
+def test_parser_matches_json_loads():
+    """Any fragmentation of the stream parses to the same document"""
+    text = json.dumps(THREADS_OUTPUT, ensure_ascii=True, indent=2)
+    for size in (1, 3, 7, len(text)):
+        parser = IncrementalJsonParser()
+        feed_in_pieces(parser, text, size)
+        assert parser.close() == THREADS_OUTPUT
+
+
+def test_threads_complete_before_stream_ends():
+    """Each thread is reported as soon as its object closes"""
+    text = json.dumps(THREADS_OUTPUT, ensure_ascii=True)
+    seen = []
+    parser = IncrementalJsonParser(on_value=lambda path, value: seen.append((path, len(parser.text))))
+    feed_in_pieces(parser, text, 5)
+
+    thread_events = [(path, pos) for path, pos in seen if len(path) == 2 and path[0] == 'threads']
+    print(f"📊 Thread completion offsets: {thread_events} of {len(text)}")
+    assert [path for path, _ in thread_events] == [('threads', 0), ('threads', 1)]
+    assert thread_events[0][1] < len(text)
+
+
+def test_string_deltas_reassemble():
+    """String deltas decode escapes split across fragments"""
+    text = json.dumps(THREADS_OUTPUT, ensure_ascii=True)
+    deltas = {}
+    parser = IncrementalJsonParser(
+        on_string=lambda path, delta, done: deltas.__setitem__(path, deltas.get(path, "") + delta)
+    )
+    feed_in_pieces(parser, text, 2)
+    assert deltas[('threads', 0, 'insight')] == THREADS_OUTPUT['threads'][0]['insight']
+    assert deltas[('threads', 0, 'title')] == THREADS_OUTPUT['threads'][0]['title']
+
+
+def test_printers():
+    """Thread titles and script text are printed from the stream"""
+    out = io.StringIO()
+    parser = ThreadPrinter(out).parser()
+    feed_in_pieces(parser, json.dumps(THREADS_OUTPUT), 4)
+    assert "1. Gardens as \"intentional\" spaces" in out.getvalue()
+    assert "2. Growth over perfection" in out.getvalue()
+
+    out = io.StringIO()
+    parser = ScriptPrinter(out).parser()
+    feed_in_pieces(parser, json.dumps(SCRIPT_OUTPUT), 4)
+    print(out.getvalue())
+    assert "Hook: What if your notes could grow?\n" in out.getvalue()
+    assert "Context 2: Now they are a quiet rebellion.\n" in out.getvalue()
+    assert "Shot 4: Screen recording\n" in out.getvalue()
+
+
+class RawStreamClient:
+    """Streams a fixed raw output in small chunks"""
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def inference(self, episode_id=None, **kwargs):
+        for start in range(0, len(self.raw), 5):
+            yield SimpleNamespace(episode_id=episode_id, inference_id="inf", variant_name="v",
+                                  raw=self.raw[start:start + 5])
+
+
+class StoredResultCache:
+    def __init__(self, result):
+        self.result = result
+
+    def get(self, *args):
+        return dict(self.result)
+
+
+def test_malformed_output_degrades():
+    for raw in ('```json\n{"a": 1}\n```', '{"a": 1}}', '{"a": [1, 2}', 'Sorry, I cannot help with that.'):
+        parser = IncrementalJsonParser()
+        feed_in_pieces(parser, raw, 3)
+        assert parser.text == raw
+        try:
+            parser.close()
+            raise AssertionError(f"{raw!r} parsed")
+        except json.JSONDecodeError:
+            pass
+
+        # The stream completes and keeps the raw text, as before incremental parsing
+        result = stream_inference(RawStreamClient(raw), "synthesise_content", {}, ScriptPrinter(io.StringIO()).parser())
+        assert result["raw"] == raw and result["parsed"] is None
+
+        stored = {"raw": raw, "parsed": None, "variant_name": "v", "inference_id": "inf"}
+        cached = stream_inference(None, "synthesise_content", {}, IncrementalJsonParser(), cache=StoredResultCache(stored))
+        assert cached["parsed"] is None and cached["raw"] == raw
+    print("✅ Output that is not JSON ends with parsed=None instead of an exception")
+
+
+def test_long_output_parses_in_linear_time():
+    document = {"threads": [{"title": f"Thread {i}", "insight": "word " * 200} for i in range(200)]}
+    text = json.dumps(document)
+    strings = []
+    parser = IncrementalJsonParser(on_string=lambda path, delta, done: strings.append(delta))
+    started = time.perf_counter()
+    feed_in_pieces(parser, text, 8)
+    assert parser.close() == document
+    elapsed = time.perf_counter() - started
+    print(f"⏱️  {len(text) / 1e3:.0f}KB in 8-character pieces parsed in {elapsed * 1000:.0f}ms")
+    assert "".join(strings).count("word") == 200 * 200
+    # Re-copying the text on every fragment made this grow with the square of the length
+    assert elapsed < 2
+    print("✅ Long outputs parse without re-copying the text per fragment")
+
+
+if __name__ == "__main__":
+    test_parser_matches_json_loads()
+    test_threads_complete_before_stream_ends()
+    test_string_deltas_reassemble()
+    test_printers()
+    test_malformed_output_degrades()
+    test_long_output_parses_in_linear_time()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for single-pass, block-streamed URL detection
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from content_maker.processors.source_detector import SmartSourceDetector
+from content_maker.processors.urls import UrlScanner, scan_file, scan_urls
+
+NOTES = """Ideas for the garden video - see https://maggieappleton.com/garden-history.
+Draft: https://docs.google.com/document/d/abc_123-XY/edit?usp=sharing
+Sheet: https://docs.google.com/spreadsheets/d/sheet-1/edit
+Again https://maggieappleton.com/garden-history, and https://example.com/a?b=1&c=2!
+"""
+
+
+def test_one_pass_finds_both_kinds():
+    urls = scan_urls(NOTES)
+    assert urls.google_docs_urls == ["https://docs.google.com/document/d/abc_123-XY"]
+    # Trailing punctuation is dropped, repeats are kept once in first-seen order
+    assert urls.webpage_urls == ["https://maggieappleton.com/garden-history", "https://example.com/a?b=1&c=2"]
+
+    # Every split point, including mid-scheme and mid-URL, gives the same answer as one block
+    for size in range(1, 40):
+        scanner = UrlScanner()
+        for start in range(0, len(NOTES), size):
+            scanner.feed(NOTES[start:start + size])
+        scanner.close()
+        assert scanner.google_docs_urls == urls.google_docs_urls, size
+        assert scanner.webpage_urls == urls.webpage_urls, size
+    print("✅ Docs and webpage URLs come out of one scan, whatever the block boundaries")
+
+
+def test_large_notes_stream_in_blocks():
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "transcript.md")
+    line = "and then we talked about tending notes over time instead of publishing them once " * 3
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(20000):
+            f.write(f"{line}https://example.com/episode/{i // 400}\n" if i % 400 == 0 else line + "\n")
+        f.write("https://docs.google.com/document/d/final-doc/edit")
+    size = os.path.getsize(path)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    scanner = UrlScanner()
+    with open(path, "r", encoding="utf-8") as f:
+        for block in iter(lambda: f.read(1 << 16), ''):
+            scanner.feed(block)
+    scanner.close()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"⏱️  {size / 1e6:.1f}MB scanned in {elapsed * 1000:.0f}ms, peak {peak / 1e3:.0f}KB")
+    # Scanning alone holds a block or two, not the file
+    assert peak < size / 4
+    assert scanner.google_docs_urls == ["https://docs.google.com/document/d/final-doc"]
+    assert len(scanner.webpage_urls) == 50
+
+    tracemalloc.start()
+    urls = scan_file(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert urls.webpage_urls == scanner.webpage_urls
+    # The file's text is not kept for the caller: it is read again only if it is processed
+    assert peak < size / 4
+    print("✅ A multi-megabyte transcript is scanned block by block")
+
+
+def test_detection_urls_are_not_scanned_again():
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "notes.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("Plain notes with no links at all")
+
+    detector = SmartSourceDetector()
+    source_info = detector.detect_source_type(path)
+    assert source_info['type'] == 'text' and source_info['metadata']['webpage_urls'] == []
+    assert source_info['content'] is None and detector.source_content(source_info) == "Plain notes with no links at all"
+
+    def rescan(text):
+        raise AssertionError("processing scanned the text again")
+    detector.web_scraper.extract_webpage_urls = rescan
+    assert detector.source_urls(source_info) == []
+    assert [source['contents'] for source in detector.process_source(source_info)] == ["Plain notes with no links at all"]
+
+    # Sources built by hand still have their URLs found
+    manual = {'type': 'text', 'path': path, 'content': "see https://example.com/x.", 'metadata': {'filename': 'x'}}
+    assert detector.source_urls(manual) == [('webpage', "https://example.com/x")]
+    print("✅ URLs found at detection are carried into processing")
+
+
+if __name__ == "__main__":
+    test_one_pass_finds_both_kinds()
+    test_large_notes_stream_in_blocks()
+    test_detection_urls_are_not_scanned_again()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Test script for watch mode: debounced file events and in-place store updates
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from content_maker.core.server import ContentService, stop_watch
+from content_maker.core.source_store import ProcessedSourceStore
+from content_maker.core.watch import SourceWatcher, apply_changes
+from content_maker.processors.source_detector import SmartSourceDetector
+
+
+def write_source(directory, name, content):
+    with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+        json.dump({"content": content}, f)
+
+
+def rebuilt_chunks(store):
+    """Chunks a full refresh of the same directory would index"""
+    fresh = ProcessedSourceStore(store.detector, store.sources_dir)
+    fresh.refresh()
+    return fresh.index.chunks
+
+
+def test_update_file_in_place():
+    sources_dir = tempfile.mkdtemp()
+    write_source(sources_dir, "a.json", "Gardens need tending. " * 50)
+    write_source(sources_dir, "c.json", "Community grows slowly. " * 50)
+    store = ProcessedSourceStore(SmartSourceDetector(), sources_dir)
+    store.refresh()
+
+    # A new file between the existing two lands in the middle of the index
+    write_source(sources_dir, "b.json", "Notes about digital gardens. " * 80)
+    assert store.update_file(os.path.join(sources_dir, "b.json")) == "added"
+    assert store.index.chunks == rebuilt_chunks(store)
+    assert store.update_file(os.path.join(sources_dir, "b.json")) == "unchanged"
+
+    write_source(sources_dir, "a.json", "Rewritten first source. " * 10)
+    assert store.update_file(os.path.join(sources_dir, "a.json")) == "updated"
+    assert store.index.chunks == rebuilt_chunks(store)
+
+    os.remove(os.path.join(sources_dir, "c.json"))
+    assert store.update_file(os.path.join(sources_dir, "c.json")) == "removed"
+    assert store.index.chunks == rebuilt_chunks(store)
+    assert len(store.processed_sources()) == 2
+    print("✅ Added, updated and removed files update the index in place")
+
+
+def check_watcher(use_inotify):
+    sources_dir = tempfile.mkdtemp()
+    store = ProcessedSourceStore(SmartSourceDetector(), sources_dir)
+    store.refresh()
+
+    def drop_files():
+        time.sleep(0.2)
+        write_source(sources_dir, ".hidden.json", "ignored")
+        with open(os.path.join(sources_dir, "new.json"), "w", encoding="utf-8") as f:
+            # Written in pieces, as a slow copy would be; reported once
+            f.write('{"content": "Gardens ')
+            f.flush()
+            time.sleep(0.1)
+            f.write('grow."}')
+
+    with SourceWatcher(sources_dir, debounce_s=0.3, poll_interval_s=0.1, use_inotify=use_inotify) as watcher:
+        writer = threading.Thread(target=drop_files)
+        started = time.perf_counter()
+        writer.start()
+        paths = watcher.changes(timeout=5)
+        changes = apply_changes(store, paths)
+        elapsed = time.perf_counter() - started
+        writer.join()
+
+        print(f"👀 {watcher.backend}: {[os.path.basename(path) for path in paths]} in {elapsed:.2f}s")
+        assert [os.path.basename(path) for path in paths] == ["new.json"]
+        assert changes["added"] == [os.path.join(sources_dir, "new.json")]
+        assert [chunk["contents"] for chunk in store.index.chunks] == ["Gardens grow."]
+        assert elapsed < 3
+        assert watcher.changes(timeout=0.3) == set()
+    return watcher.backend
+
+
+def test_watcher_backends():
+    backends = {check_watcher(use_inotify=False)}
+    if sys.platform.startswith("linux"):
+        backends.add(check_watcher(use_inotify=True))
+    print(f"✅ Debounced changes reported by {', '.join(sorted(backends))}")
+
+
+class FlakyDetector(SmartSourceDetector):
+    """Fails on files named broken*, as a file removed or rewritten mid-read would"""
+
+    def detect_source_type(self, source_path):
+        if os.path.basename(source_path).startswith("broken"):
+            raise FileNotFoundError(source_path)
+        return super().detect_source_type(source_path)
+
+
+class ScriptedWatcher:
+    """Reports the given batches, then waits out each timeout like an idle directory"""
+
+    backend = "scripted"
+
+    def __init__(self, batches):
+        self.batches = list(batches)
+        self.waiting = 0
+        self.closed_while_waiting = False
+
+    def changes(self, timeout=None):
+        self.waiting += 1
+        try:
+            if self.batches:
+                return self.batches.pop(0)
+            time.sleep(timeout)
+            return set()
+        finally:
+            self.waiting -= 1
+
+    def close(self):
+        self.closed_while_waiting = self.waiting > 0
+
+
+def test_failing_files_do_not_stop_the_watch():
+    sources_dir = tempfile.mkdtemp()
+    for name in ("broken.json", "good.json"):
+        write_source(sources_dir, name, f"Notes from {name}")
+    paths = {os.path.join(sources_dir, name) for name in ("broken.json", "good.json")}
+
+    store = ProcessedSourceStore(FlakyDetector(), sources_dir)
+    changes = apply_changes(store, paths)
+    assert changes["failed"] == [os.path.join(sources_dir, "broken.json")]
+    assert changes["added"] == [os.path.join(sources_dir, "good.json")]
+
+    async def serve_watch():
+        service = ContentService(None, sources_dir, detector=FlakyDetector())
+        write_source(sources_dir, "later.json", "Notes from later")
+        watcher = ScriptedWatcher([paths, {os.path.join(sources_dir, "later.json")}])
+        task = asyncio.create_task(service.watch(watcher))
+        while watcher.batches or not watcher.waiting:
+            await asyncio.sleep(0.01)
+        assert not task.done()
+        await stop_watch(task, watcher)
+        return service, watcher
+
+    service, watcher = asyncio.run(serve_watch())
+    assert sorted(os.path.basename(key) for key in service.store.entries) == ["good.json", "later.json"]
+    # The watch waited for its thread to leave changes() before the watcher was closed
+    assert not watcher.closed_while_waiting
+    print("✅ A file that fails to process is skipped and the watch carries on")
+
+
+if __name__ == "__main__":
+    test_update_file_in_place()
+    test_watcher_backends()
+    test_failing_files_do_not_stop_the_watch()